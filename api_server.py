@@ -0,0 +1,309 @@
+# api_server.py
+"""Headless HTTP API for the Elite Auto Sales Academy bot.
+
+Exposes the same engine the Streamlit app uses (elite_bot.engine.respond_to)
+without the per-event script reruns:
+
+    POST /chat     {"session_id": "...", "user_name": "...", "message": "..."}
+    POST /command  {"session_id": "...", "user_name": "...", "command": "!pvf"}
+    GET  /queue?session_id=...   -> {"position": n} while a turn waits for an OpenAI slot
+    GET  /manager/rollup?grain=week&period=2026-10-12&tenant=north   -> per-rep totals, ratios, band counts
+    GET  /health
+    GET  /ready    -> 200 once the start-up warm-up has run, 503 before (for readiness probes)
+    POST /admin/profile {"token": "...", "sessions": ["sess-ab12"], "sample": 5, "min_ms": 2000}
+
+Both POST routes accept an optional "event_id"; a retried or double-submitted
+request with the same id returns the original reply without a second turn
+(or 409 with "retry_after" while the first delivery is still running).
+They also accept an optional "tenant" (a dealership id from AGBOT_TENANTS);
+a session stays with the tenant it started with.
+
+Run with:
+    uvicorn api_server:app --host 0.0.0.0 --port 8600
+or:
+    python api_server.py
+"""
+import os
+import json
+import time
+import asyncio
+import datetime
+from typing import Dict, Any, Optional, Tuple
+
+from urllib.parse import parse_qs
+
+from elite_bot import engine, events, answer_cache
+from elite_bot.scheduler import scheduler, circuit
+from elite_bot.usage import tool_stats
+from elite_bot.replay import recorder
+from elite_bot.profiler import profiler
+from elite_bot.warmup import warmup
+from elite_bot.rollups import aggregates_for, period_of, GRAINS
+from elite_bot.tenants import tenants
+
+CORS_ORIGIN = os.getenv("AGBOT_API_CORS_ORIGIN", "*")
+# Admin routes are disabled unless a token is configured
+ADMIN_TOKEN = os.getenv("AGBOT_ADMIN_TOKEN", "")
+MAX_BODY_BYTES = 64 * 1024
+
+
+# =========================
+# Session store (keyed by session_id)
+# =========================
+class SessionStore:
+    """In-memory sessions with idle eviction after engine.SESSION_TTL."""
+
+    def __init__(self, ttl: float = engine.SESSION_TTL):
+        self.ttl = ttl
+        self._sessions: Dict[str, Dict[str, Any]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._touched: Dict[str, float] = {}
+
+    def get(self, session_id: Optional[str], tenant: Optional[str] = None) -> Tuple[Dict[str, Any], asyncio.Lock]:
+        self._evict_idle()
+        session = self._sessions.get(session_id) if session_id else None
+        if session is None:
+            session = {}
+            engine.init_session(session, session_id=session_id, tenant=tenant)
+            session_id = session["session_id"]
+            self._sessions[session_id] = session
+            self._locks[session_id] = asyncio.Lock()
+        self._touched[session_id] = time.time()
+        return session, self._locks[session_id]
+
+    def peek(self, session_id: str) -> Optional[Dict[str, Any]]:
+        return self._sessions.get(session_id)
+
+    def _evict_idle(self) -> None:
+        cutoff = time.time() - self.ttl
+        for sid in [s for s, t in self._touched.items() if t < cutoff]:
+            lock = self._locks.get(sid)
+            if lock is not None and lock.locked():
+                continue
+            self._sessions.pop(sid, None)
+            self._locks.pop(sid, None)
+            self._touched.pop(sid, None)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+sessions = SessionStore()
+
+
+# =========================
+# Handlers
+# =========================
+async def run_turn(payload: Dict[str, Any], text: str, action: str = "send_message") -> Tuple[int, Dict[str, Any]]:
+    session, lock = sessions.get(payload.get("session_id"), payload.get("tenant"))
+    # One turn at a time per session; different sessions run concurrently.
+    async with lock:
+        user_name = (payload.get("user_name") or "").strip()
+        if user_name:
+            session["user_name"] = user_name
+        engine.init_session(session)
+        event_id = payload.get("event_id")
+        ledger = session["event_ledger"]
+        outcome = ledger.begin(payload) if event_id else events.NEW
+        if outcome == events.IN_FLIGHT:
+            # The first delivery has no reply yet; never answer a retry with an empty success
+            return 409, {"error": "event is still being processed; retry shortly",
+                         "event_id": event_id, "retry_after": 1}
+        if outcome == events.DUPLICATE:
+            reply = ledger.result(event_id)
+        else:
+            loop = asyncio.get_running_loop()
+            field = "command" if action == "send_command" else "message"
+            turn = recorder.begin(session, {"action": action, field: text, "user_name": session["user_name"]})
+            try:
+                reply = await loop.run_in_executor(None, engine.respond_to, session, text, None, event_id or "")
+            except Exception:
+                if event_id:
+                    ledger.abandon(payload)
+                raise
+            if event_id:
+                ledger.finish(payload, reply)
+            recorder.end(turn)
+        return 200, {
+            "session_id": session["session_id"],
+            "user_name": session["user_name"],
+            "tenant": session["tenant"],
+            "reply": reply,
+            "messages": session["messages"],
+        }
+
+
+def tenant_error(payload: Dict[str, Any]) -> Optional[str]:
+    """Why the payload's tenant can't be used, or None when it can."""
+    tenant_id = payload.get("tenant")
+    if not tenant_id:
+        return None
+    if not isinstance(tenant_id, str) or not tenants.known(tenant_id):
+        return f"unknown tenant {tenant_id!r}"
+    session = sessions.peek(payload.get("session_id") or "")
+    if session is not None and session.get("tenant") != tenant_id:
+        return "session belongs to another tenant"
+    return None
+
+
+async def handle_chat(payload: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+    message = (payload.get("message") or "").strip()
+    if not message:
+        return 400, {"error": "message is required"}
+    error = tenant_error(payload)
+    if error:
+        return 400, {"error": error}
+    return await run_turn(payload, message)
+
+
+async def handle_command(payload: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+    command = (payload.get("command") or "").strip()
+    if not command.startswith("!"):
+        return 400, {"error": "command must start with '!'"}
+    error = tenant_error(payload)
+    if error:
+        return 400, {"error": error}
+    return await run_turn(payload, command, action="send_command")
+
+
+def manager_rollup(grain: str, period: str, tenant: str = "") -> Tuple[int, Dict[str, Any]]:
+    if grain not in GRAINS:
+        return 400, {"error": f"grain must be one of {GRAINS}"}
+    if not tenants.known(tenant):
+        return 400, {"error": f"unknown tenant {tenant!r}"}
+    aggregates = aggregates_for(tenants.resolve(tenant))
+    aggregates.refresh_from_mirror()
+    periods = aggregates.periods(grain)
+    try:
+        day = datetime.date.fromisoformat(period) if period else (periods[0] if periods else None)
+    except ValueError:
+        return 400, {"error": "period must be YYYY-MM-DD"}
+    if day is None:
+        return 200, {"grain": grain, "period": None, "reps": []}
+    day = datetime.date.fromordinal(period_of(day.toordinal(), grain))
+    table = aggregates.rep_table(grain, day)
+    reps = [
+        {k: (None if isinstance(v, float) and v != v else (v.item() if hasattr(v, "item") else v)) for k, v in zip(table, row)}
+        for row in zip(*table.values())
+    ]
+    return 200, {"grain": grain, "period": day.isoformat(), "periods": [p.isoformat() for p in periods], "reps": reps}
+
+
+async def handle_profile(payload: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+    """Turn per-turn profiling on or off at runtime; an empty change returns the current settings."""
+    if not ADMIN_TOKEN or payload.get("token") != ADMIN_TOKEN:
+        return 403, {"error": "admin token required"}
+    sessions = payload.get("sessions")
+    if isinstance(sessions, str):
+        sessions = sessions.split(",")
+    try:
+        settings = profiler.configure(sessions=sessions, sample=payload.get("sample"),
+                                      mode=payload.get("mode"), min_ms=payload.get("min_ms"))
+    except (TypeError, ValueError) as e:
+        return 400, {"error": str(e)}
+    return 200, settings
+
+
+ROUTES = {
+    ("POST", "/chat"): handle_chat,
+    ("POST", "/command"): handle_command,
+    ("POST", "/admin/profile"): handle_profile,
+}
+
+
+# =========================
+# ASGI plumbing
+# =========================
+async def read_body(receive) -> bytes:
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if len(body) > MAX_BODY_BYTES:
+            raise ValueError("request body too large")
+        if not message.get("more_body"):
+            return body
+
+
+async def send_json(send, status: int, data: Dict[str, Any]) -> None:
+    payload = json.dumps(data).encode("utf-8") if status != 204 else b""
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(payload)).encode()),
+            (b"access-control-allow-origin", CORS_ORIGIN.encode()),
+            (b"access-control-allow-headers", b"content-type"),
+            (b"access-control-allow-methods", b"GET, POST, OPTIONS"),
+        ],
+    })
+    await send({"type": "http.response.body", "body": payload})
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                warmup.start()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+    if scope["type"] != "http":
+        return
+
+    method, path = scope["method"], scope["path"].rstrip("/") or "/"
+    if method == "OPTIONS":
+        await send_json(send, 204, {})
+        return
+    if method == "GET" and path == "/health":
+        await send_json(send, 200, {"ok": True, "sessions": len(sessions), "openai": scheduler.stats(),
+                                    "circuit": circuit.stats(), "answer_cache": answer_cache.stats(),
+                                    "tools": tool_stats.stats(), "warmup": warmup.stats(),
+                                    "tenants": tenants.stats()})
+        return
+    if method == "GET" and path == "/ready":
+        await send_json(send, 200 if warmup.ready else 503, warmup.stats())
+        return
+    if method == "GET" and path == "/queue":
+        query = parse_qs(scope.get("query_string", b"").decode())
+        session_id = (query.get("session_id") or [""])[0]
+        session = sessions.peek(session_id)
+        position = scheduler.position(engine.fairness_key(session)) if session else 0
+        await send_json(send, 200, {"session_id": session_id, "position": position})
+        return
+
+    if method == "GET" and path == "/manager/rollup":
+        query = parse_qs(scope.get("query_string", b"").decode())
+        status, data = manager_rollup((query.get("grain") or ["week"])[0], (query.get("period") or [""])[0],
+                                      (query.get("tenant") or [""])[0])
+        await send_json(send, status, data)
+        return
+
+    handler = ROUTES.get((method, path))
+    if handler is None:
+        await send_json(send, 404, {"error": f"no route for {method} {path}"})
+        return
+
+    try:
+        raw = await read_body(receive)
+        payload = json.loads(raw or b"{}")
+        if not isinstance(payload, dict):
+            raise ValueError("JSON body must be an object")
+    except ValueError as e:
+        await send_json(send, 400, {"error": f"Invalid request: {e}"})
+        return
+
+    try:
+        status, data = await handler(payload)
+    except Exception as e:
+        print(f"Error handling {method} {path}: {e}")
+        status, data = 500, {"error": str(e)}
+    await send_json(send, status, data)
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host=os.getenv("AGBOT_API_HOST", "0.0.0.0"), port=int(os.getenv("AGBOT_API_PORT", "8600")))
@@ -1,4 +1,7 @@
 import os
+import re
+import json
+import hashlib
 import streamlit as st
 import streamlit.components.v1 as components
 
@@ -20,19 +23,61 @@ div[data-testid="stSidebar"] {display:none;}
 build_dir = os.path.join(os.path.dirname(__file__), "elite_chat_component", "frontend", "build")
 build_index = os.path.join(build_dir, "index.html")
 
-if not os.path.exists(build_index):
-    st.error(f"Could not find build index.html at {build_index}")
-    st.stop()
+# Inline the main JS/CSS bundle into the document so the iframe makes no asset requests
+INLINE_ASSETS = os.getenv("AGBOT_DIRECT_INLINE", "0") == "1"
 
-# Read the build index.html file
-try:
+
+def build_hash(index_path: str) -> str:
+    """Content hash of index.html; it names the hashed bundles, so it changes with every build."""
+    with open(index_path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()[:16]
+
+
+def _read(rel_path: str) -> str:
+    with open(os.path.join(build_dir, rel_path), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def inline_bundle(html_content: str) -> str:
+    """Replace the entrypoint <script>/<link> tags with the bundle contents."""
+    with open(os.path.join(build_dir, "asset-manifest.json"), "r", encoding="utf-8") as f:
+        entrypoints = json.load(f).get("entrypoints", [])
+    scripts = []
+    for entry in entrypoints:
+        if entry.endswith(".css"):
+            css = _read(entry).replace("</style", "<\\/style")
+            html_content = re.sub(rf'<link[^>]+href="\.?/?{re.escape(entry)}"[^>]*>',
+                                  lambda m: f"<style>{css}</style>", html_content)
+        elif entry.endswith(".js"):
+            html_content = re.sub(rf'<script[^>]+src="\.?/?{re.escape(entry)}"[^>]*></script>', "", html_content)
+            scripts.append(_read(entry).replace("</script", "<\\/script"))
+    # Deferred scripts ran after parsing; inline ones go after #root to keep that order
+    tail = "".join(f"<script>{js}</script>" for js in scripts)
+    return html_content.replace("</body>", tail + "</body>")
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def processed_html(digest: str, inline: bool) -> str:
+    """index.html with asset paths rewritten (and optionally inlined), once per build."""
     with open(build_index, "r", encoding="utf-8") as f:
         html_content = f.read()
-    
+
     # Modify paths to be relative (from absolute paths starting with /)
     html_content = html_content.replace('src="/', 'src="./elite_chat_component/frontend/build/')
     html_content = html_content.replace('href="/', 'href="./elite_chat_component/frontend/build/')
-    
+    if inline:
+        html_content = inline_bundle(html_content)
+    print(f"Prepared build {digest} ({len(html_content)} chars, inline={inline})")
+    return html_content
+
+
+if not os.path.exists(build_index):
+    st.error(f"Could not find build index.html at {build_index}")
+    st.stop()
+
+try:
+    html_content = processed_html(build_hash(build_index), INLINE_ASSETS)
+
     # Display the HTML component
     components.html(html_content, height=800, scrolling=True)
 except Exception as e:
@@ -0,0 +1,4 @@
+"""Elite Auto Sales Academy bot engine.
+
+Shared by the Streamlit app (app.py) and the headless HTTP API (api_server.py).
+"""
@@ -0,0 +1,211 @@
+# elite_bot/answer_cache.py
+"""Near-duplicate answer cache for repeated free-form questions.
+
+Reps ask the same things over and over ("how do I handle 'I need to talk to my
+wife'", "what's PVF again"). Questions are normalized and shingled into
+character 4-grams; a MinHash signature with LSH banding finds candidates in
+constant time, and a candidate is served when its exact Jaccard similarity
+clears AGBOT_ANSWER_CACHE_THRESHOLD. Entries are keyed by CHARACTER_VERSION,
+so editing the character prompt invalidates them, and evicted LRU-first.
+Each tenant (dealership) has its own cache, from cache_for(), so replies and
+evictions never cross dealerships.
+
+Only standalone turns are cached; see cacheable() in engine.py.
+"""
+import os
+import re
+import zlib
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+import numpy as np
+
+from .character import CHARACTER
+from .tenants import Tenant, current
+
+ANSWER_CACHE_ENABLED = os.getenv("AGBOT_ANSWER_CACHE", "1") != "0"
+ANSWER_CACHE_SIZE = int(os.getenv("AGBOT_ANSWER_CACHE_SIZE", "512"))
+ANSWER_CACHE_THRESHOLD = float(os.getenv("AGBOT_ANSWER_CACHE_THRESHOLD", "0.8"))
+
+CHARACTER_VERSION = hashlib.sha1(CHARACTER.encode("utf-8")).hexdigest()[:12]
+NAME_PLACEHOLDER = "\x00name\x00"
+
+SHINGLE = 4
+PERMUTATIONS = 64
+BANDS = 16  # 16 bands x 4 rows: pairs at Jaccard 0.8 collide with probability > 0.99
+_PRIME = (1 << 61) - 1
+_rng = np.random.default_rng(20261018)
+_A = _rng.integers(1, _PRIME, PERMUTATIONS, dtype=np.uint64)
+_B = _rng.integers(0, _PRIME, PERMUTATIONS, dtype=np.uint64)
+
+_QUOTES = str.maketrans({"’": "'", "‘": "'", "“": '"', "”": '"'})
+_NUMBER_RE = re.compile(r"\d+(?:\.\d+)?")
+
+
+def normalize(text: str) -> str:
+    t = (text or "").translate(_QUOTES).lower()
+    t = re.sub(r"[^a-z0-9!$%' ]+", " ", t)
+    t = t.replace("'", "")
+    return re.sub(r"\s+", " ", t).strip()
+
+
+def shingles(norm: str) -> FrozenSet[int]:
+    padded = f" {norm} "
+    if len(padded) <= SHINGLE:
+        return frozenset({zlib.crc32(padded.encode())})
+    return frozenset(zlib.crc32(padded[i:i + SHINGLE].encode()) for i in range(len(padded) - SHINGLE + 1))
+
+
+def signature(grams: FrozenSet[int]) -> np.ndarray:
+    x = np.fromiter(grams, dtype=np.uint64, count=len(grams))
+    # (a * x + b) mod p for every permutation; uint64 wraparound is fine for hashing
+    return ((np.outer(_A, x) + _B[:, None]) % _PRIME).min(axis=1)
+
+
+def jaccard(a: FrozenSet[int], b: FrozenSet[int]) -> float:
+    return len(a & b) / max(1, len(a | b))
+
+
+class _Entry:
+    __slots__ = ("version", "norm", "grams", "numbers", "bands", "answer", "hits")
+
+    def __init__(self, version, norm, grams, numbers, bands, answer):
+        self.version, self.norm, self.grams, self.numbers = version, norm, grams, numbers
+        self.bands, self.answer, self.hits = bands, answer, 0
+
+
+class AnswerCache:
+    def __init__(self, capacity: int = ANSWER_CACHE_SIZE, threshold: float = ANSWER_CACHE_THRESHOLD,
+                 version: str = CHARACTER_VERSION):
+        self.capacity = capacity
+        self.threshold = threshold
+        self.version = version
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str], _Entry]" = OrderedDict()
+        self._buckets: Dict[Tuple, set] = {}
+        self.counters = dict.fromkeys(("lookups", "hits", "exact_hits", "misses", "stores", "evictions"), 0)
+
+    def _bands(self, sig: np.ndarray) -> List[Tuple]:
+        rows = PERMUTATIONS // BANDS
+        return [(self.version, i, sig[i * rows:(i + 1) * rows].tobytes()) for i in range(BANDS)]
+
+    @staticmethod
+    def _personalize(answer: str, user_name: str, store: bool) -> Optional[str]:
+        """Swap the rep's name (whole words only) for the placeholder, or back.
+
+        Returns None on store when the name is also an ordinary word in the
+        answer ("Will" and "will"): its capitalized uses can't be told apart.
+        """
+        name = (user_name or "").strip()
+        if len(name) < 2 or name.lower() == "user":
+            return answer
+        if not store:
+            return answer.replace(NAME_PLACEHOLDER, name)
+        word = re.compile(rf"\b{re.escape(name)}\b")
+        if len(word.findall(answer)) != len(re.findall(rf"\b{re.escape(name)}\b", answer, flags=re.I)):
+            return None
+        return word.sub(NAME_PLACEHOLDER, answer)
+
+    def lookup(self, question: str, user_name: str = "") -> Optional[str]:
+        norm = normalize(question)
+        if not norm:
+            return None
+        with self._lock:
+            self.counters["lookups"] += 1
+            entry = self._entries.get((self.version, norm))
+            if entry is not None:
+                self.counters["exact_hits"] += 1
+            else:
+                entry = self._best_match(norm)
+            if entry is None:
+                self.counters["misses"] += 1
+                return None
+            self._entries.move_to_end((entry.version, entry.norm))
+            entry.hits += 1
+            self.counters["hits"] += 1
+            answer = entry.answer
+        return self._personalize(answer, user_name, store=False)
+
+    def _best_match(self, norm: str) -> Optional[_Entry]:
+        grams = shingles(norm)
+        numbers = tuple(_NUMBER_RE.findall(norm))
+        candidates = set()
+        for band in self._bands(signature(grams)):
+            candidates |= self._buckets.get(band, set())
+        best, best_score = None, self.threshold
+        for key in candidates:
+            entry = self._entries[key]
+            # "450 at 7%" and "500 at 7%" are different questions however similar the words
+            if entry.numbers != numbers:
+                continue
+            score = jaccard(grams, entry.grams)
+            if score >= best_score:
+                best, best_score = entry, score
+        return best
+
+    def store(self, question: str, answer: str, user_name: str = "") -> None:
+        norm = normalize(question)
+        if not norm or not answer:
+            return
+        answer = self._personalize(answer, user_name, store=True)
+        if answer is None:
+            return
+        grams = shingles(norm)
+        key = (self.version, norm)
+        entry = _Entry(self.version, norm, grams, tuple(_NUMBER_RE.findall(norm)),
+                       self._bands(signature(grams)), answer)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = entry
+            for band in entry.bands:
+                self._buckets.setdefault(band, set()).add(key)
+            self.counters["stores"] += 1
+            while len(self._entries) > self.capacity:
+                self._drop(next(iter(self._entries)))
+                self.counters["evictions"] += 1
+
+    def _drop(self, key: Tuple[str, str]) -> None:
+        entry = self._entries.pop(key)
+        for band in entry.bands:
+            bucket = self._buckets.get(band)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out = dict(self.counters)
+            out["entries"] = len(self._entries)
+        out["hit_rate"] = round(out["hits"] / out["lookups"], 3) if out["lookups"] else 0.0
+        out["version"] = self.version
+        return out
+
+
+_caches: Dict[str, AnswerCache] = {}
+_caches_lock = threading.Lock()
+
+
+def cache_for(tenant: Optional[Tenant] = None) -> AnswerCache:
+    """The tenant's answer cache (the current tenant's by default), created on first use."""
+    tenant = tenant or current()
+    with _caches_lock:
+        found = _caches.get(tenant.id)
+        if found is None:
+            found = _caches[tenant.id] = AnswerCache()
+        return found
+
+
+def stats() -> Dict[str, Dict[str, Any]]:
+    """Cache stats per tenant id, for GET /health."""
+    with _caches_lock:
+        caches = dict(_caches)
+    return {tenant_id: cache.stats() for tenant_id, cache in caches.items()}
@@ -0,0 +1,125 @@
+# elite_bot/config.py
+import os
+import json
+import requests
+from dotenv import load_dotenv
+import openai
+
+# Streamlit is optional here: the headless API and offline jobs import the
+# engine without a Streamlit runtime, so secrets are only read when available.
+try:
+    import streamlit as st
+except ImportError:  # pragma: no cover - headless installs
+    st = None
+
+# =========================
+# Setup
+# =========================
+load_dotenv()
+
+OPENAI_MODEL = os.getenv("AGBOT_MODEL", "gpt-4o")
+openai.api_key = os.getenv("OPENAI_API_KEY", "")
+
+# Admission control for OpenAI calls (shared by every session in the process)
+OPENAI_MAX_CONCURRENCY = int(os.getenv("AGBOT_OPENAI_MAX_CONCURRENCY", "8"))
+OPENAI_REQUESTS_PER_MINUTE = float(os.getenv("AGBOT_OPENAI_RPM", "120"))
+OPENAI_BURST = float(os.getenv("AGBOT_OPENAI_BURST", "10"))
+OPENAI_QUEUE_TIMEOUT = float(os.getenv("AGBOT_OPENAI_QUEUE_TIMEOUT", "90"))
+
+# Circuit breaker: after this many consecutive failed (or slow) calls, answer
+# from the offline responder for the cooldown, then let one trial call through
+OPENAI_CIRCUIT_FAILURES = int(os.getenv("AGBOT_CIRCUIT_FAILURES", "3"))
+OPENAI_CIRCUIT_COOLDOWN = float(os.getenv("AGBOT_CIRCUIT_COOLDOWN", "30"))
+OPENAI_SLOW_SECONDS = float(os.getenv("AGBOT_CIRCUIT_SLOW_SECONDS", "25"))
+
+class _SharedAdapter(requests.adapters.HTTPAdapter):
+    """Connection pool shared by every thread's openai session; lives as long as the process."""
+
+    def close(self):
+        # openai closes each thread's session every few minutes; keep the pool for the others
+        pass
+
+
+# openai keeps one requests.Session per thread. Each still gets its own
+# Session, but all of them draw on one thread-safe urllib3 pool, so a
+# connection opened by the start-up warm-up or an earlier turn is reused
+# instead of paying a TLS handshake on each new thread. max_retries matches
+# openai's own sessions (connection errors only)
+_OPENAI_ADAPTER = _SharedAdapter(pool_maxsize=max(10, OPENAI_MAX_CONCURRENCY), max_retries=2)
+
+
+def _openai_session() -> requests.Session:
+    session = requests.Session()
+    session.mount("https://", _OPENAI_ADAPTER)
+    return session
+
+
+openai.requestssession = _openai_session
+
+# Offer each tool only in its mode (daily-log tool in a !dailylog flow, session tool in a roleplay)
+OPENAI_TOOLS_BY_MODE = os.getenv("AGBOT_TOOLS_BY_MODE", "1") != "0"
+
+
+def _secret(key: str, default=None):
+    """Read a Streamlit secret, returning default when secrets are unavailable."""
+    if st is None:
+        return default
+    try:
+        if hasattr(st, 'secrets'):
+            return st.secrets.get(key, default)
+    except Exception:
+        pass
+    return default
+
+
+# =========================
+# Google Sheets config
+# =========================
+# Try to get spreadsheet IDs from Streamlit secrets first, fallback to environment variables
+DAILY_LOG_SPREADSHEET_ID = _secret("DAILY_LOG_SPREADSHEET_ID", "") or os.getenv("DAILY_LOG_SPREADSHEET_ID", "")
+SESSION_LOG_SPREADSHEET_ID = _secret("SESSION_LOG_SPREADSHEET_ID", "") or os.getenv("SESSION_LOG_SPREADSHEET_ID", "")
+
+print(f"Daily log sheet: {DAILY_LOG_SPREADSHEET_ID}, Session log sheet: {SESSION_LOG_SPREADSHEET_ID}")
+SCOPES = [
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive",
+    "https://www.googleapis.com/auth/drive.file"
+]
+# Try to get the service account JSON from multiple sources
+# 1. First check for Streamlit secrets (preferred for deployed apps)
+SERVICE_ACCOUNT_JSON = None
+try:
+    _gcp = _secret("gcp_service_account")
+    if _gcp:
+        print("Using service account from Streamlit secrets")
+        SERVICE_ACCOUNT_JSON = json.dumps(dict(_gcp))
+except Exception as e:
+    print(f"Warning: Could not load service account from Streamlit secrets: {e}")
+
+# 2. Fall back to environment variable if no secrets
+if not SERVICE_ACCOUNT_JSON:
+    SERVICE_ACCOUNT_JSON = os.getenv("GOOGLE_SERVICE_ACCOUNT_JSON")
+    if SERVICE_ACCOUNT_JSON and not SERVICE_ACCOUNT_JSON.startswith("{"):
+        # If it's not already a JSON string but a file path
+        try:
+            with open(SERVICE_ACCOUNT_JSON, 'r') as f:
+                SERVICE_ACCOUNT_JSON = f.read()
+        except Exception as e:
+            print(f"Warning: Could not read service account file at {SERVICE_ACCOUNT_JSON}: {e}")
+
+# Project root (credential files such as service_account.json live here)
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Local stores (usage ledger, mirrors, caches) live here
+DATA_DIR = os.getenv("AGBOT_DATA_DIR", os.path.join(ROOT_DIR, "data"))
+
+# OpenAI usage ledger: flush interval and USD price per 1M tokens (prompt, completion)
+USAGE_FLUSH_SECONDS = float(os.getenv("AGBOT_USAGE_FLUSH_SECONDS", "60"))
+OPENAI_PRICES = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4-turbo": (10.00, 30.00),
+    "gpt-3.5-turbo": (0.50, 1.50),
+}
+if os.getenv("AGBOT_PRICE_PROMPT") and os.getenv("AGBOT_PRICE_COMPLETION"):
+    OPENAI_PRICES[OPENAI_MODEL] = (float(os.getenv("AGBOT_PRICE_PROMPT")), float(os.getenv("AGBOT_PRICE_COMPLETION")))
@@ -0,0 +1,497 @@
+# elite_bot/engine.py
+import re
+import json
+import time
+import uuid
+import datetime
+from typing import Dict, Any, List, Optional
+import openai
+
+from .config import OPENAI_MODEL, OPENAI_TOOLS_BY_MODE
+from .prompt import prompt_for
+from .sheets import daily_log_append_or_update, session_log_append
+from .events import EventLedger
+from .scheduler import scheduler, circuit, CircuitOpen
+from .usage import ledger as usage_ledger, command_of, tool_stats
+from .leaderboard import LOCAL_COMMANDS
+from .answer_cache import cache_for, ANSWER_CACHE_ENABLED
+from . import fallback
+from . import dailylog
+from .replay import recorder
+from .profiler import profiler
+from .tenants import current as current_tenant, tenants, use as use_tenant, QuotaExceeded, TENANT_QUOTA_WAIT
+from . import rollups  # noqa: F401 - keeps the manager dashboard aggregates live
+
+# =========================
+# Number helpers & roleplay
+# =========================
+SESSION_TTL = 30 * 60
+NUM_RE = re.compile(r"(\d{2,5})")
+
+def extract_int(text: str) -> Optional[int]:
+    t = text.replace(",", "")
+    m = NUM_RE.search(t)
+    return int(m.group(1)) if m else None
+
+def compute_band(target: Optional[int], offer: Optional[int]) -> str:
+    if target is None or offer is None:
+        return ""
+    delta = offer - target
+    if delta <= 0: return "A"
+    if 1 <= delta <= 40: return "B"
+    return "C"
+
+def infer_scenario_from_text(txt: str) -> Optional[str]:
+    t = txt.lower()
+    if "!priceobjection" in t or "!roleplay price" in t: return "price"
+    if "!paymenttoohigh" in t or "!roleplay payment" in t: return "payment"
+    if "!tradevalue" in t or "!roleplay trade" in t: return "trade"
+    if "!thinkaboutit" in t: return "think"
+    if "!shoparound" in t: return "shop"
+    if "!spouse" in t: return "spouse"
+    if "!paymentvsprice" in t: return "paymentvsprice"
+    if "!timingstall" in t: return "timing"
+    if "!roleplay budget" in t or (t.startswith("!roleplay") and "budget" in t): return "budget"
+    return None
+
+# =========================
+# OpenAI tools (function calling)
+# =========================
+OPENAI_FUNCTIONS = [
+    {
+        "name": "append_daily_log",
+        "description": "Append exactly one row to the daily log Google Sheet after the four answers.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "user": {"type": "string"},
+                "ups": {"type": "string"},
+                "calls": {"type": "string"},
+                "followups": {"type": "string"},
+                "appointments": {"type": "string"}
+            },
+            "required": ["user", "ups", "calls", "followups", "appointments"]
+        }
+    },
+    {
+        "name": "log_session_turn",
+        "description": "Write one turn of the roleplay to the per-session sheet tab.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "session_id": {"type": "string"},
+                "user_name": {"type": "string"},
+                "scenario": {"type": "string"},
+                "step": {"type": "integer"},
+                "target_payment": {"type": "integer"},
+                "offer_payment": {"type": "integer"},
+                "band": {"type": "string"},
+                "message": {"type": "string"}
+            },
+            "required": ["session_id", "user_name", "scenario", "step", "band", "message"]
+        }
+    }
+]
+
+FUNCTIONS_BY_NAME = {f["name"]: f for f in OPENAI_FUNCTIONS}
+
+def tools_for(state: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Tools to offer this turn: only the ones the current mode can use."""
+    if not OPENAI_TOOLS_BY_MODE:
+        return OPENAI_FUNCTIONS
+    names = []
+    if state.get("flow") == "dailylog":
+        names.append("append_daily_log")
+    if state.get("scenario"):
+        names.append("log_session_turn")
+    return [FUNCTIONS_BY_NAME[n] for n in names]
+
+def tool_expected(name: str, state: Dict[str, Any]) -> bool:
+    if name == "append_daily_log":
+        return state.get("flow") == "dailylog"
+    if name == "log_session_turn":
+        return bool(state.get("scenario"))
+    return False
+
+def chat_completion(key: str = "anonymous", on_queue=None, tags: Optional[Dict[str, Any]] = None, **kwargs) -> Dict[str, Any]:
+    """openai.ChatCompletion.create behind the circuit breaker and admission scheduler,
+    recorded in the usage ledger."""
+    model = kwargs.get("model", OPENAI_MODEL)
+    tenant = current_tenant()
+    # Checked before the circuit: one dealership over its budget is not an upstream failure
+    if not tenant.openai_quota.spend(max_wait=TENANT_QUOTA_WAIT):
+        raise QuotaExceeded(f"OpenAI budget for {tenant.name} is used up")
+    if not circuit.allow():
+        raise CircuitOpen("OpenAI circuit is open")
+    queued = time.perf_counter()
+    upstream = False
+    try:
+        with scheduler.slot(key, on_wait=on_queue):
+            upstream = True
+            started = time.perf_counter()
+            queue_ms = (started - queued) * 1000
+            try:
+                response = openai.ChatCompletion.create(**kwargs)
+            except Exception as e:
+                # Upstream errors and very slow answers count against the circuit
+                circuit.record(False)
+                usage_ledger.record(model, None, (time.perf_counter() - started) * 1000, queue_ms, tags, error=True)
+                recorder.on_completion(tags, None, (time.perf_counter() - started) * 1000, error=str(e))
+                if isinstance(e, openai.error.RateLimitError):
+                    scheduler.throttle()
+                raise
+            latency_ms = (time.perf_counter() - started) * 1000
+            circuit.record(True, latency_ms / 1000)
+    finally:
+        if not upstream:
+            # Never reached OpenAI (e.g. QueueTimeout in our own queue): not a circuit
+            # failure, and a claimed half-open trial goes back
+            circuit.release()
+    usage_ledger.record(model, response.get("usage"), latency_ms, queue_ms, tags)
+    recorder.on_completion(tags, response, latency_ms)
+    return response
+
+def run_openai(messages: List[Dict[str, str]], key: str = "anonymous", on_queue=None,
+               tags: Optional[Dict[str, Any]] = None,
+               functions: Optional[List[Dict[str, Any]]] = OPENAI_FUNCTIONS) -> Dict[str, Any]:
+    # The schema is only attached (and function_call only set) when tools are offered
+    tool_kwargs = {"functions": functions, "function_call": "auto"} if functions else {}
+    try:
+        print(f"Running OpenAI with model: {OPENAI_MODEL}")
+        print("Messages summary:")
+        for msg in messages[:5]:  # Print first 5 messages for debugging
+            print(f"   - {msg['role']}")
+            
+        response = chat_completion(
+            key,
+            on_queue,
+            tags,
+            model=OPENAI_MODEL,
+            messages=messages,
+            temperature=0.3,
+            **tool_kwargs
+        )
+        print("OpenAI API call successful")
+        return response
+    except Exception as e:
+        print(f"OpenAI API call failed: {str(e)}")
+        print(f"Error response: {e.__dict__ if hasattr(e, '__dict__') else 'No details available'}")
+        # Return a fallback response
+        return {
+            "fallback": True,
+            "choices": [
+                {
+                    "message": {
+                        "content": f"Sorry, I encountered an error: {str(e)}. Please try again or contact support."
+                    }
+                }
+            ]
+        }
+
+# =========================
+# Message history management
+# =========================
+def truncate_messages(messages: List[Dict[str, str]], max_messages: int = 10) -> List[Dict[str, str]]:
+    """Truncate message history to avoid context length issues."""
+    # Always keep system messages and the last max_messages non-system messages
+    system_messages = [msg for msg in messages if msg['role'] == 'system']
+    non_system_messages = [msg for msg in messages if msg['role'] != 'system']
+    
+    # Keep only the most recent non-system messages
+    if len(non_system_messages) > max_messages:
+        print(f"Truncating message history from {len(non_system_messages)} to {max_messages} messages")
+        non_system_messages = non_system_messages[-max_messages:]
+    
+    # Combine and return
+    return system_messages + non_system_messages
+
+
+# =========================
+# Session defaults for the engine
+# =========================
+WELCOME_MESSAGE = "Welcome to Elite Auto Sales Academy. Use the commands from the sidebar (e.g., !scripts) or type your message below."
+
+def new_engine_state() -> Dict[str, Any]:
+    return {
+        "scenario": "",
+        "step": 0,
+        "target": None,
+        "offer": None,
+        "band": "",
+        "flow": "",  # "dailylog" while the four daily-log answers are being collected
+        "dailylog": dailylog.new_form(),
+        "turn": 0,  # turns answered this session; advances only once a turn is logged
+        "last_updated": time.time(),
+    }
+
+def init_session(session, session_id: Optional[str] = None, tenant: Optional[str] = None) -> None:
+    """Fill in engine defaults on a session mapping (st.session_state or a plain dict)."""
+    if "session_id" not in session:
+        session["session_id"] = session_id or f"sess-{uuid.uuid4().hex[:10]}"
+    if "tenant" not in session:
+        session["tenant"] = tenants.resolve(tenant).id  # the dealership; fixed for the session
+    if "user_name" not in session:
+        session["user_name"] = "User"
+    if "app_version" not in session:
+        session["app_version"] = "1.0.1"  # Track version for debugging
+
+    if "messages" not in session:
+        session["messages"] = [
+            {"role": "assistant", "content": WELCOME_MESSAGE}
+        ]
+    else:
+        # Cleanup message history to prevent it from growing too large
+        if len(session["messages"]) > 30:  # Keep only the last 30 messages
+            session["messages"] = session["messages"][-30:]
+            print("Message history cleanup executed. Keeping the last 30 messages.")
+    if "conversations" not in session:
+        session["conversations"] = {}
+    if "engine_state" not in session:
+        session["engine_state"] = new_engine_state()
+    if "event_ledger" not in session:
+        session["event_ledger"] = EventLedger()  # Exactly-once component events
+
+# =========================
+# Core responder (text -> OpenAI -> tool-calls -> reply)
+# =========================
+def fairness_key(session) -> str:
+    """Scheduler key for a session: the rep's name (per dealership), or the session when unnamed."""
+    name = (session.get("user_name") or "").strip().lower()
+    if not name or name == "user":
+        return session["session_id"]
+    tenant = session.get("tenant") or tenants.default.id
+    return name if tenant == tenants.default.id else f"{tenant}:{name}"
+
+# Commands that start or drive a stateful flow; their replies are never cached
+STATEFUL_COMMANDS = {"!dailylog", "!roleplay"}
+CACHE_MIN_WORDS = 3
+
+def cacheable(text: str, state: Dict[str, Any], scenario_cmd: Optional[str],
+              history: List[Dict[str, Any]]) -> bool:
+    """True for standalone turns: no roleplay or flow running or starting, and either
+    a command or a real question that opens the conversation."""
+    if not ANSWER_CACHE_ENABLED or state.get("scenario") or state.get("flow") or scenario_cmd:
+        return False
+    command = command_of(text)
+    if command in STATEFUL_COMMANDS:
+        return False
+    if command != "chat":
+        return True
+    # A later free-form message ("what about the trade?") can lean on earlier
+    # replies, so the same words may need a different answer in another session
+    if any(m.get("role") == "user" for m in history):
+        return False
+    # Short replies ("12", "yes", "continue") answer the previous message
+    return len(text.split()) >= CACHE_MIN_WORDS
+
+def respond_to(session, text: str, on_queue=None, event_id: str = "") -> str:
+    """Run one chat turn against a session mapping and return the assistant reply.
+
+    on_queue(position) is called while the turn waits for an OpenAI slot.
+    event_id, when the client sent one, keys the turn's session-log row;
+    otherwise the key is the session id and turn number.
+    """
+    # Sheets writes, caches and budgets below all belong to the session's dealership
+    with use_tenant(session.get("tenant")), profiler.turn(session, "respond_to"):
+        return _respond_turn(session, text, on_queue, event_id)
+
+def _respond_turn(session, text: str, on_queue=None, event_id: str = "") -> str:
+    state = session["engine_state"]
+    key = fairness_key(session)
+
+    # TTL reset
+    now = time.time()
+    if now - state.get("last_updated", now) > SESSION_TTL:
+        state.update({"scenario": "", "step": 0, "target": None, "offer": None, "band": "", "flow": ""})
+
+    # Commands answered from local data, no OpenAI call
+    local_reply = LOCAL_COMMANDS.get(command_of(text))
+    if local_reply:
+        assistant_text = local_reply(session["user_name"], text)
+        session["messages"].append({"role": "user", "content": text})
+        session["messages"].append({"role": "assistant", "content": assistant_text})
+        return assistant_text
+
+    txt_lower = text.lower().strip()
+    scenario_cmd = infer_scenario_from_text(text)
+    if scenario_cmd:
+        state["scenario"] = scenario_cmd
+        state["step"] = 0
+
+    # The !dailylog flow lasts until the row is written; any other command ends it
+    if command_of(text) == "!dailylog":
+        state["flow"] = "dailylog"
+    elif command_of(text) != "chat" or scenario_cmd:
+        state["flow"] = ""
+
+    # The daily log is a local form: prompts, parsing and the write need no OpenAI call
+    if dailylog.LOCAL_DAILYLOG and state.get("flow") == "dailylog":
+        if command_of(text) == "!dailylog":
+            assistant_text = dailylog.start(state)
+        elif txt_lower in ("end", "cancel"):
+            state.update({"flow": "", "dailylog": dailylog.new_form()})
+            assistant_text = "Daily log cancelled. Run !dailylog when you're ready."
+        else:
+            assistant_text = dailylog.handle(state, session["user_name"], text)
+        state["last_updated"] = time.time()
+        session["messages"].append({"role": "user", "content": text})
+        session["messages"].append({"role": "assistant", "content": assistant_text})
+        return assistant_text
+
+    if txt_lower in ("continue", "end", "restart"):
+        if txt_lower == "restart":
+            state["step"] = 0
+        elif txt_lower == "end":
+            state.update({"scenario": "", "step": 0, "target": None, "offer": None, "band": "", "flow": ""})
+    else:
+        # Offer capture
+        if any(k in txt_lower for k in ["we’re at", "we're at"]) or txt_lower.startswith("$") or re.search(r"\b(at|=)\s*\$?\d+", txt_lower):
+            offer = extract_int(text)
+            if offer is not None:
+                state["offer"] = offer
+        # Target capture
+        if any(k in txt_lower for k in ["under", "closer to", "around", "about", "target", "budget", "cap"]):
+            target = extract_int(text)
+            if target is not None:
+                state["target"] = target
+
+    state["band"] = compute_band(state.get("target"), state.get("offer"))
+    state["last_updated"] = time.time()
+
+    # Near-duplicate of a question already answered, no OpenAI call
+    use_cache = cacheable(text, state, scenario_cmd, session["messages"])
+    if use_cache:
+        cached = cache_for().lookup(text, session["user_name"])
+        if cached is not None:
+            session["messages"].append({"role": "user", "content": text})
+            session["messages"].append({"role": "assistant", "content": cached})
+            return cached
+
+    # Push user message
+    session["messages"].append({"role": "user", "content": text})
+
+    # Build OpenAI messages
+    system_state = {
+        "user_name": session["user_name"],
+        "session_id": session["session_id"],
+        "scenario": state.get("scenario") or "",
+        "step": int(state.get("step", 0)),
+        "target_payment": state.get("target"),
+        "offer_payment": state.get("offer"),
+        "band": state.get("band"),
+        "last_updated": datetime.datetime.utcnow().isoformat()
+    }
+    # Build the complete message list
+    system_messages = [
+        {"role": "system", "content": prompt_for(text, state.get("scenario") or "", state.get("flow") or "")},
+        {"role": "system", "content": f"User: {session['user_name']}. Session: {session['session_id']}."},
+        {"role": "system", "content": "Short, natural dealership language. ~2 sentences per turn. End with a clear next step."},
+        {"role": "system", "content": f"SESSION_STATE_JSON={json.dumps(system_state)}"}
+    ]
+    
+    conversation_messages = [m for m in session["messages"] if m["role"] in ("user", "assistant")]
+    
+    # Combine and truncate to avoid context length issues
+    messages = system_messages + conversation_messages
+    messages = truncate_messages(messages, max_messages=15)
+    
+    print(f"Using truncated message history with {len(messages)} messages")
+
+    # Call OpenAI (with function calling)
+    # Usage ledger tags for every completion this turn makes
+    tags = {
+        "tenant": session.get("tenant") or tenants.default.id,
+        "session_id": session["session_id"],
+        "user_name": session["user_name"],
+        "scenario": state.get("scenario") or "",
+        "command": command_of(text),
+    }
+    if circuit.is_open():
+        # Upstream is down or slow: answer from the playbook without queueing
+        ai = {"fallback": True, "choices": [{"message": {"content": fallback.answer(text)}}]}
+    else:
+        tools = tools_for(state)
+        ai = run_openai(messages, key=key, on_queue=on_queue, tags=tags, functions=tools)
+        if ai.get("fallback"):
+            ai["choices"][0]["message"]["content"] = fallback.answer(text)
+        else:
+            called = (ai["choices"][0]["message"].get("function_call") or {}).get("name")
+            tool_stats.record(len(tools), called, tool_expected(called, state) if called else True)
+    msg = ai["choices"][0]["message"]
+    if use_cache and not msg.get("function_call") and not ai.get("fallback"):
+        cache_for().store(text, msg.get("content") or "", session["user_name"])
+
+    # Tool calls
+    tool_log: Dict[str, Any] = {}
+    if "function_call" in msg and msg["function_call"]:
+        fn = msg["function_call"]["name"]
+        args_json = msg["function_call"].get("arguments") or "{}"
+        try:
+            args = json.loads(args_json)
+        except json.JSONDecodeError:
+            args = {}
+
+        if fn == "append_daily_log":
+            try:
+                result = daily_log_append_or_update(
+                    user=args.get("user", session["user_name"]),
+                    ups=args.get("ups", ""),
+                    calls=args.get("calls", ""),
+                    followups=args.get("followups", ""),
+                    appointments=args.get("appointments", "")
+                )
+            except Exception as e:
+                print(f"Error in append_daily_log: {e}")
+                result = {"ok": False, "error": f"Error logging data: {str(e)}"}
+
+            # The close-out is a fixed template; no second completion to word it
+            if result.get("ok"):
+                state["flow"] = ""
+                msg = {"content": dailylog.close_out(args)}
+            else:
+                msg = {"content": f"Couldn't save your daily log ({result.get('error')}). Send your numbers again to retry."}
+
+        elif fn == "log_session_turn":
+            # Folded into the single per-turn write below instead of a row of its own
+            tool_log = {k: args[k] for k in ("target_payment", "offer_payment", "band") if args.get(k) not in (None, "")}
+            messages.append(msg)
+            messages.append({"role": "function", "name": "log_session_turn",
+                             "content": json.dumps({"ok": True, "mode": "logged with this turn"})})
+            # Same budget, circuit and queue as the first call; on failure keep any text
+            # the tool call came with, else answer from the playbook
+            ai = run_openai(messages, key=key, on_queue=on_queue, tags=tags, functions=None)
+            if ai.get("fallback"):
+                ai["choices"][0]["message"]["content"] = msg.get("content") or fallback.answer(text)
+            msg = ai["choices"][0]["message"]
+
+    assistant_text = msg.get("content") or "Working on it…"
+
+    # Increment step for roleplay (an offline answer does not advance it)
+    if state.get("scenario") and not ai.get("fallback"):
+        state["step"] = min(int(state.get("step", 0)) + 1, 10)
+
+    session["messages"].append({"role": "assistant", "content": assistant_text})
+
+    # Best-effort per-turn session log: one row per turn, log_session_turn values merged in.
+    # A retried turn reuses its key (the turn number has not advanced), so it adds no row.
+    turn_key = f"{session['session_id']}:{event_id or 'turn-' + str(int(state.get('turn', 0)) + 1)}"
+    try:
+        result = session_log_append(
+            session_id=session["session_id"],
+            user_name=session["user_name"],
+            scenario=state.get("scenario",""),
+            step=int(state.get("step", 0)),
+            target_payment=tool_log.get("target_payment", state.get("target")),
+            offer_payment=tool_log.get("offer_payment", state.get("offer")),
+            band=tool_log.get("band", state.get("band","")),
+            message=assistant_text,
+            turn_key=turn_key
+        )
+        if not result.get("ok"):
+            print(f"Warning: Failed to log session: {result.get('error')}")
+    except Exception as e:
+        print(f"Error logging session: {e}")
+        # Don't show error to user, just silently log it
+    state["turn"] = int(state.get("turn", 0)) + 1
+
+    return assistant_text
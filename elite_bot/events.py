@@ -0,0 +1,63 @@
+# elite_bot/events.py
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+# How many completed event ids each session remembers
+SEEN_EVENT_LIMIT = 256
+
+# begin() outcomes
+NEW = "new"
+DUPLICATE = "duplicate"
+IN_FLIGHT = "in_flight"
+
+
+class EventLedger:
+    """Per-session record of component events: in-flight ids plus a bounded seen set.
+
+    Events carrying an ``event_id`` are processed exactly once; re-deliveries
+    (Streamlit reruns, double submits, client retries) get the stored result.
+    Events from older frontend builds without an id fall back to comparing
+    against the previous payload only.
+    """
+
+    def __init__(self, limit: int = SEEN_EVENT_LIMIT):
+        self.limit = limit
+        self._seen: "OrderedDict[str, Any]" = OrderedDict()
+        self._in_flight = set()
+        self._last_payload: Optional[str] = None
+
+    def begin(self, event: Dict[str, Any]) -> str:
+        event_id = event.get("event_id")
+        if not event_id:
+            payload = str(event)
+            if payload == self._last_payload:
+                return DUPLICATE
+            self._last_payload = payload
+            return NEW
+        if event_id in self._in_flight:
+            return IN_FLIGHT
+        if event_id in self._seen:
+            self._seen.move_to_end(event_id)
+            return DUPLICATE
+        self._in_flight.add(event_id)
+        return NEW
+
+    def finish(self, event: Dict[str, Any], result: Any = None) -> None:
+        event_id = event.get("event_id")
+        if not event_id:
+            return
+        self._in_flight.discard(event_id)
+        self._seen[event_id] = result
+        self._seen.move_to_end(event_id)
+        while len(self._seen) > self.limit:
+            self._seen.popitem(last=False)
+
+    def abandon(self, event: Dict[str, Any]) -> None:
+        """Release an in-flight id without marking it seen, so a retry can run."""
+        self._in_flight.discard(event.get("event_id"))
+
+    def result(self, event_id: str) -> Any:
+        return self._seen.get(event_id)
+
+    def __len__(self) -> int:
+        return len(self._seen)
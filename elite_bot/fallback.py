@@ -0,0 +1,171 @@
+# elite_bot/fallback.py
+"""Offline responder: answers from the CHARACTER playbook when OpenAI is unavailable.
+
+CHARACTER is split into its sections (M3 Pillars, supporting frameworks,
+command library, roleplay rules, daily log prompts, first impression script,
+tone guard) and every bullet or script block becomes a small document in a
+TF-IDF index. Commands map straight to their sections; free-form questions get
+the best-matching playbook lines. Everything runs in-process in well under a
+millisecond and never invents lines that are not in CHARACTER.
+"""
+import re
+import math
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from .character import CHARACTER
+
+OFFLINE_NOTE = "(Live coach is offline — answering from the playbook.)"
+NEXT_STEP = "Next step: run it on your next up, and try me again in a minute for live coaching."
+
+_STOPWORDS = {
+    "a", "an", "the", "and", "or", "to", "of", "in", "on", "for", "with", "is", "are", "do", "does",
+    "i", "me", "my", "you", "your", "it", "what", "how", "can", "should", "about", "again", "this",
+    "that", "when", "they", "say", "says", "get", "be", "at", "as", "by", "from", "tell",
+}
+_TOKEN_RE = re.compile(r"[a-z0-9!]+")
+
+
+def _tokens(text: str) -> List[str]:
+    # "E.A.R.N." -> earn, "Pain–Vision–Fit" -> pain vision fit
+    text = text.lower().replace(".", "").replace("–", " ")
+    return [t for t in _TOKEN_RE.findall(text) if t not in _STOPWORDS]
+
+
+# =========================
+# Parse CHARACTER into sections and documents
+# =========================
+def parse_sections(text: str = CHARACTER) -> Dict[str, List[str]]:
+    """Section title -> its non-empty lines. Titles are the upper-case headings and sub-headings."""
+    sections: Dict[str, List[str]] = {"Intro": []}
+    current = "Intro"
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line or line.startswith("---"):
+            continue
+        heading = (
+            line.isupper()
+            or re.match(r"^[A-Z][A-Z ]+\(.*\):?$", line)
+            or (line.endswith(":") and not line.startswith(("•", "-", "“")) and len(line) < 60)
+            or line.startswith("Core Framework")
+            or line in ("Message Mastery", "Closer Moves", "Money Momentum", "Five Emotional Checkpoints")
+        )
+        if heading:
+            current = line.rstrip(":").strip()
+            sections.setdefault(current, [])
+        else:
+            sections[current].append(line.lstrip("•- ").strip())
+    return sections
+
+
+SECTIONS = parse_sections()
+
+
+def _section(prefix: str) -> List[str]:
+    for title, lines in SECTIONS.items():
+        if title.lower().startswith(prefix.lower()):
+            return lines
+    return []
+
+
+def _command_library() -> Dict[str, str]:
+    """!command -> its description from the command library."""
+    commands = {}
+    for line in CHARACTER.splitlines():
+        m = re.match(r"\s*•\s*(!\w+)([^→]*)→\s*(.+)", line)
+        if m:
+            commands.setdefault(m.group(1), f"{m.group(1)}{m.group(2).rstrip()} → {m.group(3).strip()}")
+    return commands
+
+
+COMMANDS = _command_library()
+
+
+class PlaybookIndex:
+    """TF-IDF over playbook documents (one per bullet, one per script block)."""
+
+    def __init__(self, sections: Dict[str, List[str]]):
+        self.docs: List[Tuple[str, str]] = []
+        for title, lines in sections.items():
+            if title in ("Intro", "TONE GUARD"):
+                continue
+            if title.startswith(("FIRST IMPRESSION", "DAILY LOG PROMPTS", "Close-out")):
+                self.docs.append((title, "\n".join(lines)))
+            else:
+                self.docs.extend((title, line) for line in lines)
+        counts = [Counter(_tokens(f"{t} {d}")) for t, d in self.docs]
+        df = Counter(term for c in counts for term in c)
+        n = len(self.docs)
+        self.idf = {term: math.log((1 + n) / (1 + k)) + 1 for term, k in df.items()}
+        self.vectors = [self._weigh(c) for c in counts]
+
+    def _weigh(self, counts: Counter) -> Dict[str, float]:
+        vec = {t: (1 + math.log(k)) * self.idf.get(t, 0.0) for t, k in counts.items()}
+        norm = math.sqrt(sum(v * v for v in vec.values())) or 1.0
+        return {t: v / norm for t, v in vec.items()}
+
+    def search(self, query: str, k: int = 2, min_score: float = 0.2) -> List[Tuple[float, str, str]]:
+        q = self._weigh(Counter(_tokens(query)))
+        scored = []
+        for (title, doc), vec in zip(self.docs, self.vectors):
+            score = sum(w * vec.get(t, 0.0) for t, w in q.items())
+            if score >= min_score:
+                scored.append((score, title, doc))
+        scored.sort(key=lambda s: -s[0])
+        # Runners-up only when they are nearly as relevant as the best line
+        return [s for s in scored[:k] if s[0] >= 0.6 * scored[0][0]]
+
+
+index = PlaybookIndex(SECTIONS)
+
+
+# =========================
+# Replies
+# =========================
+def _reply(*parts: str) -> str:
+    return "\n".join([OFFLINE_NOTE, *[p for p in parts if p], NEXT_STEP])
+
+
+def _pillars() -> str:
+    return "M3 Pillars:\n" + "\n".join(f"• {line}" for line in _section("Core Framework"))
+
+
+def command_reply(command: str, text: str) -> Optional[str]:
+    if command in ("!firstimpression", "!scripts"):
+        return _reply("First impression script:", "\n".join(_section("FIRST IMPRESSION")))
+    if command == "!checkpoints":
+        line = next((l for l in _section("Supporting Frameworks") if l.startswith("Five Emotional")), "")
+        return _reply(line)
+    if command == "!pvf":
+        close = next((l for l in _section("Supporting Frameworks") if "PVF" in l), "")
+        pillar = next((l for l in _section("Core Framework") if l.startswith("Closer Moves")), "")
+        return _reply(close, COMMANDS.get("!pvf", ""), pillar)
+    if command in ("!objection", "!roleplay") or command in _SCENARIO_COMMANDS:
+        return _reply("Roleplays need the live coach; here are the objection rules to run on your own:",
+                      "\n".join(f"• {l}" for l in _section("ROLEPLAY RULES")[:5]),
+                      COMMANDS.get("!objection", ""))
+    if command == "!dailylog":
+        return _reply("Daily log can't be saved while the coach is offline. Have these numbers ready:",
+                      "\n".join(_section("DAILY LOG PROMPTS")))
+    if command in COMMANDS:
+        return _reply(COMMANDS[command])
+    return None
+
+
+# Roleplay shortcuts from infer_scenario_from_text
+_SCENARIO_COMMANDS = {"!priceobjection", "!paymenttoohigh", "!tradevalue", "!thinkaboutit",
+                      "!shoparound", "!spouse", "!paymentvsprice", "!timingstall"}
+
+
+def answer(text: str) -> str:
+    """Best playbook answer for a command or free-form question."""
+    t = (text or "").strip()
+    command = t.split()[0].lower() if t.startswith("!") else ""
+    if command:
+        reply = command_reply(command, t)
+        if reply:
+            return reply
+    hits = index.search(t)
+    if not hits:
+        return _reply(_pillars(), "Commands: " + ", ".join(sorted(COMMANDS)))
+    return _reply(*[f"{title}: {doc}" if "\n" not in doc else f"{title}:\n{doc}" for _, title, doc in hits])
@@ -0,0 +1,279 @@
+# elite_bot/leaderboard.py
+"""!leaderboard and !streak: Money Momentum numbers answered locally, no LLM call.
+
+DailyRollup keeps every DailyLog row in columnar NumPy arrays (one row per
+rep per UTC day, upserted by LogId). It is seeded from the local Parquet
+mirror and updated in place whenever daily_log_append_or_update writes.
+Each tenant (dealership) has its own, from rollup_for().
+"""
+import os
+import datetime
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .sheets import daily_log_listeners
+from .tenants import Tenant, current
+
+METRICS = ("Ups", "Calls", "FollowUps", "Appointments")
+METRIC_LABELS = ("ups", "calls", "follow-ups", "appointments")
+# Leaderboard order: appointments first, then follow-ups, calls, ups
+RANK_ORDER = (3, 2, 1, 0)
+PERIODS = ("today", "week", "month")
+TOP_N = 5
+
+
+def _to_int(value: Any) -> int:
+    try:
+        return max(0, int(float(str(value).replace(",", "").strip())))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _day_of(stamp: str) -> int:
+    return datetime.date.fromisoformat(str(stamp)[:10]).toordinal()
+
+
+def period_start(period: str, today: datetime.date) -> datetime.date:
+    if period == "today":
+        return today
+    if period == "month":
+        return today.replace(day=1)
+    return today - datetime.timedelta(days=today.weekday())  # week starts Monday
+
+
+class DailyRollup:
+    """In-memory columnar DailyLog: day ordinal, rep code and a 4-metric matrix."""
+
+    def __init__(self, tenant: Optional[Tenant] = None, capacity: int = 1024):
+        self.tenant = tenant
+        self._lock = threading.Lock()
+        self._index: Dict[str, int] = {}       # LogId -> row
+        self._stamps: List[str] = []           # DateUTC per row (newest write wins)
+        self._user_codes: Dict[str, int] = {}  # lower-case rep -> code
+        self._names: List[str] = []            # code -> display name
+        self._day = np.zeros(capacity, dtype=np.int32)
+        self._user = np.zeros(capacity, dtype=np.int32)
+        self._metrics = np.zeros((capacity, len(METRICS)), dtype=np.int64)
+        self._n = 0
+        self._mirror_mtime: Optional[float] = None
+        # Called under the lock as listener(old, new) with (day, rep code, values) or None
+        self.listeners: List[Callable] = []
+
+    def __len__(self) -> int:
+        return self._n
+
+    # ---- writes ----
+    def _code(self, user: str) -> int:
+        key = user.strip().lower()
+        code = self._user_codes.get(key)
+        if code is None:
+            code = self._user_codes[key] = len(self._names)
+            self._names.append(user.strip())
+        else:
+            self._names[code] = user.strip()
+        return code
+
+    def _grow(self) -> None:
+        cap = len(self._day) * 2
+        self._day = np.resize(self._day, cap)
+        self._user = np.resize(self._user, cap)
+        metrics = np.zeros((cap, len(METRICS)), dtype=np.int64)
+        metrics[:self._n] = self._metrics[:self._n]
+        self._metrics = metrics
+
+    def _upsert(self, stamp: str, user: str, values: Tuple[int, ...], log_id: str) -> None:
+        if not user or not stamp:
+            return
+        try:
+            day = _day_of(stamp)
+        except ValueError:
+            print(f"WARNING: skipping DailyLog row for {user} with a non-ISO DateUTC: {stamp!r}")
+            return
+        log_id = (log_id or f"{user}|{str(stamp)[:10]}").strip().lower()
+        row = self._index.get(log_id)
+        old = None
+        if row is None:
+            if self._n == len(self._day):
+                self._grow()
+            row = self._index[log_id] = self._n
+            self._stamps.append(stamp)
+            self._n += 1
+        elif str(stamp) < self._stamps[row]:
+            return  # an older copy (e.g. a stale mirror) never overwrites a newer write
+        else:
+            old = (int(self._day[row]), int(self._user[row]), self._metrics[row].copy())
+        self._stamps[row] = str(stamp)
+        self._day[row] = day
+        self._user[row] = self._code(user)
+        self._metrics[row] = values
+        new = (int(self._day[row]), int(self._user[row]), self._metrics[row].copy())
+        for listener in self.listeners:
+            listener(old, new)
+
+    def record(self, row: List[Any]) -> None:
+        """Listener for daily_log_append_or_update: row in DAILY_HEADERS order."""
+        stamp, user, ups, calls, followups, appointments, log_id = (list(row) + [""] * 7)[:7]
+        with self._lock:
+            self._upsert(str(stamp), str(user), tuple(_to_int(v) for v in (ups, calls, followups, appointments)), str(log_id))
+
+    def refresh_from_mirror(self) -> None:
+        """Fold in the Parquet mirror when the sync job has rewritten it."""
+        from . import mirror
+        try:
+            mtime = os.path.getmtime(mirror.daily_path(self.tenant))
+        except OSError:
+            return
+        if mtime == self._mirror_mtime:
+            return
+        df = mirror.load_daily_log(self.tenant)
+        metrics = df[list(METRICS)].fillna(0).clip(lower=0).astype("int64").to_numpy()
+        with self._lock:
+            for stamp, user, log_id, values in zip(df["DateUTC"], df["User"], df["LogId"], metrics):
+                self._upsert(str(stamp), str(user), tuple(values), str(log_id))
+            self._mirror_mtime = mtime
+
+    # ---- vectorized reads ----
+    def totals(self, start: datetime.date, end: datetime.date) -> Tuple[np.ndarray, np.ndarray]:
+        """Per-rep metric totals for start..end inclusive: (rep codes, totals matrix)."""
+        with self._lock:
+            n = self._n
+            day, user, metrics = self._day[:n], self._user[:n], self._metrics[:n]
+            mask = (day >= start.toordinal()) & (day <= end.toordinal())
+            reps = user[mask]
+            sums = np.zeros((len(self._names), len(METRICS)), dtype=np.int64)
+            np.add.at(sums, reps, metrics[mask])
+            active = np.unique(reps)
+        return active, sums[active]
+
+    def active_days(self, user: str) -> np.ndarray:
+        """Sorted day ordinals on which the rep filed a daily log."""
+        with self._lock:
+            code = self._user_codes.get(user.strip().lower())
+            if code is None:
+                return np.empty(0, dtype=np.int32)
+            n = self._n
+            return np.unique(self._day[:n][self._user[:n] == code])
+
+    def name(self, code: int) -> str:
+        return self._names[code]
+
+    def subscribe(self, listener: Callable) -> None:
+        """Register listener(old, new) and replay the rows already held as inserts."""
+        with self._lock:
+            for row in range(self._n):
+                listener(None, (int(self._day[row]), int(self._user[row]), self._metrics[row].copy()))
+            self.listeners.append(listener)
+
+    def code(self, user: str) -> Optional[int]:
+        return self._user_codes.get(user.strip().lower())
+
+    def code_for(self, user: str) -> int:
+        """Rep code, registering the rep if unseen."""
+        with self._lock:
+            return self._code(user)
+
+    def names(self) -> List[str]:
+        with self._lock:
+            return list(self._names)
+
+
+_rollups: Dict[str, DailyRollup] = {}
+_rollups_lock = threading.Lock()
+
+
+def rollup_for(tenant: Optional[Tenant] = None) -> DailyRollup:
+    """The tenant's rollup (the current tenant's by default), created on first use."""
+    tenant = tenant or current()
+    with _rollups_lock:
+        found = _rollups.get(tenant.id)
+        if found is None:
+            found = _rollups[tenant.id] = DailyRollup(tenant)
+        return found
+
+
+# Writes run inside their tenant (see tenants.use)
+daily_log_listeners.append(lambda row: rollup_for().record(row))
+
+
+# =========================
+# Command replies
+# =========================
+def _fmt(values) -> str:
+    return ", ".join(f"{int(v)} {label}" for v, label in zip(values, METRIC_LABELS))
+
+
+def leaderboard_reply(user_name: str, text: str = "", today: Optional[datetime.date] = None) -> str:
+    today = today or datetime.datetime.utcnow().date()
+    words = text.lower().split()[1:]
+    period = next((w for w in words if w in PERIODS), "week")
+    rollup = rollup_for()
+    rollup.refresh_from_mirror()
+    reps, sums = rollup.totals(period_start(period, today), today)
+    label = {"today": "today", "week": "this week", "month": "this month"}[period]
+    if len(reps) == 0:
+        return f"No daily logs yet {label}. Be the first on the board — run !dailylog."
+
+    # Rank by appointments, then follow-ups, calls, ups (lexsort keys: last is primary)
+    order = np.lexsort(tuple(-sums[:, k] for k in reversed(RANK_ORDER)))
+    lines = [f"Leaderboard — {label} (appointments first):"]
+    for place, i in enumerate(order[:TOP_N], start=1):
+        lines.append(f"{place}. {rollup.name(reps[i])} — {_fmt(sums[i])}")
+
+    team_avg = sums.mean(axis=0)
+    me = rollup.code(user_name or "")
+    hits = np.flatnonzero(reps == me) if me is not None else np.empty(0)
+    if hits.size:
+        place = int(np.flatnonzero(order == hits[0])[0]) + 1
+        lines.append(f"You: #{place} of {len(reps)} — {_fmt(sums[hits[0]])}.")
+    else:
+        lines.append(f"You're not on the board {label} yet.")
+    lines.append(f"Team average: {', '.join(f'{v:.1f} {l}' for v, l in zip(team_avg, METRIC_LABELS))}.")
+    lines.append("Next step: log today's numbers with !dailylog and keep stacking clean reps.")
+    return "\n".join(lines)
+
+
+def current_streak(days: np.ndarray, today: int) -> Tuple[int, int]:
+    """(current streak, best streak) in consecutive days from sorted day ordinals."""
+    if days.size == 0:
+        return 0, 0
+    # Runs of consecutive days split where the gap is more than one day
+    breaks = np.flatnonzero(np.diff(days) != 1)
+    starts = np.concatenate(([0], breaks + 1))
+    ends = np.concatenate((breaks, [days.size - 1]))
+    lengths = ends - starts + 1
+    best = int(lengths.max())
+    # The latest run still counts if it reaches today or yesterday
+    current = int(lengths[-1]) if days[-1] >= today - 1 else 0
+    return current, best
+
+
+def streak_reply(user_name: str, text: str = "", today: Optional[datetime.date] = None) -> str:
+    today = today or datetime.datetime.utcnow().date()
+    rollup = rollup_for()
+    rollup.refresh_from_mirror()
+    days = rollup.active_days(user_name or "")
+    current, best = current_streak(days, today.toordinal())
+    if best == 0:
+        return "No daily logs on file for you yet. Start your streak today — run !dailylog."
+
+    reps, sums = rollup.totals(period_start("week", today), today)
+    me = rollup.code(user_name)
+    hits = np.flatnonzero(reps == me) if me is not None else np.empty(0)
+    mine = sums[hits[0]] if hits.size else np.zeros(len(METRICS), dtype=np.int64)
+    team_avg = sums.mean(axis=0) if len(reps) else np.zeros(len(METRICS))
+
+    lines = [f"Streak: {current} day{'s' if current != 1 else ''} in a row logged (best: {best})."]
+    lines.append(f"This week: {_fmt(mine)}.")
+    lines.append(f"Team average: {', '.join(f'{v:.1f} {l}' for v, l in zip(team_avg, METRIC_LABELS))}.")
+    logged_today = days.size and int(days[-1]) == today.toordinal()
+    lines.append("Next step: " + ("keep it alive tomorrow with !dailylog." if logged_today else "log today with !dailylog to keep it alive."))
+    return "\n".join(lines)
+
+
+# Commands answered locally by respond_to
+LOCAL_COMMANDS = {
+    "!leaderboard": leaderboard_reply,
+    "!streak": streak_reply,
+}
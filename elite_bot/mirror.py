@@ -0,0 +1,266 @@
+# elite_bot/mirror.py
+"""Local Parquet mirror of the DailyLog and session-log spreadsheets.
+
+Each sync fetches only rows past the last high-water mark (per tab), so
+reporting reads local columnar files instead of whole Sheets ranges.
+
+    python -m elite_bot.mirror                  # sync both spreadsheets of every tenant
+    python -m elite_bot.mirror --daily          # DailyLog only
+    python -m elite_bot.mirror --tenant north   # one tenant
+
+Each tenant's mirror lives under its data directory (data/mirror for the
+default tenant, data/tenants/<id>/mirror for the others).
+
+DailyLog rows are upserted in place by the bot on the same UTC day, so the
+mirror re-reads from the first row of the most recent day it has seen.
+"""
+import os
+import json
+import argparse
+import datetime
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from .sheets import get_sheets_service, DAILY_HEADERS, SESSION_HEADERS
+from .tenants import Tenant, current, tenants, use
+
+DAILY_SHEET = "DailyLog"
+BATCH_RANGES = 100
+
+# Columns parsed as integers; everything else stays a string
+INT_COLUMNS = {"Ups", "Calls", "FollowUps", "Appointments", "Step", "TargetPayment", "OfferPayment"}
+
+# Bookkeeping columns added to every mirrored row
+ROW_COLUMN = "_Row"
+TAB_COLUMN = "_Tab"
+
+
+# Paths for a tenant (the current one by default)
+def mirror_dir(tenant: Optional[Tenant] = None) -> str:
+    return os.path.join((tenant or current()).data_dir, "mirror")
+
+
+def daily_path(tenant: Optional[Tenant] = None) -> str:
+    return os.path.join(mirror_dir(tenant), "daily_log.parquet")
+
+
+def session_dir(tenant: Optional[Tenant] = None) -> str:
+    return os.path.join(mirror_dir(tenant), "session_log")
+
+
+def state_path(tenant: Optional[Tenant] = None) -> str:
+    return os.path.join(mirror_dir(tenant), "state.json")
+
+
+def arrow_schema(headers: List[str]) -> pa.Schema:
+    fields = [pa.field(h, pa.int64() if h in INT_COLUMNS else pa.string()) for h in headers]
+    return pa.schema(fields + [pa.field(TAB_COLUMN, pa.string()), pa.field(ROW_COLUMN, pa.int64())])
+
+
+DAILY_SCHEMA = arrow_schema(DAILY_HEADERS)
+SESSION_SCHEMA = arrow_schema(SESSION_HEADERS)
+
+
+def _to_int(value: Any) -> Optional[int]:
+    try:
+        return int(float(str(value).replace(",", "").strip()))
+    except (TypeError, ValueError):
+        return None
+
+
+def rows_to_table(rows: List[List[Any]], first_row: int, tab: str,
+                  headers: List[str], schema: pa.Schema) -> pa.Table:
+    """Turn raw Sheets values (short rows padded) into a typed Arrow table."""
+    columns: Dict[str, list] = {h: [] for h in headers}
+    sheet_rows, tabs = [], []
+    for offset, row in enumerate(rows):
+        if not any(str(v).strip() for v in row):
+            continue
+        for i, h in enumerate(headers):
+            v = row[i] if i < len(row) else ""
+            columns[h].append(_to_int(v) if h in INT_COLUMNS else str(v))
+        sheet_rows.append(first_row + offset)
+        tabs.append(tab)
+    columns[TAB_COLUMN] = tabs
+    columns[ROW_COLUMN] = sheet_rows
+    return pa.table(columns, schema=schema)
+
+
+# =========================
+# Sync state (high-water marks)
+# =========================
+def load_state() -> Dict[str, Any]:
+    try:
+        with open(state_path(), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"daily": {}, "session": {}}
+
+
+def save_state(state: Dict[str, Any]) -> None:
+    os.makedirs(mirror_dir(), exist_ok=True)
+    tmp = state_path() + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, state_path())
+
+
+# =========================
+# DailyLog
+# =========================
+def sync_daily_log(service, state: Dict[str, Any]) -> int:
+    """Mirror new and same-day-updated DailyLog rows. Returns rows fetched."""
+    daily = state.setdefault("daily", {})
+    start = int(daily.get("resync_from", 2))
+    values = service.spreadsheets().values().get(
+        spreadsheetId=current().daily_log_spreadsheet_id,
+        range=f"'{DAILY_SHEET}'!A{start}:G"
+    ).execute().get("values", [])
+    fresh = rows_to_table(values, start, DAILY_SHEET, DAILY_HEADERS, DAILY_SCHEMA)
+    if fresh.num_rows == 0:
+        return 0
+
+    path = daily_path()
+    if os.path.exists(path):
+        mirrored = pq.read_table(path, schema=DAILY_SCHEMA)
+        keep = pc.or_(pc.not_equal(mirrored[TAB_COLUMN], DAILY_SHEET), pc.less(mirrored[ROW_COLUMN], start))
+        table = pa.concat_tables([mirrored.filter(keep), fresh])
+    else:
+        table = fresh
+    os.makedirs(mirror_dir(), exist_ok=True)
+    pq.write_table(table, path + ".tmp", compression="zstd")
+    os.replace(path + ".tmp", path)
+
+    # Next sync re-reads from the first row of the latest day (it may still be upserted)
+    dates = [str(d)[:10] for d in fresh.column("DateUTC").to_pylist()]
+    latest = max(dates)
+    first_latest = next(r for d, r in zip(dates, fresh.column(ROW_COLUMN).to_pylist()) if d == latest)
+    daily.update({"resync_from": first_latest, "rows": table.num_rows,
+                  "synced_at": datetime.datetime.utcnow().isoformat()})
+    return fresh.num_rows
+
+
+def seal_daily_tab(state: Dict[str, Any], sealed_title: str) -> None:
+    """The live DailyLog tab was renamed to sealed_title and a fresh one started."""
+    path = daily_path()
+    if os.path.exists(path):
+        table = pq.read_table(path, schema=DAILY_SCHEMA)
+        live = pc.equal(table[TAB_COLUMN], DAILY_SHEET)
+        tabs = pc.if_else(live, pa.scalar(sealed_title), table[TAB_COLUMN])
+        table = table.set_column(table.schema.get_field_index(TAB_COLUMN), TAB_COLUMN, tabs)
+        pq.write_table(table, path + ".tmp", compression="zstd")
+        os.replace(path + ".tmp", path)
+    state.setdefault("daily", {})["resync_from"] = 2
+
+
+# =========================
+# Session logs (one or more tabs)
+# =========================
+def sync_session_log(service, state: Dict[str, Any]) -> int:
+    """Append rows past each tab's high-water mark as a new Parquet part. Returns rows fetched."""
+    marks = state.setdefault("session", {})
+    spreadsheet_id = current().session_log_spreadsheet_id
+    meta = service.spreadsheets().get(
+        spreadsheetId=spreadsheet_id,
+        fields="sheets.properties.title"
+    ).execute()
+    tabs = [s["properties"]["title"] for s in meta.get("sheets", [])]
+
+    skipped = set(state.setdefault("session_skipped", []))
+    tabs = [t for t in tabs if t not in skipped]
+
+    tables = []
+    for i in range(0, len(tabs), BATCH_RANGES):
+        chunk = tabs[i:i + BATCH_RANGES]
+        # Unseen tabs start at row 1 so the header can be checked
+        starts = [int(marks.get(t, 0)) + 1 for t in chunk]
+        ranges = [f"'{t}'!A{start}:I" for t, start in zip(chunk, starts)]
+        res = service.spreadsheets().values().batchGet(
+            spreadsheetId=spreadsheet_id, ranges=ranges
+        ).execute()
+        for tab, start, value_range in zip(chunk, starts, res.get("valueRanges", [])):
+            values = value_range.get("values", [])
+            if not values:
+                continue
+            marks[tab] = start + len(values) - 1
+            if start == 1:
+                if values[0][:len(SESSION_HEADERS)] != SESSION_HEADERS:
+                    # Not a session log tab (e.g. a default Sheet1)
+                    state["session_skipped"].append(tab)
+                    marks.pop(tab, None)
+                    continue
+                values, start = values[1:], 2
+            table = rows_to_table(values, start, tab, SESSION_HEADERS, SESSION_SCHEMA)
+            if table.num_rows:
+                tables.append(table)
+
+    if not tables:
+        return 0
+    fresh = pa.concat_tables(tables)
+    os.makedirs(session_dir(), exist_ok=True)
+    part = os.path.join(session_dir(), f"part-{datetime.datetime.utcnow():%Y%m%dT%H%M%S%f}.parquet")
+    pq.write_table(fresh, part, compression="zstd")
+    state["session_rows"] = int(state.get("session_rows", 0)) + fresh.num_rows
+    return fresh.num_rows
+
+
+def sync(daily: bool = True, session: bool = True) -> Dict[str, int]:
+    """Sync the current tenant's spreadsheets."""
+    tenant = current()
+    service = get_sheets_service()
+    if service is None:
+        raise RuntimeError("Failed to initialize Google Sheets service")
+    state = load_state()
+    fetched = {}
+    if daily and tenant.daily_log_spreadsheet_id:
+        fetched["daily"] = sync_daily_log(service, state)
+        save_state(state)
+    if session and tenant.session_log_spreadsheet_id:
+        fetched["session"] = sync_session_log(service, state)
+        save_state(state)
+    return fetched
+
+
+# =========================
+# Readers
+# =========================
+def load_daily_log(tenant: Optional[Tenant] = None) -> pd.DataFrame:
+    path = daily_path(tenant)
+    if not os.path.exists(path):
+        return DAILY_SCHEMA.empty_table().to_pandas()
+    return pq.read_table(path).to_pandas()
+
+
+def load_session_log(columns: Optional[List[str]] = None, tenant: Optional[Tenant] = None) -> pd.DataFrame:
+    path = session_dir(tenant)
+    if not os.path.isdir(path) or not os.listdir(path):
+        return SESSION_SCHEMA.empty_table().to_pandas()
+    df = pq.read_table(path, schema=SESSION_SCHEMA).to_pandas()
+    # A part written before its state save can be re-fetched; keep one copy per sheet row
+    df = df.drop_duplicates([TAB_COLUMN, ROW_COLUMN], keep="last")
+    return df[columns] if columns else df
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Sync DailyLog and session logs into local Parquet")
+    parser.add_argument("--daily", action="store_true", help="DailyLog only")
+    parser.add_argument("--session", action="store_true", help="Session logs only")
+    parser.add_argument("--tenant", action="append", choices=tenants.ids(), help="Only these tenants (repeatable)")
+    args = parser.parse_args(argv)
+    both = not (args.daily or args.session)
+    for tenant in tenants:
+        if args.tenant and tenant.id not in args.tenant:
+            continue
+        if not (tenant.daily_log_spreadsheet_id or tenant.session_log_spreadsheet_id):
+            continue
+        with use(tenant):
+            fetched = sync(daily=both or args.daily, session=both or args.session)
+        print(f"Mirror sync fetched for {tenant.id}: {fetched} -> {mirror_dir(tenant)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# elite_bot/partitions.py
+"""Session-log partitioning: many sessions per Sheets tab.
+
+Session turns go to one tab per UTC day (or ISO week) instead of one tab per
+session, so the spreadsheet's tab list stays small. Every row keeps its
+SessionId column; a local SQLite index remembers which partition each session
+was written to, so a session's rows are found by reading a single tab (or the
+few it was moved across when rotation archived its partition mid-session).
+
+AGBOT_SESSION_PARTITION = day (default) | week | session (legacy, one tab per session)
+"""
+import os
+import sqlite3
+import datetime
+import threading
+from typing import Dict, List, Optional
+
+from .config import DATA_DIR
+
+SESSION_PARTITION = os.getenv("AGBOT_SESSION_PARTITION", "day").strip().lower()
+PARTITION_PREFIX = "Sessions-"
+SESSION_INDEX_PATH = os.path.join(DATA_DIR, "session_index.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS session_partition (
+    session_id TEXT PRIMARY KEY, spreadsheet_id TEXT, tab TEXT, created_utc TEXT
+);
+CREATE TABLE IF NOT EXISTS session_moved (
+    session_id TEXT, spreadsheet_id TEXT, tab TEXT, moved_utc TEXT
+);
+CREATE INDEX IF NOT EXISTS session_moved_id ON session_moved (session_id);
+"""
+
+
+def partition_title(when: datetime.datetime, scheme: str = SESSION_PARTITION) -> str:
+    """Tab name for a write at `when`, e.g. Sessions-2026-10-18 or Sessions-2026-W42."""
+    if scheme == "week":
+        year, week, _ = when.isocalendar()
+        return f"{PARTITION_PREFIX}{year}-W{week:02d}"
+    return f"{PARTITION_PREFIX}{when:%Y-%m-%d}"
+
+
+class SessionIndex:
+    """session_id -> (spreadsheet_id, tab), cached in memory and persisted to SQLite."""
+
+    def __init__(self, db_path: str = SESSION_INDEX_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._cache: Dict[str, tuple] = {}
+        self._ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        if not self._ready:
+            conn.executescript(SCHEMA)
+            self._ready = True
+        return conn
+
+    def lookup(self, session_id: str) -> Optional[tuple]:
+        with self._lock:
+            hit = self._cache.get(session_id)
+        if hit is not None:
+            return hit
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT spreadsheet_id, tab FROM session_partition WHERE session_id = ?", (session_id,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Error reading session index: {e}")
+            return None
+        if row:
+            with self._lock:
+                self._cache[session_id] = tuple(row)
+            return tuple(row)
+        return None
+
+    def assign(self, session_id: str, spreadsheet_id: str, tab: str) -> tuple:
+        """Pin a session to a partition on its first write; later writes reuse it."""
+        existing = self.lookup(session_id)
+        if existing is not None:
+            return existing
+        entry = (spreadsheet_id, tab)
+        with self._lock:
+            self._cache[session_id] = entry
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR IGNORE INTO session_partition VALUES (?, ?, ?, ?)",
+                    (session_id, spreadsheet_id, tab, datetime.datetime.utcnow().isoformat()),
+                )
+        except sqlite3.Error as e:
+            # The in-memory entry still keeps this process consistent
+            print(f"Error writing session index: {e}")
+        return entry
+
+    def move(self, session_id: str, spreadsheet_id: str, tab: str) -> tuple:
+        """Re-pin a session whose partition was archived; the old one is kept for reads."""
+        previous = self.lookup(session_id)
+        entry = (spreadsheet_id, tab)
+        with self._lock:
+            self._cache[session_id] = entry
+        now = datetime.datetime.utcnow().isoformat()
+        try:
+            with self._connect() as conn:
+                if previous is not None:
+                    conn.execute("INSERT INTO session_moved VALUES (?, ?, ?, ?)", (session_id, *previous, now))
+                conn.execute("INSERT OR REPLACE INTO session_partition VALUES (?, ?, ?, ?)",
+                             (session_id, spreadsheet_id, tab, now))
+        except sqlite3.Error as e:
+            print(f"Error writing session index: {e}")
+        return entry
+
+    def partitions_of(self, session_id: str) -> List[tuple]:
+        """Every (spreadsheet_id, tab) the session was written to, oldest first."""
+        current = self.lookup(session_id)
+        try:
+            with self._connect() as conn:
+                moved = [tuple(r) for r in conn.execute(
+                    "SELECT spreadsheet_id, tab FROM session_moved WHERE session_id = ? ORDER BY moved_utc",
+                    (session_id,),
+                )]
+        except sqlite3.Error as e:
+            print(f"Error reading session index: {e}")
+            moved = []
+        return moved + ([current] if current is not None else [])
+
+    def sessions_in(self, tab: str) -> List[str]:
+        try:
+            with self._connect() as conn:
+                return [r[0] for r in conn.execute(
+                    "SELECT session_id FROM session_partition WHERE tab = ? ORDER BY created_utc", (tab,)
+                )]
+        except sqlite3.Error as e:
+            print(f"Error reading session index: {e}")
+            return []
+
+
+# Shared by every session in this process
+session_index = SessionIndex()
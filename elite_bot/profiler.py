@@ -0,0 +1,197 @@
+# elite_bot/profiler.py
+"""On-demand per-turn profiler for slow turns in production.
+
+Off by default; when off, profiler.turn() is one attribute check. Turn it on
+with environment variables or at runtime (POST /admin/profile on the API):
+
+    AGBOT_PROFILE_SESSIONS=sess-ab12,jordan   session ids or rep names to profile
+    AGBOT_PROFILE_SAMPLE=5                    also profile 5% of all other turns
+    AGBOT_PROFILE_MODE=sample                 sample (stack sampler) | cprofile (deterministic)
+    AGBOT_PROFILE_MIN_MS=2000                 keep output only for turns at least this slow
+    AGBOT_PROFILE_DIR=data/profiles
+
+Each profiled turn writes, named <utc>-<session>-<label>-<ms>ms:
+    .folded  collapsed stacks (sample mode) for flamegraph.pl, speedscope or inferno
+    .prof    pstats dump (cprofile mode) for snakeviz or `python -m pstats`
+    .txt     top functions by cumulative time
+
+The sampler reads the profiled thread's stack every AGBOT_PROFILE_INTERVAL_MS
+(default 5) from a helper thread, so time spent waiting on OpenAI or Sheets
+shows up too.
+"""
+import os
+import sys
+import time
+import random
+import pstats
+import cProfile
+import datetime
+import threading
+import contextlib
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional
+
+from .config import DATA_DIR
+
+PROFILE_DIR = os.getenv("AGBOT_PROFILE_DIR", os.path.join(DATA_DIR, "profiles"))
+PROFILE_INTERVAL_MS = float(os.getenv("AGBOT_PROFILE_INTERVAL_MS", "5"))
+MODES = ("sample", "cprofile")
+TOP_FUNCTIONS = 40
+_OFF = contextlib.nullcontext()
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Samples one thread's Python stack on a helper thread into collapsed-stack counts."""
+
+    def __init__(self, thread_id: int, interval_ms: float = PROFILE_INTERVAL_MS):
+        self.thread_id = thread_id
+        self.interval = interval_ms / 1000
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        me = sys._getframe()
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None and frame is not me:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def cumulative(self, top: int = TOP_FUNCTIONS) -> str:
+        """Inclusive and self sample counts per function, like pstats' cumulative view."""
+        samples = sum(self.stacks.values())
+        total = samples or 1
+        inclusive: Counter = Counter()
+        own: Counter = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            for name in set(frames):
+                inclusive[name] += count
+            own[frames[-1]] += count
+        lines = [f"{samples} samples every {self.interval * 1000:g} ms",
+                 f"{'cum %':>6} {'self %':>6}  function"]
+        for name, count in inclusive.most_common(top):
+            lines.append(f"{count / total:>6.1%} {own[name] / total:>6.1%}  {name}")
+        return "\n".join(lines) + "\n"
+
+
+class TurnProfiler:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.written: List[str] = []
+        self.configure(
+            sessions=[s for s in os.getenv("AGBOT_PROFILE_SESSIONS", "").split(",") if s.strip()],
+            sample=float(os.getenv("AGBOT_PROFILE_SAMPLE", "0") or 0),
+            mode=os.getenv("AGBOT_PROFILE_MODE", "sample"),
+            min_ms=float(os.getenv("AGBOT_PROFILE_MIN_MS", "0") or 0),
+        )
+
+    def configure(self, sessions: Optional[Iterable[str]] = None, sample: Optional[float] = None,
+                  mode: Optional[str] = None, min_ms: Optional[float] = None) -> Dict[str, Any]:
+        """Change what is profiled; arguments left as None keep their current value."""
+        with self._lock:
+            if sessions is not None:
+                self.sessions = {s.strip().lower() for s in sessions if s and s.strip()}
+            if sample is not None:
+                self.sample = min(100.0, max(0.0, float(sample)))
+            if mode is not None:
+                if mode not in MODES:
+                    raise ValueError(f"mode must be one of {MODES}")
+                self.mode = mode
+            if min_ms is not None:
+                self.min_ms = max(0.0, float(min_ms))
+            self.active = bool(self.sessions) or self.sample > 0
+        return self.stats()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"active": self.active, "sessions": sorted(self.sessions), "sample": self.sample,
+                    "mode": self.mode, "min_ms": self.min_ms, "dir": PROFILE_DIR,
+                    "written": len(self.written), "recent": self.written[-5:]}
+
+    def _selected(self, session) -> bool:
+        keys = {str(session.get("session_id", "")).lower(), str(session.get("user_name", "")).strip().lower()}
+        return bool(keys & self.sessions) or (self.sample > 0 and random.random() * 100 < self.sample)
+
+    def turn(self, session, label: str):
+        """Context manager around one turn; profiles it when the session is selected."""
+        if not self.active or getattr(self._local, "busy", False) or not self._selected(session):
+            return _OFF
+        return self._profile(session, label)
+
+    @contextlib.contextmanager
+    def _profile(self, session, label: str):
+        # Nested turns (the event handler calling respond_to) are covered by the outer one
+        self._local.busy = True
+        started = time.perf_counter()
+        try:
+            if self.mode == "cprofile":
+                profile = cProfile.Profile()
+                try:
+                    profile.enable()
+                except ValueError:  # another profiler is already running in this process
+                    yield
+                    return
+                try:
+                    yield
+                finally:
+                    profile.disable()
+                    self._write(session, label, started, profile=profile)
+            else:
+                with StackSampler(threading.get_ident()) as sampler:
+                    yield
+                self._write(session, label, started, sampler=sampler)
+        finally:
+            self._local.busy = False
+
+    def _write(self, session, label: str, started: float, profile: Optional[cProfile.Profile] = None,
+               sampler: Optional[StackSampler] = None) -> None:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if elapsed_ms < self.min_ms:
+            return
+        stamp = datetime.datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")[:-3]
+        session_id = "".join(c if c.isalnum() or c in "-_" else "_" for c in str(session.get("session_id", "")))
+        base = os.path.join(PROFILE_DIR, f"{stamp}-{session_id}-{label}-{elapsed_ms:.0f}ms")
+        try:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            if profile is not None:
+                profile.dump_stats(base + ".prof")
+                with open(base + ".txt", "w", encoding="utf-8") as f:
+                    pstats.Stats(profile, stream=f).sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+            else:
+                with open(base + ".folded", "w", encoding="utf-8") as f:
+                    f.write(sampler.folded())
+                with open(base + ".txt", "w", encoding="utf-8") as f:
+                    f.write(sampler.cumulative())
+        except Exception as e:
+            print(f"Error writing profile: {e}")
+            return
+        with self._lock:
+            self.written.append(base)
+            del self.written[:-100]
+        print(f"[profile] {label} for {session_id} took {elapsed_ms:.0f} ms -> {base}")
+
+
+# Shared by every session in this process
+profiler = TurnProfiler()
@@ -0,0 +1,151 @@
+# elite_bot/prompt.py
+"""Section-aware CHARACTER prompt compiler.
+
+CHARACTER is split on its `---` separators into tagged sections. Every turn
+gets the core (persona and M3 Pillars, the command library, the tone guard)
+plus only the sections the turn needs: roleplay rules during a roleplay or
+objection drill, the daily log script during a !dailylog flow, the first
+impression script for !firstimpression / !scripts. Compiled prompts are
+cached per section set.
+
+    python -m elite_bot.prompt      # prompt and tool-schema tokens per turn type, full vs sliced
+"""
+import os
+import re
+import json
+import argparse
+from functools import lru_cache
+from typing import Dict, FrozenSet
+
+from .character import CHARACTER
+
+try:
+    import tiktoken
+except ImportError:  # optional: token counts are estimated without it
+    tiktoken = None
+
+PROMPT_SLICING = os.getenv("AGBOT_PROMPT_SLICING", "1") != "0"
+
+# First heading of each section -> tag
+_SECTION_TAGS = (
+    ("You are the Elite", "persona"),
+    ("COMMAND LIBRARY", "commands"),
+    ("ROLEPLAY RULES", "roleplay"),
+    ("DAILY LOG PROMPTS", "dailylog"),
+    ("FIRST IMPRESSION SCRIPT", "firstimpression"),
+    ("TONE GUARD", "tone"),
+)
+CORE = frozenset({"persona", "commands", "tone"})
+SEPARATOR = "\n---  \n"
+
+ROLEPLAY_COMMANDS = {"!roleplay", "!objection", "!priceobjection", "!paymenttoohigh", "!tradevalue",
+                     "!thinkaboutit", "!shoparound", "!spouse", "!paymentvsprice", "!timingstall", "!trust"}
+FIRST_IMPRESSION_COMMANDS = {"!firstimpression", "!scripts"}
+# Free-form questions pull in a section when they mention its topic
+_TOPIC_RE = {
+    "roleplay": re.compile(r"objection|roleplay|role-play|price|payment|trade|spouse|wife|husband|think about|shop", re.I),
+    "dailylog": re.compile(r"daily ?log|\bups\b|appointments?|follow-?ups?|log my", re.I),
+    "firstimpression": re.compile(r"greet|walk(s|ing)? in|first impression|opening|welcome|script", re.I),
+}
+
+
+def split_sections(text: str = CHARACTER) -> Dict[str, str]:
+    """Tag -> section text, in CHARACTER order."""
+    sections: Dict[str, str] = {}
+    for block in re.split(r"\n---\s*\n", text):
+        body = block.strip("\n")
+        tag = next((t for head, t in _SECTION_TAGS if body.lstrip().startswith(head)), None)
+        if tag is None:
+            # Unknown sections are always sent, so edits to CHARACTER never drop content
+            tag = f"extra{len(sections)}"
+        sections[tag] = body
+    return sections
+
+
+SECTIONS = split_sections()
+ALWAYS = CORE | {t for t in SECTIONS if t.startswith("extra")}
+
+
+def select_sections(text: str, scenario: str = "", flow: str = "") -> FrozenSet[str]:
+    """Section tags a turn needs: the core plus the active command, scenario or flow."""
+    if not PROMPT_SLICING:
+        return frozenset(SECTIONS)
+    tags = set(ALWAYS)
+    t = (text or "").strip().lower()
+    command = t.split()[0] if t.startswith("!") else ""
+    if scenario or command in ROLEPLAY_COMMANDS:
+        tags.add("roleplay")
+    if flow == "dailylog" or command == "!dailylog":
+        tags.add("dailylog")
+    if command in FIRST_IMPRESSION_COMMANDS:
+        tags.add("firstimpression")
+    if not command:
+        tags.update(tag for tag, pattern in _TOPIC_RE.items() if pattern.search(t))
+    return frozenset(tags & set(SECTIONS))
+
+
+@lru_cache(maxsize=64)
+def compile_prompt(tags: FrozenSet[str]) -> str:
+    """CHARACTER restricted to the given sections, original order and separators kept."""
+    return "\n" + SEPARATOR.join(body for tag, body in SECTIONS.items() if tag in tags) + "\n"
+
+
+def prompt_for(text: str, scenario: str = "", flow: str = "") -> str:
+    return compile_prompt(select_sections(text, scenario, flow))
+
+
+# =========================
+# Token report
+# =========================
+@lru_cache(maxsize=1)
+def _encoding():
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding("o200k_base")
+    except Exception as e:  # the encoding file is downloaded on first use
+        print(f"tiktoken encoding unavailable ({e.__class__.__name__}); estimating tokens")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    enc = _encoding()
+    # ~4 characters per token for English prose when tiktoken is not installed
+    return len(enc.encode(text)) if enc else (len(text) + 3) // 4
+
+
+REPORT_TURNS = (
+    ("free-form question", "how do I close a deal today?", "", ""),
+    ("!pvf", "!pvf", "", ""),
+    ("!firstimpression", "!firstimpression", "", ""),
+    ("!dailylog", "!dailylog", "", ""),
+    ("daily log answer", "12", "", "dailylog"),
+    ("!spouse roleplay turn", "she wants to think about it", "spouse", ""),
+    ("!checkpoints", "!checkpoints", "", ""),
+)
+
+
+def report() -> None:
+    from .engine import OPENAI_FUNCTIONS, tools_for
+    full = count_tokens(CHARACTER)
+    all_tools = count_tokens(json.dumps(OPENAI_FUNCTIONS))
+    source = "tiktoken o200k_base" if _encoding() else "estimated, install tiktoken for exact counts"
+    print(f"CHARACTER prompt tokens ({source}): {full}; function schemas: {all_tools}")
+    print(f"{'turn':<26} {'sections':<28} {'prompt':>6} {'saved':>6} {'tools':>6} {'saved':>6}")
+    for label, text, scenario, flow in REPORT_TURNS:
+        tags = select_sections(text, scenario, flow)
+        tokens = count_tokens(compile_prompt(tags))
+        offered = tools_for({"scenario": scenario, "flow": flow or ("dailylog" if text == "!dailylog" else "")})
+        tool_tokens = count_tokens(json.dumps(offered)) if offered else 0
+        extra = ",".join(sorted(tags - ALWAYS)) or "core only"
+        print(f"{label:<26} {extra:<28} {tokens:>6} {1 - tokens / full:>6.0%} "
+              f"{tool_tokens:>6} {1 - tool_tokens / all_tools:>6.0%}")
+
+
+def main(argv=None) -> None:
+    argparse.ArgumentParser(description="CHARACTER prompt tokens per turn type, full vs sliced").parse_args(argv)
+    report()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,454 @@
+# elite_bot/replay.py
+"""Record real chat sessions and replay them as a regression and load corpus.
+
+Recording (AGBOT_RECORD=data/recordings/floor.jsonl): every component event
+(send_message, send_command, set_name) is written as one JSONL line with the
+reply and the OpenAI completions it triggered (message, usage, latency).
+Sessions and reps are pseudonymized, the rep's name is scrubbed from every
+text, and emails and phone numbers are masked.
+
+Replaying feeds the events back through engine.respond_to against stand-in
+backends: OpenAI answers with the recorded completions after their recorded
+latency, Sheets is an in-memory spreadsheet with a fixed per-call latency.
+Think time and backend latency are divided by --speedup.
+
+    python -m elite_bot.replay data/recordings/floor.jsonl --speedup 20 --out before.json
+    git checkout my-branch
+    python -m elite_bot.replay data/recordings/floor.jsonl --speedup 20 --compare before.json
+"""
+import os
+import re
+import json
+import time
+import hashlib
+import argparse
+import threading
+import subprocess
+from collections import defaultdict, deque
+from typing import Any, Deque, Dict, List, Optional
+
+RECORD_PATH = os.getenv("AGBOT_RECORD", "")
+# Pseudonyms are stable within one recording; set a salt to keep them stable across restarts
+RECORD_SALT = os.getenv("AGBOT_RECORD_SALT", "") or os.urandom(8).hex()
+
+_EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+_PHONE_RE = re.compile(r"(?<!\d)(?:\+?1[\s.-]?)?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}(?!\d)")
+
+
+# =========================
+# Recorder
+# =========================
+def _pseudonym(prefix: str, value: str) -> str:
+    return prefix + hashlib.sha1(f"{RECORD_SALT}|{value}".encode("utf-8")).hexdigest()[:8]
+
+
+class Recorder:
+    """Writes one sanitized JSONL line per component event. No-op unless a path is set."""
+
+    def __init__(self, path: str = RECORD_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+        self._started = time.time()
+        self._pending: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def sanitize(self, text: Any, names: tuple = ()) -> Any:
+        if not isinstance(text, str):
+            return text
+        for name in names:
+            if name and len(name) >= 2 and name.lower() != "user":
+                text = re.sub(rf"\b{re.escape(name)}\b", _pseudonym("Rep-", name.lower()), text, flags=re.I)
+        return _PHONE_RE.sub("[phone]", _EMAIL_RE.sub("[email]", text))
+
+    def sanitize_message(self, message: Dict[str, Any], names: tuple = ()) -> Dict[str, Any]:
+        """A completion message with its content and function-call arguments sanitized."""
+        message = {k: self.sanitize(v, names) if k == "content" else v for k, v in message.items()}
+        call = message.get("function_call")
+        if not call:
+            return message
+        raw = call.get("arguments") or "{}"
+        try:
+            args = json.loads(raw)
+        except (TypeError, ValueError):
+            message["function_call"] = dict(call, arguments=self.sanitize(raw, names))
+            return message
+        if isinstance(args, dict):
+            # The model may spell the rep differently from the session; scrub both
+            names = names + tuple(str(args[k]) for k in ("user_name", "user") if isinstance(args.get(k), str))
+            for k, v in args.items():
+                if k in ("user_name", "user") and isinstance(v, str):
+                    args[k] = _pseudonym("Rep-", v.strip().lower())
+                elif k == "session_id":
+                    args[k] = _pseudonym("s-", str(v))
+                else:
+                    args[k] = self.sanitize(v, names)
+        message["function_call"] = dict(call, arguments=json.dumps(args, ensure_ascii=False))
+        return message
+
+    def begin(self, session, event: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Start recording one event; returns a token for end(), or None when off."""
+        if not self.enabled or not isinstance(event, dict):
+            return None
+        session_id = session.get("session_id", "")
+        with self._lock:
+            self._pending.pop(session_id, None)
+        return {"session": session, "event": dict(event), "at": time.time(),
+                "messages": len(session.get("messages", [])), "started": time.perf_counter()}
+
+    def on_completion(self, tags: Optional[Dict[str, Any]], response: Optional[Dict[str, Any]],
+                      latency_ms: Optional[float], error: str = "") -> None:
+        """Called by engine.chat_completion for every completion while recording."""
+        if not self.enabled:
+            return
+        session_id = (tags or {}).get("session_id", "")
+        entry: Dict[str, Any] = {"latency_ms": round(latency_ms or 0.0, 1)}
+        if error:
+            entry["error"] = error
+        else:
+            entry["message"] = dict(response["choices"][0]["message"])
+            entry["usage"] = dict(response.get("usage") or {})
+        with self._lock:
+            self._pending[session_id].append(entry)
+
+    def end(self, token: Optional[Dict[str, Any]]) -> None:
+        if token is None:
+            return
+        session = token["session"]
+        session_id = session.get("session_id", "")
+        names = tuple({str(token["event"].get("user_name") or ""), str(session.get("user_name") or "")})
+        messages = session.get("messages", [])
+        new = messages[token["messages"]:]
+        reply = next((m["content"] for m in reversed(new) if m.get("role") == "assistant"), None)
+        with self._lock:
+            completions = self._pending.pop(session_id, [])
+        for c in completions:
+            if "message" in c:
+                c["message"] = self.sanitize_message(c["message"], names)
+        event = {k: self.sanitize(v, names) for k, v in token["event"].items()
+                 if k in ("action", "message", "command", "user_name")}
+        if event.get("user_name"):
+            event["user_name"] = _pseudonym("Rep-", str(token["event"]["user_name"]).strip().lower())
+        line = {
+            "session": _pseudonym("s-", session_id),
+            "at": round(token["at"] - self._started, 3),
+            "event": event,
+            "reply": self.sanitize(reply, names),
+            "turn_ms": round((time.perf_counter() - token["started"]) * 1000, 1),
+            "completions": completions,
+        }
+        self._write(line)
+
+    def _write(self, line: Dict[str, Any]) -> None:
+        try:
+            with self._lock:
+                if self._file is None:
+                    os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                    self._file = open(self.path, "a", encoding="utf-8")
+                self._file.write(json.dumps(line, ensure_ascii=False) + "\n")
+                self._file.flush()
+        except Exception as e:
+            print(f"Error writing recording: {e}")
+
+
+# Shared by every session in this process
+recorder = Recorder()
+
+
+# =========================
+# Stand-in backends
+# =========================
+class _Exec:
+    def __init__(self, value, latency: float):
+        self.value, self.latency = value, latency
+
+    def execute(self):
+        if self.latency:
+            time.sleep(self.latency)
+        return self.value
+
+
+class StandInSheets:
+    """In-memory Sheets v4 service covering the calls a chat turn makes, with fixed latency."""
+
+    _RANGE_RE = re.compile(r"'(.+)'!(?:([A-Z]+)?(\d+)?)(?::([A-Z]+)?(\d*))?$")
+
+    def __init__(self, latency_ms: float = 150.0):
+        self.latency = latency_ms / 1000
+        self.books: Dict[str, Dict[str, List[List[Any]]]] = defaultdict(dict)
+        self.calls = 0
+        self._lock = threading.RLock()
+
+    def spreadsheets(self):
+        return self
+
+    def values(self):
+        return self
+
+    def _exec(self, value) -> _Exec:
+        with self._lock:
+            self.calls += 1
+        return _Exec(value, self.latency)
+
+    def _parse(self, rng: str):
+        m = self._RANGE_RE.match(rng)
+        if not m:
+            return rng.strip("'"), 1, None
+        column = m.group(2) if m.group(2) and m.group(2) == m.group(4) else None
+        return m.group(1), int(m.group(3) or 1), column
+
+    def get(self, spreadsheetId, range=None, fields=None, **kwargs):
+        with self._lock:
+            book = self.books[spreadsheetId]
+            if range is None:
+                return self._exec({"sheets": [{"properties": {"title": t}} for t in book]})
+            tab, start, column = self._parse(range)
+            rows = book.get(tab, [])
+            stop = 1 if range.endswith("1:1") else None
+            values = [list(r) for r in rows[start - 1:stop]]
+        if column:
+            i = ord(column) - ord("A")
+            values = [[r[i] if len(r) > i else ""] for r in values]
+        return self._exec({"values": values})
+
+    def batchGet(self, spreadsheetId, ranges, **kwargs):
+        return self._exec({"valueRanges": [self.get(spreadsheetId, r).value for r in ranges]})
+
+    def batchUpdate(self, spreadsheetId, body):
+        with self._lock:
+            for request in body.get("requests", []):
+                if "addSheet" in request:
+                    self.books[spreadsheetId].setdefault(request["addSheet"]["properties"]["title"], [])
+        return self._exec({})
+
+    def update(self, spreadsheetId, range, valueInputOption=None, body=None):
+        tab, start, _ = self._parse(range)
+        with self._lock:
+            rows = self.books[spreadsheetId].setdefault(tab, [])
+            while len(rows) < start:
+                rows.append([])
+            rows[start - 1] = list(body["values"][0])
+        return self._exec({})
+
+    def append(self, spreadsheetId, range, valueInputOption=None, insertDataOption=None, body=None):
+        tab, _, _ = self._parse(range)
+        with self._lock:
+            rows = self.books[spreadsheetId].setdefault(tab, [])
+            first = len(rows) + 1
+            rows.extend(list(r) for r in body["values"])
+            last = len(rows)
+        return self._exec({"updates": {"updatedRange": f"'{tab}'!A{first}:I{last}"}})
+
+
+class StandInOpenAI:
+    """Replaces openai.ChatCompletion.create: serves the current turn's recorded completions."""
+
+    def __init__(self, speedup: float):
+        self.speedup = speedup
+        self.calls = 0
+        self.unmatched = 0
+        self._lock = threading.Lock()
+        self._turn = threading.local()
+
+    def start_turn(self, completions: List[Dict[str, Any]]) -> None:
+        self._turn.queue = deque(completions)
+        self._turn.latency = (sum(c.get("latency_ms", 0) for c in completions) / len(completions)
+                              if completions else 1000.0)
+
+    def create(self, **kwargs) -> Dict[str, Any]:
+        import openai
+        with self._lock:
+            self.calls += 1
+        queue: Deque[Dict[str, Any]] = getattr(self._turn, "queue", deque())
+        offered = {f["name"] for f in kwargs.get("functions") or []}
+        # A tool call the code under test no longer offers is skipped for the next text answer
+        while queue and (queue[0].get("message") or {}).get("function_call") \
+                and queue[0]["message"]["function_call"].get("name") not in offered:
+            queue.popleft()
+        if queue:
+            recorded = queue.popleft()
+        else:
+            with self._lock:
+                self.unmatched += 1
+            recorded = {"latency_ms": getattr(self._turn, "latency", 1000.0),
+                        "message": {"role": "assistant", "content": "(no recorded completion for this call)"}}
+        time.sleep(recorded.get("latency_ms", 0) / 1000 / self.speedup)
+        if recorded.get("error"):
+            raise openai.error.APIError(recorded["error"])
+        return {"choices": [{"message": dict(recorded["message"])}], "usage": recorded.get("usage", {})}
+
+
+# =========================
+# Replay
+# =========================
+def load(path: str) -> Dict[str, List[Dict[str, Any]]]:
+    """Recorded lines grouped per session, in recorded order."""
+    sessions: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                sessions[entry["session"]].append(entry)
+    for entries in sessions.values():
+        entries.sort(key=lambda e: e["at"])
+    return dict(sessions)
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def _code_version() -> str:
+    try:
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=root, capture_output=True,
+                              text=True, timeout=5).stdout.strip() or "unknown"
+    except Exception:
+        return "unknown"
+
+
+def replay(path: str, speedup: float = 10.0, sheets_ms: float = 150.0) -> Dict[str, Any]:
+    """Replay a recording through engine.respond_to and return latency/throughput metrics."""
+    import openai
+    from . import engine, sheets
+
+    recorded = load(path)
+    standin_openai = StandInOpenAI(speedup)
+    standin_sheets = StandInSheets(sheets_ms / speedup)
+    openai.ChatCompletion.create = standin_openai.create
+    sheets.get_sheets_service = lambda: standin_sheets
+
+    latencies: List[float] = []
+    recorded_latencies: List[float] = []
+    errors: List[str] = []
+    lock = threading.Lock()
+    started = time.perf_counter()
+
+    def run_session(name: str, entries: List[Dict[str, Any]]) -> None:
+        session: Dict[str, Any] = {}
+        engine.init_session(session, session_id=name)
+        origin = entries[0]["at"]
+        for entry in entries:
+            # Wait out the recorded think time, scaled, unless the previous turn ran late
+            due = started + (entry["at"] - origin) / speedup
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            event = entry["event"]
+            if event.get("user_name"):
+                session["user_name"] = event["user_name"]
+            text = (event.get("message") if event.get("action") == "send_message" else event.get("command")) or ""
+            if event.get("action") == "set_name" or not text.strip():
+                continue
+            engine.init_session(session)
+            standin_openai.start_turn(entry.get("completions", []))
+            t0 = time.perf_counter()
+            try:
+                engine.respond_to(session, text.strip())
+            except Exception as e:
+                with lock:
+                    errors.append(f"{name}: {e.__class__.__name__}: {e}")
+                continue
+            with lock:
+                latencies.append((time.perf_counter() - t0) * 1000)
+                recorded_latencies.append(entry.get("turn_ms", 0.0) / speedup)
+
+    threads = [threading.Thread(target=run_session, args=(name, entries), name=f"replay-{name}", daemon=True)
+               for name, entries in recorded.items()]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - started
+
+    return {
+        "version": _code_version(),
+        "recording": os.path.basename(path),
+        "speedup": speedup,
+        "sessions": len(recorded),
+        "turns": len(latencies),
+        "errors": len(errors),
+        "wall_s": round(wall, 3),
+        "throughput_tps": round(len(latencies) / wall, 2) if wall else 0.0,
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies), 1) if latencies else 0.0,
+            "p50": round(_percentile(latencies, 0.5), 1),
+            "p95": round(_percentile(latencies, 0.95), 1),
+            "p99": round(_percentile(latencies, 0.99), 1),
+            "max": round(max(latencies, default=0.0), 1),
+        },
+        # What the recorded turns took in production, scaled the same way
+        "recorded_p50_ms": round(_percentile(recorded_latencies, 0.5), 1),
+        "openai_calls": standin_openai.calls,
+        "openai_unmatched": standin_openai.unmatched,
+        "sheets_calls": standin_sheets.calls,
+        "error_samples": errors[:5],
+    }
+
+
+# =========================
+# Report
+# =========================
+_COMPARED = (
+    ("turns/s", lambda r: r["throughput_tps"], True),
+    ("mean ms", lambda r: r["latency_ms"]["mean"], False),
+    ("p50 ms", lambda r: r["latency_ms"]["p50"], False),
+    ("p95 ms", lambda r: r["latency_ms"]["p95"], False),
+    ("p99 ms", lambda r: r["latency_ms"]["p99"], False),
+    ("max ms", lambda r: r["latency_ms"]["max"], False),
+    ("OpenAI calls", lambda r: r["openai_calls"], False),
+    ("unrecorded", lambda r: r["openai_unmatched"], False),
+    ("Sheets calls", lambda r: r["sheets_calls"], False),
+    ("errors", lambda r: r["errors"], False),
+)
+
+
+def print_report(result: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> None:
+    print(f"Replayed {result['turns']} turns from {result['sessions']} sessions at {result['speedup']}x "
+          f"in {result['wall_s']}s (code {result['version']})")
+    if baseline is None:
+        for label, get, _ in _COMPARED:
+            print(f"  {label:<14} {get(result):>10}")
+        return
+    print(f"  {'':<14} {baseline['version']:>10} {result['version']:>10} {'delta':>8}")
+    for label, get, higher_is_better in _COMPARED:
+        before, after = get(baseline), get(result)
+        delta = f"{(after - before) / before:+.0%}" if before else "-"
+        better = (after > before) == higher_is_better and after != before
+        print(f"  {label:<14} {before:>10} {after:>10} {delta:>8}{'  better' if better else ''}")
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Replay a recorded chat corpus against stand-in backends")
+    parser.add_argument("recording", help="JSONL written with AGBOT_RECORD")
+    parser.add_argument("--speedup", type=float, default=10.0, help="divide think time and backend latency by this")
+    parser.add_argument("--sheets-ms", type=float, default=150.0, help="stand-in Sheets latency per call, before speedup")
+    parser.add_argument("--out", help="write the metrics as JSON (the baseline for a later --compare)")
+    parser.add_argument("--compare", help="metrics JSON from an earlier run to diff against")
+    args = parser.parse_args(argv)
+
+    result = replay(args.recording, args.speedup, args.sheets_ms)
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    # Replays never touch real spreadsheets, the shared data dir or the OpenAI rate limit
+    import tempfile
+    os.environ.setdefault("AGBOT_DATA_DIR", tempfile.mkdtemp(prefix="agbot-replay-"))
+    os.environ.setdefault("DAILY_LOG_SPREADSHEET_ID", "replay-daily")
+    os.environ.setdefault("SESSION_LOG_SPREADSHEET_ID", "replay-sessions")
+    os.environ.setdefault("AGBOT_OPENAI_RPM", "0")
+    main()
@@ -0,0 +1,207 @@
+# elite_bot/rollups.py
+"""Team aggregates for the manager dashboard, maintained incrementally.
+
+Per-rep totals are kept in dense NumPy cubes (period x rep x value) for each
+grain (day, week, month). They are updated by deltas as DailyLog rows are
+upserted and session-log turns are written, never recomputed from raw sheets.
+Each tenant (dealership) has its own, from aggregates_for().
+"""
+import os
+import datetime
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .leaderboard import rollup_for, METRICS
+from .sheets import session_log_listeners
+from .tenants import Tenant, current
+
+GRAINS = ("day", "week", "month")
+BANDS = ("A", "B", "C")
+# Live turns remembered for de-duplication against the mirror (several busy days' worth)
+LIVE_TURNS_MAX = 50_000
+
+
+def period_of(day: int, grain: str) -> int:
+    """Day ordinal of the period containing day (Monday for weeks, the 1st for months)."""
+    if grain == "day":
+        return day
+    d = datetime.date.fromordinal(day)
+    if grain == "week":
+        return day - d.weekday()
+    return d.replace(day=1).toordinal()
+
+
+class _Cube:
+    """Growable period x rep x width matrix with a period-ordinal index."""
+
+    def __init__(self, width: int, periods: int = 64, reps: int = 64):
+        self.index: Dict[int, int] = {}
+        self.periods: List[int] = []
+        self.data = np.zeros((periods, reps, width), dtype=np.int64)
+
+    def add(self, period: int, rep: int, values) -> None:
+        p = self.index.get(period)
+        if p is None:
+            p = self.index[period] = len(self.periods)
+            self.periods.append(period)
+        rows, cols, width = self.data.shape
+        if p >= rows or rep >= cols:
+            grown = np.zeros((max(rows, (p + 1) * 2) if p >= rows else rows,
+                              max(cols, (rep + 1) * 2) if rep >= cols else cols, width), dtype=np.int64)
+            grown[:rows, :cols] = self.data
+            self.data = grown
+        self.data[p, rep] += values
+
+    def get(self, period: int, reps: int) -> np.ndarray:
+        p = self.index.get(period)
+        if p is None:
+            return np.zeros((reps, self.data.shape[2]), dtype=np.int64)
+        out = np.zeros((reps, self.data.shape[2]), dtype=np.int64)
+        n = min(reps, self.data.shape[1])
+        out[:n] = self.data[p, :n]
+        return out
+
+    def series(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(sorted period ordinals, team totals per period)."""
+        if not self.periods:
+            return np.empty(0, dtype=np.int64), np.zeros((0, self.data.shape[2]), dtype=np.int64)
+        order = np.argsort(self.periods)
+        used = len(self.periods)
+        totals = self.data[:used].sum(axis=1)
+        return np.asarray(self.periods)[order], totals[order]
+
+
+class TeamAggregates:
+    def __init__(self, tenant: Optional[Tenant] = None):
+        self.tenant = tenant
+        self.rollup = rollup_for(tenant)
+        self._lock = threading.Lock()
+        self._metrics = {g: _Cube(len(METRICS)) for g in GRAINS}
+        self._bands = {g: _Cube(len(BANDS)) for g in GRAINS}
+        # Session rows counted live, so a later mirror refresh does not count them twice
+        self._live_turns = set()
+        self._session_seen_until = ""
+        self._session_mirror_mtime: Optional[float] = None
+
+    # ---- incremental inputs ----
+    def on_daily_upsert(self, old, new) -> None:
+        with self._lock:
+            if old is not None:
+                day, rep, values = old
+                for g in GRAINS:
+                    self._metrics[g].add(period_of(day, g), rep, -values)
+            day, rep, values = new
+            for g in GRAINS:
+                self._metrics[g].add(period_of(day, g), rep, values)
+
+    def _add_turn(self, stamp: str, user: str, band: str) -> None:
+        if band not in BANDS or not user or not stamp:
+            return
+        rep = self.rollup.code_for(user)
+        day = datetime.date.fromisoformat(stamp[:10]).toordinal()
+        one_hot = np.zeros(len(BANDS), dtype=np.int64)
+        one_hot[BANDS.index(band)] = 1
+        with self._lock:
+            for g in GRAINS:
+                self._bands[g].add(period_of(day, g), rep, one_hot)
+
+    def on_session_row(self, row: List[Any]) -> None:
+        stamp, user, session_id = str(row[0]), str(row[1]), str(row[2])
+        band = str(row[7]) if len(row) > 7 else ""
+        if band not in BANDS:
+            return  # not counted, so nothing to de-duplicate later
+        with self._lock:
+            self._live_turns.add((stamp, session_id))
+            if len(self._live_turns) > LIVE_TURNS_MAX:
+                self._trim_live_turns()
+        self._add_turn(stamp, user, band)
+
+    def _trim_live_turns(self) -> None:
+        """Forget the older half of the live turns when no mirror refresh has pruned them.
+
+        Mirror rows up to the newest forgotten stamp are then treated as seen,
+        so they are never counted twice.
+        """
+        ordered = sorted(self._live_turns)
+        cut = len(ordered) // 2
+        self._session_seen_until = max(self._session_seen_until, ordered[cut - 1][0])
+        self._live_turns = set(ordered[cut:])
+
+    def refresh_from_mirror(self) -> None:
+        """Fold in DailyLog (through the rollup) and session turns newer than the last refresh."""
+        self.rollup.refresh_from_mirror()
+        from . import mirror
+        session_dir = mirror.session_dir(self.tenant)
+        try:
+            mtime = max(os.path.getmtime(os.path.join(session_dir, f)) for f in os.listdir(session_dir))
+        except (OSError, ValueError):
+            return
+        if mtime == self._session_mirror_mtime:
+            return
+        df = mirror.load_session_log(["TimestampUTC", "UserName", "SessionId", "Band"], self.tenant)
+        df = df[df["TimestampUTC"] > self._session_seen_until]
+        for stamp, user, session_id, band in zip(df["TimestampUTC"], df["UserName"], df["SessionId"], df["Band"]):
+            with self._lock:
+                if (stamp, session_id) in self._live_turns:
+                    self._live_turns.discard((stamp, session_id))
+                    continue
+            self._add_turn(str(stamp), str(user), str(band))
+        if len(df):
+            self._session_seen_until = max(self._session_seen_until, str(df["TimestampUTC"].max()))
+        with self._lock:
+            self._live_turns = {k for k in self._live_turns if k[0] > self._session_seen_until}
+        self._session_mirror_mtime = mtime
+
+    # ---- reads ----
+    def periods(self, grain: str) -> List[datetime.date]:
+        with self._lock:
+            return sorted((datetime.date.fromordinal(p) for p in self._metrics[grain].periods), reverse=True)
+
+    def rep_table(self, grain: str, period: datetime.date) -> Dict[str, np.ndarray]:
+        """Per-rep columns for one period: metrics, appointments per up, band counts."""
+        names = self.rollup.names()
+        with self._lock:
+            metrics = self._metrics[grain].get(period.toordinal(), len(names))
+            bands = self._bands[grain].get(period.toordinal(), len(names))
+        active = np.flatnonzero(metrics.any(axis=1) | bands.any(axis=1))
+        metrics, bands = metrics[active], bands[active]
+        ups, appts = metrics[:, 0], metrics[:, 3]
+        turns = bands.sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            appts_per_up = np.where(ups > 0, appts / np.maximum(ups, 1), np.nan)
+            band_a_rate = np.where(turns > 0, bands[:, 0] / np.maximum(turns, 1), np.nan)
+        table = {"Rep": np.asarray(names, dtype=object)[active]}
+        table.update({m: metrics[:, i] for i, m in enumerate(METRICS)})
+        table["ApptsPerUp"] = appts_per_up
+        table.update({f"Band{b}": bands[:, i] for i, b in enumerate(BANDS)})
+        table["BandARate"] = band_a_rate
+        return table
+
+    def team_series(self, grain: str) -> Dict[str, np.ndarray]:
+        with self._lock:
+            periods, totals = self._metrics[grain].series()
+        table = {"Period": np.array([datetime.date.fromordinal(int(p)) for p in periods], dtype=object)}
+        table.update({m: totals[:, i] for i, m in enumerate(METRICS)})
+        return table
+
+
+_aggregates: Dict[str, TeamAggregates] = {}
+_aggregates_lock = threading.Lock()
+
+
+def aggregates_for(tenant: Optional[Tenant] = None) -> TeamAggregates:
+    """The tenant's team aggregates (the current tenant's by default), created on first use."""
+    tenant = tenant or current()
+    with _aggregates_lock:
+        found = _aggregates.get(tenant.id)
+        if found is None:
+            found = _aggregates[tenant.id] = TeamAggregates(tenant)
+            # Replays the DailyLog rows the rollup already holds
+            found.rollup.subscribe(found.on_daily_upsert)
+        return found
+
+
+# Writes run inside their tenant (see tenants.use)
+session_log_listeners.append(lambda row: aggregates_for().on_session_row(row))
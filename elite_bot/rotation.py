@@ -0,0 +1,362 @@
+# elite_bot/rotation.py
+"""Rotation and archival of the Sheets logs before they hit Sheets limits.
+
+Run it from cron shortly after midnight UTC:
+
+    python -m elite_bot.rotation             # rotate and archive
+    python -m elite_bot.rotation --dry-run   # report what would happen
+    python -m elite_bot.rotation --status    # cell usage and catalog
+    python -m elite_bot.rotation --tenant north   # one tenant (default: every tenant)
+
+- DailyLog: once the live tab holds AGBOT_DAILY_MAX_ROWS rows (and none from
+  today, which may still be upserted), it is renamed DailyLog-<last day> and a
+  fresh DailyLog tab with headers is created in the same batchUpdate. The
+  writer's G2:G scan then covers only recent rows.
+- Old tabs (sealed DailyLog tabs, session partitions and legacy per-session
+  tabs) are compacted into zstd Parquet files under data/archive/ and deleted
+  from the spreadsheet. Tabs older than AGBOT_ARCHIVE_AFTER_DAYS go first, then
+  the oldest remaining ones while the spreadsheet is over AGBOT_SHEETS_CELL_BUDGET.
+- Every sealed or archived tab is recorded in data/archive/catalog.sqlite with
+  its day range, so find_daily_log() and session_log_rows() still find
+  historical rows.
+"""
+import os
+import re
+import random
+import sqlite3
+import argparse
+import datetime
+from typing import Any, Dict, List, Optional
+
+import pyarrow.parquet as pq
+
+from .config import DATA_DIR
+from .sheets import get_sheets_service, forget_tab, DAILY_HEADERS, SESSION_HEADERS
+from .tenants import current, tenants, use
+from .partitions import partition_title
+from . import mirror
+
+# Google Sheets allows 10M cells per spreadsheet; leave headroom
+SHEETS_CELL_BUDGET = int(os.getenv("AGBOT_SHEETS_CELL_BUDGET", "8000000"))
+DAILY_MAX_ROWS = int(os.getenv("AGBOT_DAILY_MAX_ROWS", "5000"))
+ARCHIVE_AFTER_DAYS = int(os.getenv("AGBOT_ARCHIVE_AFTER_DAYS", "30"))
+
+ARCHIVE_DIR = os.path.join(DATA_DIR, "archive")
+CATALOG_PATH = os.path.join(ARCHIVE_DIR, "catalog.sqlite")
+DAILY_SHEET = mirror.DAILY_SHEET
+SEALED_PREFIX = f"{DAILY_SHEET}-"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS partitions (
+    spreadsheet_id TEXT, tab TEXT, kind TEXT, first_day TEXT, last_day TEXT, rows INTEGER,
+    status TEXT, archive_path TEXT, updated_utc TEXT,
+    PRIMARY KEY (spreadsheet_id, tab)
+)
+"""
+
+
+# =========================
+# Catalog
+# =========================
+class Catalog:
+    """Where every sealed or archived log tab lives now."""
+
+    def __init__(self, db_path: str = CATALOG_PATH):
+        self.db_path = db_path
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(SCHEMA)
+        return conn
+
+    def record(self, spreadsheet_id: str, tab: str, kind: str, first_day: str, last_day: str,
+               rows: int, status: str, archive_path: str = "") -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO partitions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (spreadsheet_id, tab, kind, first_day, last_day, rows, status, archive_path,
+                 datetime.datetime.utcnow().isoformat()),
+            )
+
+    def get(self, spreadsheet_id: str, tab: str) -> Optional[Dict[str, Any]]:
+        if not os.path.exists(self.db_path):
+            return None
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute(
+                "SELECT * FROM partitions WHERE spreadsheet_id = ? AND tab = ?", (spreadsheet_id, tab)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def covering(self, spreadsheet_id: str, kind: str, day: str) -> List[Dict[str, Any]]:
+        """Sealed or archived partitions of this spreadsheet and kind whose day range includes day."""
+        if not os.path.exists(self.db_path):
+            return []
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(
+                "SELECT * FROM partitions WHERE spreadsheet_id = ? AND kind = ? AND first_day <= ? AND last_day >= ? "
+                "ORDER BY last_day DESC",
+                (spreadsheet_id, kind, day, day),
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def all(self) -> List[Dict[str, Any]]:
+        if not os.path.exists(self.db_path):
+            return []
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            return [dict(r) for r in conn.execute("SELECT * FROM partitions ORDER BY kind, last_day")]
+
+
+catalog = Catalog()
+
+
+# =========================
+# Helpers
+# =========================
+def _sheets_meta(service, spreadsheet_id: str) -> List[Dict[str, Any]]:
+    meta = service.spreadsheets().get(
+        spreadsheetId=spreadsheet_id,
+        fields="sheets.properties(sheetId,title,gridProperties(rowCount,columnCount))"
+    ).execute()
+    return [s["properties"] for s in meta.get("sheets", [])]
+
+
+def _cells(props: Dict[str, Any]) -> int:
+    grid = props.get("gridProperties", {})
+    return int(grid.get("rowCount", 0)) * int(grid.get("columnCount", 0))
+
+
+def _title_day(title: str) -> Optional[str]:
+    """Last day covered by a dated tab title (DailyLog-2026-10-17, Sessions-2026-10-17, Sessions-2026-W42)."""
+    m = re.search(r"(\d{4})-W(\d{2})$", title)
+    if m:
+        sunday = datetime.date.fromisocalendar(int(m.group(1)), int(m.group(2)), 7)
+        return sunday.isoformat()
+    m = re.search(r"(\d{4}-\d{2}-\d{2})$", title)
+    return m.group(1) if m else None
+
+
+def _archive_path(kind: str, spreadsheet_id: str, tab: str) -> str:
+    safe = re.sub(r"[^A-Za-z0-9_.-]", "_", tab)
+    return os.path.join(ARCHIVE_DIR, kind, spreadsheet_id[:16], f"{safe}.parquet")
+
+
+# =========================
+# DailyLog rollover
+# =========================
+def rotate_daily(service, state: Dict[str, Any], dry_run: bool = False) -> Optional[str]:
+    """Seal the live DailyLog tab once it is full. Returns the sealed title, if any."""
+    spreadsheet_id = current().daily_log_spreadsheet_id
+    values = service.spreadsheets().values().get(
+        spreadsheetId=spreadsheet_id, range=f"'{DAILY_SHEET}'!A2:A"
+    ).execute().get("values", [])
+    days = [str(r[0])[:10] for r in values if r and str(r[0]).strip()]
+    if len(days) < DAILY_MAX_ROWS:
+        return None
+    today = datetime.datetime.utcnow().date().isoformat()
+    if max(days) >= today:
+        print(f"{DAILY_SHEET} has {len(days)} rows but today's rows may still be upserted; rotate after midnight UTC")
+        return None
+
+    sealed = f"{SEALED_PREFIX}{max(days)}"
+    print(f"Rolling {DAILY_SHEET} ({len(days)} rows) over to a fresh tab; sealing it as '{sealed}'")
+    if dry_run:
+        return sealed
+
+    # Keep the mirror complete before the live tab's row numbers restart
+    mirror.sync_daily_log(service, state)
+
+    live = next(p for p in _sheets_meta(service, spreadsheet_id) if p["title"] == DAILY_SHEET)
+    new_id = random.randint(1, 2**31 - 1)
+    header = [{"userEnteredValue": {"stringValue": h}} for h in DAILY_HEADERS]
+    # Rename, create and write the header in one request so writers never see a missing or headerless tab
+    service.spreadsheets().batchUpdate(
+        spreadsheetId=spreadsheet_id,
+        body={"requests": [
+            {"updateSheetProperties": {"properties": {"sheetId": live["sheetId"], "title": sealed}, "fields": "title"}},
+            {"addSheet": {"properties": {"sheetId": new_id, "title": DAILY_SHEET}}},
+            {"updateCells": {"start": {"sheetId": new_id, "rowIndex": 0, "columnIndex": 0},
+                             "rows": [{"values": header}], "fields": "userEnteredValue"}},
+        ]}
+    ).execute()
+    forget_tab(spreadsheet_id, DAILY_SHEET)
+    catalog.record(spreadsheet_id, sealed, "daily", min(days), max(days), len(days), "sealed")
+    mirror.seal_daily_tab(state, sealed)
+    return sealed
+
+
+# =========================
+# Archival
+# =========================
+def archive_tab(service, spreadsheet_id: str, props: Dict[str, Any], kind: str,
+                state: Dict[str, Any], dry_run: bool = False, before: Optional[str] = None) -> int:
+    """Compact one tab into a local Parquet file, then delete it. Returns rows archived (-1 if skipped).
+
+    With before set, a tab holding rows from that day or later is left alone.
+    """
+    tab = props["title"]
+    headers, schema = (DAILY_HEADERS, mirror.DAILY_SCHEMA) if kind == "daily" else (SESSION_HEADERS, mirror.SESSION_SCHEMA)
+    values = service.spreadsheets().values().get(
+        spreadsheetId=spreadsheet_id, range=f"'{tab}'!A1:{chr(ord('A') + len(headers) - 1)}"
+    ).execute().get("values", [])
+    if not values or values[0][:len(headers)] != headers:
+        return -1  # not a log tab
+    table = mirror.rows_to_table(values[1:], 2, tab, headers, schema)
+    days = sorted(str(d)[:10] for d in table.column(headers[0]).to_pylist() if d)
+    if before and days and days[-1] >= before:
+        return -1
+    if dry_run:
+        print(f"Would archive '{tab}' ({table.num_rows} rows)")
+        return table.num_rows
+
+    path = _archive_path(kind, spreadsheet_id, tab)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    pq.write_table(table, path + ".tmp", compression="zstd")
+    os.replace(path + ".tmp", path)
+    if pq.read_metadata(path).num_rows != table.num_rows:
+        raise RuntimeError(f"Archive of '{tab}' is incomplete; tab left in place")
+    first, last = (days[0], days[-1]) if days else ("", "")
+    catalog.record(spreadsheet_id, tab, kind, first, last, table.num_rows, "archived", path)
+
+    service.spreadsheets().batchUpdate(
+        spreadsheetId=spreadsheet_id,
+        body={"requests": [{"deleteSheet": {"sheetId": props["sheetId"]}}]}
+    ).execute()
+    forget_tab(spreadsheet_id, tab)
+    state.setdefault("session", {}).pop(tab, None)
+    print(f"Archived '{tab}' ({table.num_rows} rows) -> {path}")
+    return table.num_rows
+
+
+def _archive_spreadsheet(service, spreadsheet_id: str, kind: str, keep: set,
+                         state: Dict[str, Any], dry_run: bool) -> Dict[str, int]:
+    sheets = _sheets_meta(service, spreadsheet_id)
+    cells = sum(_cells(p) for p in sheets)
+    cutoff = (datetime.datetime.utcnow().date() - datetime.timedelta(days=ARCHIVE_AFTER_DAYS)).isoformat()
+
+    candidates = []
+    for props in sheets:
+        title = props["title"]
+        if title in keep:
+            continue
+        if kind == "daily" and not title.startswith(SEALED_PREFIX):
+            continue
+        candidates.append((_title_day(title) or "", props))
+    # Undated (legacy per-session) tabs sort first: they predate the partitioned layout
+    candidates.sort(key=lambda c: c[0])
+
+    archived = rows = 0
+    for day, props in candidates:
+        over_budget = cells > SHEETS_CELL_BUDGET
+        if day and day >= cutoff and not over_budget:
+            break
+        # Undated tabs are checked against the cutoff by their newest row
+        n = archive_tab(service, spreadsheet_id, props, kind, state, dry_run,
+                        before=None if over_budget else cutoff)
+        if n < 0:
+            continue
+        archived += 1
+        rows += n
+        cells -= _cells(props)
+    return {"tabs": archived, "rows": rows, "cells": cells}
+
+
+def rotate(dry_run: bool = False) -> Dict[str, Any]:
+    """Rotate and archive the current tenant's spreadsheets."""
+    tenant = current()
+    daily_id, session_id = tenant.daily_log_spreadsheet_id, tenant.session_log_spreadsheet_id
+    service = get_sheets_service()
+    if service is None:
+        raise RuntimeError("Failed to initialize Google Sheets service")
+    state = mirror.load_state()
+    summary: Dict[str, Any] = {}
+
+    if daily_id:
+        summary["daily_sealed"] = rotate_daily(service, state, dry_run)
+        summary["daily"] = _archive_spreadsheet(service, daily_id, "daily", {DAILY_SHEET}, state, dry_run)
+    if session_id:
+        if not dry_run:
+            # Reporting reads the mirror, so it must hold every row before tabs are deleted
+            mirror.sync_session_log(service, state)
+        now = datetime.datetime.utcnow()
+        live = {partition_title(now), partition_title(now - datetime.timedelta(days=1))}
+        if session_id == daily_id:
+            live.add(DAILY_SHEET)
+        summary["session"] = _archive_spreadsheet(service, session_id, "session", live, state, dry_run)
+
+    if not dry_run:
+        mirror.save_state(state)
+    return summary
+
+
+# =========================
+# Lookups
+# =========================
+def read_archive(path: str, column: str, value: str) -> List[List[Any]]:
+    """Rows from an archived tab where column == value, in header order."""
+    table = pq.read_table(path, filters=[(column, "=", value)])
+    headers = [f for f in table.column_names if not f.startswith("_")]
+    return [[row[h] for h in headers] for row in table.to_pylist()]
+
+
+def find_daily_log(service, log_id: str) -> Optional[List[Any]]:
+    """A DailyLog row by LogId, wherever it lives now (live tab, sealed tab or archive)."""
+    log_id = log_id.strip().lower()
+    day = log_id.rsplit("|", 1)[-1]
+    spreadsheet_id = current().daily_log_spreadsheet_id
+    places = [(p["tab"], p["archive_path"] if p["status"] == "archived" else "")
+              for p in catalog.covering(spreadsheet_id, "daily", day)]
+    places.append((DAILY_SHEET, ""))
+    for tab, path in places:
+        if path:
+            rows = read_archive(path, "LogId", log_id)
+        else:
+            rows = service.spreadsheets().values().get(
+                spreadsheetId=spreadsheet_id, range=f"'{tab}'!A2:G"
+            ).execute().get("values", [])
+            rows = [r for r in rows if len(r) > 6 and r[6].strip().lower() == log_id]
+        if rows:
+            return rows[-1]
+    return None
+
+
+def status() -> None:
+    tenant = current()
+    service = get_sheets_service()
+    spreadsheets = {tenant.daily_log_spreadsheet_id, tenant.session_log_spreadsheet_id}
+    for name, spreadsheet_id in (("daily", tenant.daily_log_spreadsheet_id), ("session", tenant.session_log_spreadsheet_id)):
+        if not spreadsheet_id or service is None:
+            continue
+        sheets = _sheets_meta(service, spreadsheet_id)
+        cells = sum(_cells(p) for p in sheets)
+        print(f"{name:<8} {len(sheets):>5} tabs {cells:>11,} cells ({cells / SHEETS_CELL_BUDGET:.0%} of budget)")
+    for p in catalog.all():
+        if p["spreadsheet_id"] not in spreadsheets:
+            continue
+        print(f"{p['kind']:<8} {p['status']:<9} {p['tab']:<32} {p['first_day']}..{p['last_day']} {p['rows']:>7} rows")
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Roll over and archive Sheets log tabs before Sheets limits")
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--status", action="store_true", help="Show cell usage and the archive catalog")
+    parser.add_argument("--tenant", action="append", choices=tenants.ids(), help="Only these tenants (repeatable)")
+    args = parser.parse_args(argv)
+    for tenant in tenants:
+        if args.tenant and tenant.id not in args.tenant:
+            continue
+        if not (tenant.daily_log_spreadsheet_id or tenant.session_log_spreadsheet_id):
+            continue
+        with use(tenant):
+            if args.status:
+                print(f"== {tenant.id} ({tenant.name})")
+                status()
+            else:
+                print(f"Rotation for {tenant.id}: {rotate(dry_run=args.dry_run)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+# elite_bot/scheduler.py
+import time
+import threading
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+from .config import (
+    OPENAI_MAX_CONCURRENCY,
+    OPENAI_REQUESTS_PER_MINUTE,
+    OPENAI_BURST,
+    OPENAI_QUEUE_TIMEOUT,
+    OPENAI_CIRCUIT_FAILURES,
+    OPENAI_CIRCUIT_COOLDOWN,
+    OPENAI_SLOW_SECONDS,
+)
+
+
+class QueueTimeout(Exception):
+    """Raised when a request waits longer than the admission timeout."""
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling OpenAI while the circuit breaker is open."""
+
+
+# =========================
+# Token bucket (requests per minute)
+# =========================
+class TokenBucket:
+    def __init__(self, rate_per_minute: float, capacity: float):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(capacity, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_take(self, n: float = 1.0) -> float:
+        """Take n tokens if available. Returns 0 on success, else seconds until they will be."""
+        if self.rate <= 0:
+            return 0.0
+        self._refill()
+        if self.tokens >= n:
+            self.tokens -= n
+            return 0.0
+        return (n - self.tokens) / self.rate
+
+    def drain(self) -> None:
+        """Empty the bucket, e.g. after the upstream answered 429."""
+        self._refill()
+        self.tokens = 0.0
+
+
+# =========================
+# Fair admission scheduler
+# =========================
+class OpenAIScheduler:
+    """Process-wide gate for OpenAI calls.
+
+    At most ``max_concurrency`` calls run at once, admissions are paced by a
+    token bucket, and waiting requests are served round-robin across fairness
+    keys (one rep cannot starve the rest of the floor). ``on_wait`` receives the
+    caller's 1-based queue position whenever it changes.
+    """
+
+    def __init__(self, max_concurrency: int = OPENAI_MAX_CONCURRENCY,
+                 requests_per_minute: float = OPENAI_REQUESTS_PER_MINUTE,
+                 burst: float = OPENAI_BURST,
+                 timeout: float = OPENAI_QUEUE_TIMEOUT):
+        self.max_concurrency = max(1, max_concurrency)
+        self.timeout = timeout
+        self.bucket = TokenBucket(requests_per_minute, burst)
+        self._cond = threading.Condition()
+        self._active = 0
+        self._queues: "OrderedDict[str, deque]" = OrderedDict()
+
+    # ---- queue bookkeeping (call with the lock held) ----
+    def _is_head(self, key: str, ticket: object) -> bool:
+        first_key = next(iter(self._queues), None)
+        return first_key == key and self._queues[key][0] is ticket
+
+    def _pop_head(self, key: str) -> None:
+        q = self._queues[key]
+        q.popleft()
+        # Served key goes to the back of the rotation
+        del self._queues[key]
+        if q:
+            self._queues[key] = q
+
+    def _remove(self, key: str, ticket: object) -> None:
+        q = self._queues.get(key)
+        if q is None:
+            return
+        try:
+            q.remove(ticket)
+        except ValueError:
+            return
+        if not q:
+            del self._queues[key]
+
+    def _position(self, key: str, ticket: object) -> int:
+        keys = list(self._queues)
+        if key not in self._queues:
+            return 0
+        rank = keys.index(key)
+        idx = list(self._queues[key]).index(ticket)
+        pos = 0
+        for j, k in enumerate(keys):
+            n = len(self._queues[k])
+            if j < rank:
+                pos += min(n, idx + 1)
+            elif j == rank:
+                pos += idx + 1
+            else:
+                pos += min(n, idx)
+        return pos
+
+    # ---- public API ----
+    def acquire(self, key: str, on_wait: Optional[Callable[[int], None]] = None) -> None:
+        ticket = object()
+        deadline = time.monotonic() + self.timeout if self.timeout else None
+        last_pos = None
+        with self._cond:
+            self._queues.setdefault(key, deque()).append(ticket)
+        try:
+            while True:
+                with self._cond:
+                    wait = 1.0
+                    if self._is_head(key, ticket) and self._active < self.max_concurrency:
+                        wait = self.bucket.try_take()
+                        if wait == 0:
+                            self._pop_head(key)
+                            self._active += 1
+                            self._cond.notify_all()
+                            return
+                    pos = self._position(key, ticket)
+                    if pos == last_pos:
+                        if deadline is not None:
+                            remaining = deadline - time.monotonic()
+                            if remaining <= 0:
+                                raise QueueTimeout(f"Waited more than {self.timeout:.0f}s for an OpenAI slot")
+                            wait = min(wait, remaining)
+                        self._cond.wait(timeout=wait)
+                        continue
+                    last_pos = pos
+                # Report outside the lock; callbacks may touch the UI
+                if on_wait:
+                    on_wait(pos)
+        except BaseException:
+            with self._cond:
+                self._remove(key, ticket)
+                self._cond.notify_all()
+            raise
+
+    def release(self) -> None:
+        with self._cond:
+            self._active = max(0, self._active - 1)
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, key: str, on_wait: Optional[Callable[[int], None]] = None):
+        self.acquire(key, on_wait=on_wait)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def throttle(self) -> None:
+        """Back off admissions after an upstream rate-limit response."""
+        with self._cond:
+            self.bucket.drain()
+
+    def position(self, key: str) -> int:
+        """Queue position of the key's oldest waiting request (0 when not waiting)."""
+        with self._cond:
+            q = self._queues.get(key)
+            return self._position(key, q[0]) if q else 0
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "active": self._active,
+                "waiting": sum(len(q) for q in self._queues.values()),
+                "max_concurrency": self.max_concurrency,
+            }
+
+
+# Shared by every session in this process
+scheduler = OpenAIScheduler()
+
+
+# =========================
+# Circuit breaker (upstream health)
+# =========================
+class CircuitBreaker:
+    """closed -> open after N consecutive failures -> half-open trial after the cooldown."""
+
+    def __init__(self, failures: int = OPENAI_CIRCUIT_FAILURES, cooldown: float = OPENAI_CIRCUIT_COOLDOWN,
+                 slow_seconds: float = OPENAI_SLOW_SECONDS):
+        self.max_failures = max(1, failures)
+        self.cooldown = cooldown
+        self.slow_seconds = slow_seconds
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial = False
+        self.opened_count = 0
+
+    def is_open(self) -> bool:
+        """True while calls should be skipped (does not claim the half-open trial)."""
+        with self._lock:
+            if self._opened_at is None:
+                return False
+            return self._trial or time.monotonic() - self._opened_at < self.cooldown
+
+    def allow(self) -> bool:
+        """Whether a call may go upstream now; past the cooldown the first caller is the trial."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._trial or time.monotonic() - self._opened_at < self.cooldown:
+                return False
+            self._trial = True
+            return True
+
+    def release(self) -> None:
+        """Give back a half-open trial that never reached OpenAI (e.g. a queue timeout)."""
+        with self._lock:
+            self._trial = False
+
+    def record(self, ok: bool, seconds: float = 0.0) -> None:
+        with self._lock:
+            if ok and seconds < self.slow_seconds:
+                self._failures = 0
+                self._opened_at = None
+                self._trial = False
+                return
+            self._failures += 1
+            if self._trial or self._failures >= self.max_failures:
+                if self._opened_at is None:
+                    self.opened_count += 1
+                    print(f"OpenAI circuit open after {self._failures} failed or slow call(s); "
+                          f"using the offline responder for {self.cooldown:.0f}s")
+                self._opened_at = time.monotonic()
+                self._trial = False
+
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if self._trial or time.monotonic() - self._opened_at >= self.cooldown:
+                return "half-open"
+            return "open"
+
+    def stats(self) -> dict:
+        return {"state": self.state(), "consecutive_failures": self._failures, "times_opened": self.opened_count}
+
+
+circuit = CircuitBreaker()
@@ -0,0 +1,215 @@
+# elite_bot/scoring.py
+"""Batch roleplay scoring over the session logs.
+
+Streams session rows in bounded chunks from Sheets, the Parquet mirror or a
+CSV export, reduces each chunk to per-roleplay partial aggregates with
+vectorized group-bys, and writes session, rep and scenario scores to
+data/scores/*.parquet.
+
+    python -m elite_bot.scoring                      # from the local mirror
+    python -m elite_bot.scoring --source sheets
+    python -m elite_bot.scoring --source csv export.csv
+    python -m elite_bot.scoring --tenant north       # data/tenants/north/scores
+
+A roleplay is one (SessionId, Scenario) pair. It is "abandoned" when it never
+reached band A and stopped before ROLEPLAY_MIN_STEPS turns.
+"""
+import os
+import argparse
+from typing import Dict, Iterator, Optional
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from .sheets import SESSION_HEADERS
+from .tenants import current, tenants, use
+
+CHUNK_ROWS = 50_000
+# CHARACTER: "Default length 5–6 turns"
+ROLEPLAY_MIN_STEPS = 5
+KEY = ["SessionId", "Scenario"]
+COLUMNS = ["TimestampUTC", "UserName", "SessionId", "Scenario", "Step", "Band"]
+
+
+# =========================
+# Sources (generators of bounded DataFrame chunks)
+# =========================
+def iter_mirror(chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    from . import mirror
+    session_dir = mirror.session_dir()
+    if not os.path.isdir(session_dir):
+        return
+    pf_paths = sorted(os.path.join(session_dir, f) for f in os.listdir(session_dir) if f.endswith(".parquet"))
+    tab, row = mirror.TAB_COLUMN, mirror.ROW_COLUMN
+    # A part can re-fetch rows an earlier part holds (see mirror.load_session_log).
+    # Parts are named in write order and session tabs are append-only, so the
+    # highest sheet row read per tab in earlier parts is enough to skip them
+    done: Dict[str, int] = {}
+    for path in pf_paths:
+        read: Dict[str, int] = {}
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows, columns=COLUMNS + [tab, row]):
+            df = batch.to_pandas()
+            df = df[df[row] > df[tab].map(done).fillna(0)]
+            for t, r in df.groupby(tab)[row].max().items():
+                read[t] = max(read.get(t, 0), int(r))
+            yield df[COLUMNS]
+        for t, r in read.items():
+            done[t] = max(done.get(t, 0), r)
+
+
+def iter_csv(path: str, chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    yield from pd.read_csv(path, usecols=COLUMNS, dtype=str, chunksize=chunk_rows, keep_default_na=False)
+
+
+def iter_sheets(chunk_rows: int = CHUNK_ROWS, ranges_per_call: int = 50) -> Iterator[pd.DataFrame]:
+    from .sheets import get_sheets_service
+    service = get_sheets_service()
+    spreadsheet_id = current().session_log_spreadsheet_id
+    if service is None or not spreadsheet_id:
+        raise RuntimeError("Google Sheets service or SESSION_LOG_SPREADSHEET_ID unavailable")
+    meta = service.spreadsheets().get(spreadsheetId=spreadsheet_id, fields="sheets.properties.title").execute()
+    tabs = [s["properties"]["title"] for s in meta.get("sheets", [])]
+    buffer = []
+    for i in range(0, len(tabs), ranges_per_call):
+        res = service.spreadsheets().values().batchGet(
+            spreadsheetId=spreadsheet_id,
+            ranges=[f"'{t}'!A1:I" for t in tabs[i:i + ranges_per_call]],
+        ).execute()
+        for value_range in res.get("valueRanges", []):
+            values = value_range.get("values", [])
+            if not values or values[0][:len(SESSION_HEADERS)] != SESSION_HEADERS:
+                continue
+            buffer.extend(r + [""] * (len(SESSION_HEADERS) - len(r)) for r in values[1:])
+            if len(buffer) >= chunk_rows:
+                yield pd.DataFrame(buffer, columns=SESSION_HEADERS)[COLUMNS]
+                buffer = []
+    if buffer:
+        yield pd.DataFrame(buffer, columns=SESSION_HEADERS)[COLUMNS]
+
+
+# =========================
+# Streaming reduction
+# =========================
+def reduce_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    """Per-roleplay partial aggregates for one chunk."""
+    df = chunk[chunk["Scenario"].astype(str).str.strip() != ""].copy()
+    if df.empty:
+        return pd.DataFrame()
+    df["ts"] = pd.to_datetime(df["TimestampUTC"], errors="coerce", utc=True)
+    df["Step"] = pd.to_numeric(df["Step"], errors="coerce")
+    is_a = df["Band"].astype(str) == "A"
+    df["is_a"] = is_a
+    df["ts_a"] = df["ts"].where(is_a)
+    df["step_a"] = df["Step"].where(is_a)
+    return df.groupby(KEY, sort=False).agg(
+        user=("UserName", "last"),
+        turns=("Step", "size"),
+        first_ts=("ts", "min"),
+        last_ts=("ts", "max"),
+        max_step=("Step", "max"),
+        first_a_ts=("ts_a", "min"),
+        first_a_step=("step_a", "min"),
+        a_turns=("is_a", "sum"),
+    )
+
+
+def merge_partials(acc: Optional[pd.DataFrame], part: pd.DataFrame) -> pd.DataFrame:
+    if acc is None or acc.empty:
+        return part
+    if part.empty:
+        return acc
+    both = pd.concat([acc, part])
+    return both.groupby(level=KEY, sort=False).agg({
+        "user": "last", "turns": "sum", "first_ts": "min", "last_ts": "max",
+        "max_step": "max", "first_a_ts": "min", "first_a_step": "min", "a_turns": "sum",
+    })
+
+
+def session_scores(chunks: Iterator[pd.DataFrame]) -> pd.DataFrame:
+    acc = None
+    for chunk in chunks:
+        acc = merge_partials(acc, reduce_chunk(chunk))
+    if acc is None or acc.empty:
+        return pd.DataFrame(columns=KEY + ["user", "turns", "max_step", "reached_a", "secs_to_a", "steps_to_a", "abandoned"])
+    out = acc.reset_index()
+    out["reached_a"] = out["a_turns"] > 0
+    out["secs_to_a"] = (out["first_a_ts"] - out["first_ts"]).dt.total_seconds()
+    out["steps_to_a"] = out["first_a_step"]
+    out["abandoned"] = ~out["reached_a"] & (out["max_step"].fillna(0) < ROLEPLAY_MIN_STEPS)
+    out["duration_secs"] = (out["last_ts"] - out["first_ts"]).dt.total_seconds()
+    return out.drop(columns=["first_a_ts", "first_a_step", "a_turns"])
+
+
+def rollup_scores(sessions: pd.DataFrame, by: str) -> pd.DataFrame:
+    """Per-rep (by='user') or per-scenario (by='Scenario') scores."""
+    if sessions.empty:
+        return pd.DataFrame()
+    grouped = sessions.groupby(by)
+    out = grouped.agg(
+        roleplays=("turns", "size"),
+        turns=("turns", "sum"),
+        avg_steps=("max_step", "mean"),
+        band_a_rate=("reached_a", "mean"),
+        median_secs_to_a=("secs_to_a", "median"),
+        avg_steps_to_a=("steps_to_a", "mean"),
+        abandonment_rate=("abandoned", "mean"),
+    )
+    if by != "Scenario":
+        # Steps per scenario as columns, e.g. steps_price, steps_trade
+        per_scenario = sessions.pivot_table(index=by, columns="Scenario", values="max_step", aggfunc="mean")
+        out = out.join(per_scenario.add_prefix("steps_"))
+    return out.reset_index().sort_values("roleplays", ascending=False)
+
+
+def scores_dir() -> str:
+    return os.path.join(current().data_dir, "scores")
+
+
+def write_scores(sessions: pd.DataFrame, out_dir: Optional[str] = None) -> dict:
+    out_dir = out_dir or scores_dir()
+    os.makedirs(out_dir, exist_ok=True)
+    outputs = {
+        "session_scores": sessions,
+        "rep_scores": rollup_scores(sessions, "user"),
+        "scenario_scores": rollup_scores(sessions, "Scenario"),
+    }
+    for name, df in outputs.items():
+        path = os.path.join(out_dir, f"{name}.parquet")
+        df.to_parquet(path + ".tmp", index=False)
+        os.replace(path + ".tmp", path)
+    return {name: len(df) for name, df in outputs.items()}
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Score roleplays across all session logs")
+    parser.add_argument("--source", choices=("mirror", "sheets", "csv"), default="mirror")
+    parser.add_argument("path", nargs="?", help="CSV export path for --source csv")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--out", help="output directory (default: the tenant's data/scores)")
+    parser.add_argument("--tenant", choices=tenants.ids(), help="tenant to score (default: the default tenant)")
+    args = parser.parse_args(argv)
+    with use(args.tenant):
+        _score(parser, args)
+
+
+def _score(parser, args) -> None:
+    if args.source == "csv":
+        if not args.path:
+            parser.error("--source csv needs a path")
+        chunks = iter_csv(args.path, args.chunk_rows)
+    elif args.source == "sheets":
+        chunks = iter_sheets(args.chunk_rows)
+    else:
+        chunks = iter_mirror(args.chunk_rows)
+
+    sessions = session_scores(chunks)
+    out_dir = args.out or scores_dir()
+    counts = write_scores(sessions, out_dir)
+    print(f"Scored {counts['session_scores']} roleplays -> {out_dir}")
+    reps = rollup_scores(sessions, "user")
+    if not reps.empty:
+        print(reps[["user", "roleplays", "band_a_rate", "median_secs_to_a", "abandonment_rate"]].head(10).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
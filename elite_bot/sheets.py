@@ -0,0 +1,536 @@
+# elite_bot/sheets.py
+import os
+import re
+import datetime
+import threading
+from typing import Callable, Dict, Any, List, Optional
+
+# Google Sheets API
+from google.oauth2 import service_account
+from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+import google.auth.transport.requests
+
+from .config import (
+    SCOPES,
+    SERVICE_ACCOUNT_JSON,
+    ROOT_DIR,
+)
+from .partitions import SESSION_PARTITION, partition_title, session_index
+from .tenants import current
+
+# =========================
+# Google Sheets helpers
+# =========================
+# Credentials are loaded, and their access token fetched, once per service
+# account per process; google-auth refreshes the token when it expires. Tenants
+# without their own account share the process-wide one. httplib2 connections are
+# not thread-safe, so each thread builds one service per account.
+_credentials: Dict[str, Any] = {}
+_credentials_lock = threading.Lock()
+_local = threading.local()
+
+def _tenant_credentials(service_account_json: str):
+    """Credentials for a tenant's own service account (a file path or inline JSON)."""
+    import json
+    try:
+        if service_account_json.lstrip().startswith("{"):
+            info = json.loads(service_account_json)
+        else:
+            with open(service_account_json, "r") as f:
+                info = json.load(f)
+        credentials = service_account.Credentials.from_service_account_info(info, scopes=SCOPES)
+        print(f"Using tenant service account: {getattr(credentials, 'service_account_email', '?')}")
+        return credentials
+    except Exception as e:
+        print(f"Error loading tenant service account: {e}")
+        return None
+
+def _load_credentials():
+    """Service-account credentials from service_account.json, GOOGLE_SERVICE_ACCOUNT_JSON or credentials.json."""
+    try:
+        # First, try to use the service_account.json file directly
+        service_account_path = os.path.join(ROOT_DIR, 'service_account.json')
+        if os.path.exists(service_account_path):
+            try:
+                print(f"Found service_account.json file, using it for authentication")
+                
+                # Verify the contents of the JSON file
+                import json
+                try:
+                    with open(service_account_path, 'r') as f:
+                        service_account_info = json.load(f)
+                    
+                    # Check for required fields
+                    required_fields = ['type', 'project_id', 'private_key_id', 'private_key', 'client_email']
+                    missing_fields = [field for field in required_fields if field not in service_account_info]
+                    
+                    if missing_fields:
+                        print(f"WARNING: Service account JSON file is missing these required fields: {missing_fields}")
+                    else:
+                        print(f"Service account JSON file contains all required fields")
+                        print(f"Project ID: {service_account_info.get('project_id')}")
+                        print(f"Client Email: {service_account_info.get('client_email')}")
+                except Exception as e:
+                    print(f"Error reading service_account.json: {e}")
+                
+                # Create credentials from the service account file with explicit token URI
+                credentials = service_account.Credentials.from_service_account_file(
+                    service_account_path, 
+                    scopes=SCOPES
+                )
+                
+                # Force token refresh to get access token
+                try:
+                    credentials.refresh(google.auth.transport.requests.Request())
+                    print("Successfully refreshed access token")
+                except Exception as e:
+                    print(f"Error refreshing token: {e}")
+                
+                # Print the service account email for debugging/setup purposes
+                if hasattr(credentials, 'service_account_email'):
+                    print(f"Using service account: {credentials.service_account_email}")
+                    print(f"Make sure to share your Google Sheets with this email address")
+                
+                return credentials
+            except Exception as e:
+                print(f"Error using service_account.json file: {e}")
+        
+        # Fall back to GOOGLE_SERVICE_ACCOUNT_JSON environment variable
+        elif SERVICE_ACCOUNT_JSON:
+            try:
+                # Try to parse as JSON
+                import json
+                info_dict = json.loads(SERVICE_ACCOUNT_JSON)
+                credentials = service_account.Credentials.from_service_account_info(
+                    info_dict, 
+                    scopes=SCOPES
+                )
+                
+                # Print the service account email for debugging
+                if hasattr(credentials, 'service_account_email'):
+                    print(f"Using service account from env var: {credentials.service_account_email}")
+                
+                print("Using credentials from GOOGLE_SERVICE_ACCOUNT_JSON environment variable")
+                return credentials
+            except Exception as e:
+                print(f"Error using GOOGLE_SERVICE_ACCOUNT_JSON: {e}")
+        
+        # Last resort - try credentials.json
+        creds_file = os.path.join(ROOT_DIR, 'credentials.json')
+        if os.path.exists(creds_file):
+            try:
+                credentials = service_account.Credentials.from_service_account_file(
+                    creds_file, 
+                    scopes=SCOPES
+                )
+                print(f"Using credentials file: {creds_file}")
+                return credentials
+            except Exception as e:
+                print(f"Error using credentials.json file: {e}")
+        
+        # No credentials found
+        print("No Google Sheets credentials found. Functionality will be limited.")
+        print("Please set GOOGLE_SERVICE_ACCOUNT_JSON in your .env file or place a credentials.json file in the project directory")
+        return None
+    except Exception as e:
+        print(f"Error loading Google Sheets credentials: {e}")
+        return None
+
+def get_credentials():
+    """Credentials of the current tenant's service account, loaded on first use."""
+    key = current().service_account_json
+    with _credentials_lock:
+        credentials = _credentials.get(key)
+        if credentials is None:
+            credentials = _tenant_credentials(key) if key else _load_credentials()
+            if credentials is not None:
+                _credentials[key] = credentials
+        return credentials
+
+def get_sheets_service():
+    """Google Sheets API service for the calling thread and the current tenant's service account."""
+    key = current().service_account_json
+    services = getattr(_local, "services", None)
+    if services is None:
+        services = _local.services = {}
+    service = services.get(key)
+    if service is not None:
+        return service
+    try:
+        credentials = get_credentials()
+        if credentials is None:
+            return None
+        service = build("sheets", "v4", credentials=credentials)
+    except Exception as e:
+        print(f"Error initializing Google Sheets service: {e}")
+        return None
+    services[key] = service
+    return service
+
+def probe_spreadsheets(service) -> Dict[str, str]:
+    """Check the tenant's spreadsheets are shared with its service account: name -> "ok" or the error."""
+    tenant = current()
+    results = {}
+    for name, spreadsheet_id in (("daily log", tenant.daily_log_spreadsheet_id),
+                                 ("session log", tenant.session_log_spreadsheet_id)):
+        if not spreadsheet_id:
+            continue
+        try:
+            service.spreadsheets().get(spreadsheetId=spreadsheet_id, fields="spreadsheetId").execute()
+            print(f"Test access successful for {tenant.id} {name} spreadsheet")
+            results[name] = "ok"
+        except Exception as e:
+            print(f"⚠️ Cannot access {tenant.id} {name} spreadsheet: {e}")
+            print("Make sure you've shared the spreadsheet with the service account email")
+            results[name] = str(e)
+    return results
+
+def add_sheet_if_missing(service, spreadsheet_id: str, sheet_title: str):
+    """Create a sheet if it doesn't exist already."""
+    if not service or not spreadsheet_id:
+        print("Cannot add sheet: service or spreadsheet_id missing")
+        return False
+        
+    try:
+        # First check if the sheet already exists
+        try:
+            sheets_metadata = service.spreadsheets().get(
+                spreadsheetId=spreadsheet_id, fields="sheets.properties.title"
+            ).execute()
+            sheets = sheets_metadata.get('sheets', [])
+            for sheet in sheets:
+                if sheet.get('properties', {}).get('title') == sheet_title:
+                    print(f"Sheet '{sheet_title}' already exists")
+                    return True
+        except Exception as e:
+            print(f"Error checking existing sheets: {e}")
+            # Continue to creation attempt
+        
+        # Sheet doesn't exist, try to create it
+        print(f"Creating new sheet '{sheet_title}'")
+        service.spreadsheets().batchUpdate(
+            spreadsheetId=spreadsheet_id,
+            body={"requests": [{"addSheet": {"properties": {"title": sheet_title}}}]}
+        ).execute()
+        print(f"Successfully created sheet '{sheet_title}'")
+        return True
+        
+    except HttpError as e:
+        if getattr(e, "resp", None) and e.resp.status in (400, 409):
+            # 400 or 409 usually means the sheet already exists
+            print(f"Sheet '{sheet_title}' may already exist: {e.reason if hasattr(e, 'reason') else e}")
+            return True
+        else:
+            # Other HTTP errors - likely permissions or invalid spreadsheet ID
+            error_details = e.content.decode('utf-8') if hasattr(e, 'content') else str(e)
+            status_code = e.resp.status if hasattr(e, 'resp') and hasattr(e.resp, 'status') else 'unknown'
+            print(f"HTTP error {status_code} adding sheet: {error_details}")
+            
+            if status_code == 403:
+                print("PERMISSION DENIED: Make sure your service account email has Editor access to the spreadsheet")
+            
+            raise
+    except Exception as e:
+        print(f"Error adding sheet '{sheet_title}': {e}")
+        raise
+
+def ensure_header_row(service, spreadsheet_id: str, sheet_title: str, headers: List[str]):
+    """Make sure the first row of the sheet has the correct headers."""
+    if not service or not spreadsheet_id:
+        print("Cannot ensure header row: service or spreadsheet_id missing")
+        return False
+        
+    try:
+        # Try to get the current header row
+        try:
+            res = service.spreadsheets().values().get(
+                spreadsheetId=spreadsheet_id, range=f"'{sheet_title}'!1:1"
+            ).execute()
+            row = res.get("values", [[]])
+            cur = row[0] if row else []
+            
+            # Update headers if they don't match
+            if cur != headers:
+                print(f"Updating headers in '{sheet_title}': {headers}")
+                service.spreadsheets().values().update(
+                    spreadsheetId=spreadsheet_id,
+                    range=f"'{sheet_title}'!1:1",
+                    valueInputOption="RAW",
+                    body={"values": [headers]}
+                ).execute()
+                return True
+            return True
+                
+        except HttpError as e:
+            if getattr(e, "resp", None) and e.resp.status == 400:
+                # Sheet likely doesn't exist, try to create it
+                print(f"Sheet '{sheet_title}' not found, creating it")
+                sheet_created = add_sheet_if_missing(service, spreadsheet_id, sheet_title)
+                
+                if sheet_created:
+                    # Now try to add headers
+                    try:
+                        print(f"Adding headers to new sheet '{sheet_title}'")
+                        service.spreadsheets().values().update(
+                            spreadsheetId=spreadsheet_id,
+                            range=f"'{sheet_title}'!1:1",
+                            valueInputOption="RAW",
+                            body={"values": [headers]}
+                        ).execute()
+                        return True
+                    except Exception as header_error:
+                        print(f"Error adding headers to new sheet: {header_error}")
+                        raise
+            else:
+                # Other HTTP error
+                error_details = e.content.decode('utf-8') if hasattr(e, 'content') else str(e)
+                print(f"HTTP error getting/setting headers: {error_details}")
+                raise
+                
+    except Exception as e:
+        print(f"Error ensuring header row for '{sheet_title}': {e}")
+        raise
+
+def prepare_tab(service, spreadsheet_id: str, sheet_title: str, headers: List[str]):
+    """add_sheet_if_missing + ensure_header_row, once per tab per process (in the tenant's registry)."""
+    tenant = current()
+    key = (spreadsheet_id, sheet_title)
+    with tenant.ready_lock:
+        if key in tenant.ready_tabs:
+            return True
+    add_sheet_if_missing(service, spreadsheet_id, sheet_title)
+    ensure_header_row(service, spreadsheet_id, sheet_title, headers)
+    with tenant.ready_lock:
+        tenant.ready_tabs.add(key)
+    return True
+
+def forget_tab(spreadsheet_id: str, sheet_title: str) -> None:
+    """Drop a renamed or deleted tab from the tenant's registry so it is prepared again."""
+    tenant = current()
+    with tenant.ready_lock:
+        tenant.ready_tabs.discard((spreadsheet_id, sheet_title))
+
+def sanitize_sheet_title(name: str) -> str:
+    n = (name or "session").strip()
+    n = re.sub(r"[:\\\/\?\*\[\]]", "-", n)
+    return n[:99] if len(n) > 99 else n or "session"
+
+# Daily Log (idempotent by LogId user|YYYY-MM-DD)
+DAILY_HEADERS = ["DateUTC","User","Ups","Calls","FollowUps","Appointments","LogId"]
+
+# Called with the written row (list in DAILY_HEADERS order) after each successful upsert
+daily_log_listeners: List[Callable[[List[Any]], None]] = []
+
+def _notify_daily_log(row: List[Any]) -> None:
+    for listener in daily_log_listeners:
+        try:
+            listener(row)
+        except Exception as e:
+            print(f"Error in daily log listener: {e}")
+
+def daily_log_append_or_update(user: str, ups: str, calls: str, followups: str, appointments: str) -> Dict[str, Any]:
+    tenant = current()
+    spreadsheet_id = tenant.daily_log_spreadsheet_id
+    if not spreadsheet_id:
+        return {"ok": False, "error": "DAILY_LOG_SPREADSHEET_ID not set"}
+    # A LogId scan plus the update or append
+    if not tenant.sheets_quota.spend(2):
+        return {"ok": False, "error": f"Sheets budget for {tenant.name} is used up; try again in a minute"}
+    
+    try:
+        service = get_sheets_service()
+        if service is None:
+            return {"ok": False, "error": "Failed to initialize Google Sheets service"}
+            
+        sheet_title = "DailyLog"
+        
+        # Set up the sheet if needed
+        try:
+            prepare_tab(service, spreadsheet_id, sheet_title, DAILY_HEADERS)
+        except Exception as e:
+            print(f"Error setting up sheet: {e}")
+            return {"ok": False, "error": f"Error setting up sheet: {str(e)}"}
+            
+        now_utc = datetime.datetime.utcnow().isoformat()
+        log_id = f"{user}|{now_utc[:10]}".lower()
+    
+        # Get existing values
+        try:
+            existing = service.spreadsheets().values().get(
+                spreadsheetId=spreadsheet_id,
+                range=f"'{sheet_title}'!G2:G"
+            ).execute().get("values", [])
+        except HttpError as e:
+            print(f"Error getting existing values: {e}")
+            existing = []
+    
+        # Look for existing entry
+        found_row_idx = None
+        for i, row in enumerate(existing, start=2):
+            val = (row[0] if row else "").strip().lower()
+            if val == log_id:
+                found_row_idx = i
+                break
+    
+        # Prepare data row
+        row_values = [[now_utc, user, ups, calls, followups, appointments, log_id]]
+        
+        # Update or append
+        if found_row_idx:
+            try:
+                service.spreadsheets().values().update(
+                    spreadsheetId=spreadsheet_id,
+                    range=f"'{sheet_title}'!A{found_row_idx}:G{found_row_idx}",
+                    valueInputOption="RAW",
+                    body={"values": row_values}
+                ).execute()
+                _notify_daily_log(row_values[0])
+                return {"ok": True, "mode": "update", "row": found_row_idx}
+            except Exception as e:
+                print(f"Error updating row: {e}")
+                return {"ok": False, "error": f"Error updating row: {str(e)}"}
+        else:
+            try:
+                service.spreadsheets().values().append(
+                    spreadsheetId=spreadsheet_id,
+                    range=f"'{sheet_title}'!A1",
+                    valueInputOption="RAW",
+                    insertDataOption="INSERT_ROWS",
+                    body={"values": row_values}
+                ).execute()
+                _notify_daily_log(row_values[0])
+                return {"ok": True, "mode": "append"}
+            except Exception as e:
+                print(f"Error appending row: {e}")
+                return {"ok": False, "error": f"Error appending row: {str(e)}"}
+    except Exception as e:
+        print(f"Unexpected error in daily_log_append_or_update: {e}")
+        return {"ok": False, "error": f"Unexpected error: {str(e)}"}
+
+# Per-session logs (partitioned by day or week, see partitions.py)
+SESSION_HEADERS = ["TimestampUTC","UserName","SessionId","Scenario","Step","TargetPayment","OfferPayment","Band","Message"]
+
+# Called with the written row (list in SESSION_HEADERS order) after each successful append
+session_log_listeners: List[Callable[[List[Any]], None]] = []
+
+# Turn keys already written are kept per tenant (Tenant.turn_keys), at most this many
+TURN_KEYS_MAX = 4096
+
+def session_log_append(session_id: str, user_name: str,
+                       scenario: str, step: int, target_payment: Optional[int],
+                       offer_payment: Optional[int], band: str, message: str,
+                       turn_key: str = "") -> Dict[str, Any]:
+    """Append one turn to the session log (the engine writes one row per turn).
+
+    With a turn_key the write is idempotent: a key already written by this
+    process is skipped before any Sheets request or quota is spent.
+    """
+    tenant = current()
+    spreadsheet_id = tenant.session_log_spreadsheet_id
+    if not spreadsheet_id:
+        return {"ok": False, "error": "SESSION_LOG_SPREADSHEET_ID not set"}
+    if turn_key:
+        with tenant.turn_lock:
+            if turn_key in tenant.turn_keys:
+                tenant.turn_keys.move_to_end(turn_key)
+                return {"ok": True, "mode": "duplicate"}
+            # Claimed now so a concurrent retry of the same turn is skipped too
+            tenant.turn_keys[turn_key] = True
+            while len(tenant.turn_keys) > TURN_KEYS_MAX:
+                tenant.turn_keys.popitem(last=False)
+    result = _session_log_write(tenant, session_id, user_name, scenario, step,
+                                target_payment, offer_payment, band, message)
+    if turn_key and not result.get("ok"):
+        # Not written: let a retry of this turn try again
+        with tenant.turn_lock:
+            tenant.turn_keys.pop(turn_key, None)
+    return result
+
+def _session_log_write(tenant, session_id: str, user_name: str,
+                       scenario: str, step: int, target_payment: Optional[int],
+                       offer_payment: Optional[int], band: str, message: str) -> Dict[str, Any]:
+    spreadsheet_id = tenant.session_log_spreadsheet_id
+    if not tenant.sheets_quota.spend(1):
+        return {"ok": False, "error": f"Sheets budget for {tenant.name} is used up"}
+    
+    try:
+        service = get_sheets_service()
+        if service is None:
+            return {"ok": False, "error": "Failed to initialize Google Sheets service"}
+            
+        tab = session_log_tab(session_id)
+        
+        try:
+            prepare_tab(service, spreadsheet_id, tab, SESSION_HEADERS)
+        except Exception as e:
+            print(f"Error setting up sheet: {e}")
+            return {"ok": False, "error": f"Error setting up sheet: {str(e)}"}
+    
+        now_utc = datetime.datetime.utcnow().isoformat()
+        row = [[
+            now_utc, user_name, session_id, scenario, step,
+            target_payment if target_payment is not None else "",
+            offer_payment if offer_payment is not None else "",
+            band, message
+        ]]
+
+        try:
+            service.spreadsheets().values().append(
+                spreadsheetId=spreadsheet_id,
+                range=f"'{tab}'!A1",
+                valueInputOption="RAW",
+                insertDataOption="INSERT_ROWS",
+                body={"values": row}
+            ).execute()
+            for listener in session_log_listeners:
+                try:
+                    listener(row[0])
+                except Exception as e:
+                    print(f"Error in session log listener: {e}")
+            return {"ok": True, "sheet": tab}
+        except Exception as e:
+            print(f"Error appending data: {e}")
+            return {"ok": False, "error": f"Error appending data: {str(e)}"}
+            
+    except Exception as e:
+        print(f"Unexpected error in session_log_append: {e}")
+        return {"ok": False, "error": f"Unexpected error: {str(e)}"}
+
+def session_log_tab(session_id: str) -> str:
+    """Tab a session writes to: its pinned partition, or its own tab in legacy mode."""
+    if SESSION_PARTITION == "session":
+        return sanitize_sheet_title(session_id)
+    live = partition_title(datetime.datetime.utcnow())
+    spreadsheet_id = current().session_log_spreadsheet_id
+    pinned_id, tab = session_index.assign(session_id, spreadsheet_id, live)
+    if tab != live:
+        # Rotation may have archived an older partition; writing to it would
+        # recreate the tab in the live spreadsheet beside its archive
+        from .rotation import catalog
+        archived = catalog.get(pinned_id, tab)
+        if archived and archived["status"] == "archived":
+            tab = session_index.move(session_id, spreadsheet_id, live)[1]
+    return tab
+
+def session_log_rows(service, session_id: str) -> List[List[Any]]:
+    """All logged rows for one session, from each partition it was written to (or its legacy tab)."""
+    places = session_index.partitions_of(session_id) or \
+        [(current().session_log_spreadsheet_id, sanitize_sheet_title(session_id))]
+    from .rotation import catalog, read_archive
+    rows: List[List[Any]] = []
+    for spreadsheet_id, tab in places:
+        archived = catalog.get(spreadsheet_id, tab)
+        if archived and archived["status"] == "archived":
+            rows.extend(read_archive(archived["archive_path"], "SessionId", session_id))
+            continue
+        try:
+            values = service.spreadsheets().values().get(
+                spreadsheetId=spreadsheet_id, range=f"'{tab}'!A2:I"
+            ).execute().get("values", [])
+        except HttpError as e:
+            print(f"Error reading session rows from '{tab}': {e}")
+            continue
+        rows.extend(r for r in values if len(r) > 2 and r[2] == session_id)
+    return rows
+
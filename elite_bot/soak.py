@@ -0,0 +1,190 @@
+# elite_bot/soak.py
+"""Per-session memory footprint and soak test (tracemalloc).
+
+Drives many sessions through the engine the way the app does (init_session on
+every rerun, exactly-once component events) with instant stand-in backends:
+roleplays with offers and targets, full !dailylog forms, free-form questions,
+local commands, and enough turns to hit the 30-message cleanup.
+
+Three snapshots are taken:
+  baseline  after a throwaway batch has filled the process-wide bounded caches
+  loaded    after --sessions sessions reached steady state (--warmup turns each)
+  soaked    after --turns more turns per session
+
+bytes/session = (loaded - baseline) / sessions
+growth/turn   = (soaked - loaded) / (sessions * turns)
+
+The run fails (exit status 1) when growth/turn exceeds --budget bytes.
+
+    python -m elite_bot.soak
+    python -m elite_bot.soak --sessions 50 --warmup 400 --turns 400 --budget 128
+"""
+import os
+import gc
+import sys
+import time
+import argparse
+import tracemalloc
+import contextlib
+from typing import Any, Dict, List
+
+SOAK_MAX_GROWTH = float(os.getenv("AGBOT_SOAK_MAX_GROWTH", "256"))
+
+# One cycle of a rep's day; {n} keeps free-form questions distinct
+SCRIPT = (
+    "!roleplay price",
+    "we're at 450",
+    "closer to 400",
+    "continue",
+    "end",
+    "!dailylog",
+    "5",
+    "12",
+    "3",
+    "2",
+    "how do I handle a trade objection on car number {n}",
+    "!pvf",
+    "!leaderboard",
+    "!spouse",
+    "she wants to think about it",
+    "end",
+)
+
+
+class Soak:
+    def __init__(self, sessions: int):
+        import openai
+        from . import engine, sheets
+        from .replay import StandInOpenAI, StandInSheets
+
+        self.engine = engine
+        self.openai = StandInOpenAI(speedup=float("inf"))
+        self.sheets = StandInSheets(latency_ms=0)
+        openai.ChatCompletion.create = self.openai.create
+        sheets.get_sheets_service = lambda: self.sheets
+        self.count = sessions
+        self.sessions: List[Dict[str, Any]] = []
+        self.turns = 0
+
+    def new_sessions(self, count: int, prefix: str) -> List[Dict[str, Any]]:
+        out = []
+        for i in range(count):
+            session: Dict[str, Any] = {"user_name": f"Rep {prefix}{i}"}
+            self.engine.init_session(session, session_id=f"soak-{prefix}{i}")
+            session["_cursor"] = 0
+            out.append(session)
+        return out
+
+    def turn(self, session: Dict[str, Any]) -> None:
+        # A Streamlit rerun: session defaults and the 30-message cleanup, then one event
+        self.engine.init_session(session)
+        cursor = session["_cursor"]
+        session["_cursor"] = cursor + 1
+        text = SCRIPT[cursor % len(SCRIPT)].format(n=self.turns)
+        event = {"action": "send_message", "message": text, "event_id": f"{session['session_id']}-{cursor}"}
+        ledger = session["event_ledger"]
+        ledger.begin(event)
+        self.openai.start_turn([])
+        reply = self.engine.respond_to(session, text)
+        ledger.finish(event, reply)
+        self.turns += 1
+
+    def run(self, sessions: List[Dict[str, Any]], turns: int) -> None:
+        for _ in range(turns):
+            for session in sessions:
+                self.turn(session)
+
+
+def _traced(snapshot: tracemalloc.Snapshot) -> int:
+    return sum(stat.size for stat in snapshot.statistics("filename"))
+
+
+def _snapshot() -> tracemalloc.Snapshot:
+    gc.collect()
+    from . import replay
+    # The stand-in spreadsheet keeps every row it is sent; that is not the app's memory
+    return tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, replay.__file__),
+        tracemalloc.Filter(False, tracemalloc.__file__),
+    ])
+
+
+def soak(sessions: int = 20, warmup: int = 300, turns: int = 200, budget: float = SOAK_MAX_GROWTH,
+         top: int = 8) -> Dict[str, Any]:
+    """Run the soak and return its measurements; result["ok"] is False when over budget."""
+    from .answer_cache import cache_for
+    harness = Soak(sessions)
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        # Traced from the start, so entries evicted from bounded caches count as freed
+        tracemalloc.start()
+        # Fill the process-wide bounded caches first: they grow to their cap, not per turn
+        throwaway = harness.new_sessions(sessions, "w")
+        harness.run(throwaway, warmup)
+        del throwaway
+        answer_cache = cache_for()  # the soak's sessions all use the default tenant
+        for i in range(answer_cache.capacity):
+            answer_cache.store(f"warm-up question {i} for the soak", "warm-up answer")
+        baseline = _snapshot()
+
+        harness.sessions = harness.new_sessions(sessions, "s")
+        harness.run(harness.sessions, warmup)
+        loaded = _snapshot()
+
+        harness.run(harness.sessions, turns)
+        soaked = _snapshot()
+    tracemalloc.stop()
+
+    per_session = (_traced(loaded) - _traced(baseline)) / sessions
+    growth = (_traced(soaked) - _traced(loaded)) / (sessions * turns)
+    sites = [
+        (str(stat.traceback[0]), stat.size_diff, stat.count_diff)
+        for stat in soaked.compare_to(loaded, "lineno")[:top] if stat.size_diff > 0
+    ]
+    lengths = [len(s["messages"]) for s in harness.sessions]
+    return {
+        "ok": growth <= budget,
+        "sessions": sessions,
+        "turns": harness.turns,
+        "seconds": round(time.perf_counter() - started, 1),
+        "bytes_per_session": round(per_session),
+        "growth_per_turn": round(growth, 1),
+        "budget": budget,
+        "max_messages": max(lengths, default=0),
+        "openai_calls": harness.openai.calls,
+        "top_growth": sites,
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Per-session memory footprint and soak test")
+    parser.add_argument("--sessions", type=int, default=20)
+    # Past the per-session caps: 30 messages, 256 remembered event ids
+    parser.add_argument("--warmup", type=int, default=300, help="turns per session before measuring")
+    parser.add_argument("--turns", type=int, default=200, help="measured turns per session")
+    parser.add_argument("--budget", type=float, default=SOAK_MAX_GROWTH, help="max growth in bytes per turn")
+    args = parser.parse_args(argv)
+
+    result = soak(args.sessions, args.warmup, args.turns, args.budget)
+    print(f"{result['turns']} turns over {result['sessions']} sessions in {result['seconds']}s "
+          f"({result['openai_calls']} stand-in completions, history capped at {result['max_messages']} messages)")
+    print(f"  bytes per session  {result['bytes_per_session']:>10,}")
+    print(f"  growth per turn    {result['growth_per_turn']:>10,} (budget {result['budget']:,.0f})")
+    if result["top_growth"]:
+        print("  largest growth while soaking:")
+        for site, size, count in result["top_growth"]:
+            print(f"    {size:>+10,} B {count:>+7,} blocks  {site}")
+    if not result["ok"]:
+        print("FAIL: memory grows per turn beyond the budget")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    # Soaks never touch real spreadsheets or the shared data dir, and are not rate limited
+    import tempfile
+    os.environ.setdefault("AGBOT_DATA_DIR", tempfile.mkdtemp(prefix="agbot-soak-"))
+    os.environ.setdefault("DAILY_LOG_SPREADSHEET_ID", "soak-daily")
+    os.environ.setdefault("SESSION_LOG_SPREADSHEET_ID", "soak-sessions")
+    os.environ.setdefault("AGBOT_OPENAI_RPM", "0")
+    main()
@@ -0,0 +1,184 @@
+# elite_bot/static_server.py
+"""Threaded static file server for the React build, with HTTP caching.
+
+- Hashed bundles (static/js/main.5db7e1bf.js, static/css/main.5251ccb1.css)
+  are served with `Cache-Control: immutable` for a year; everything else
+  (index.html, manifest.json) is revalidated on every load.
+- Every response carries a strong ETag, and If-None-Match answers 304.
+- Text assets are compressed once per file version and kept in memory. The
+  server prefers brotli (when the optional `brotli` package is installed),
+  then gzip. A prebuilt `<file>.br` / `<file>.gz` next to an asset is used as is.
+
+    server, url = start_static_server(build_dir, port=8000)
+"""
+import os
+import re
+import gzip
+import hashlib
+import threading
+from http import HTTPStatus
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+STATIC_HOST = os.getenv("AGBOT_STATIC_HOST", "0.0.0.0")
+STATIC_PORT = int(os.getenv("AGBOT_STATIC_PORT", "8000"))
+# URL the browser uses for the iframe (differs from the bind address behind a proxy)
+STATIC_PUBLIC_URL = os.getenv("AGBOT_STATIC_PUBLIC_URL", "")
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+# CRA output names: main.5db7e1bf.js, 453.28b203fe.chunk.js, main.5251ccb1.css
+HASHED_ASSET_RE = re.compile(r"^static/(js|css|media)/.+\.[0-9a-f]{8}(\.chunk)?\.\w+$")
+COMPRESSIBLE = {".js", ".css", ".html", ".json", ".map", ".svg", ".txt", ".ico"}
+MIN_COMPRESS_BYTES = 1024
+
+
+class _Asset:
+    """One file version: raw bytes, ETag and lazily built encodings."""
+
+    def __init__(self, path: str, stamp: Tuple[float, int]):
+        self.path = path
+        self.stamp = stamp
+        with open(path, "rb") as f:
+            self.body = f.read()
+        self.etag = hashlib.sha1(self.body).hexdigest()[:20]
+        self._encoded: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def encoded(self, encoding: str) -> Optional[bytes]:
+        with self._lock:
+            if encoding not in self._encoded:
+                self._encoded[encoding] = self._encode(encoding)
+            return self._encoded[encoding]
+
+    def _encode(self, encoding: str) -> Optional[bytes]:
+        suffix = ".br" if encoding == "br" else ".gz"
+        prebuilt = self.path + suffix
+        if os.path.exists(prebuilt) and os.path.getmtime(prebuilt) >= self.stamp[0]:
+            with open(prebuilt, "rb") as f:
+                return f.read()
+        if encoding == "br":
+            return brotli.compress(self.body, quality=11) if brotli else None
+        return gzip.compress(self.body, compresslevel=9, mtime=0)
+
+
+class AssetCache:
+    def __init__(self):
+        self._assets: Dict[str, _Asset] = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> _Asset:
+        st = os.stat(path)
+        stamp = (st.st_mtime, st.st_size)
+        with self._lock:
+            asset = self._assets.get(path)
+        if asset is None or asset.stamp != stamp:
+            asset = _Asset(path, stamp)
+            with self._lock:
+                self._assets[path] = asset
+        return asset
+
+
+class StaticHandler(SimpleHTTPRequestHandler):
+    """SimpleHTTPRequestHandler with ETag/304, Cache-Control and precompressed bodies."""
+
+    cache: AssetCache = None  # set per server by start_static_server
+
+    def do_GET(self):
+        self._serve(head=False)
+
+    def do_HEAD(self):
+        self._serve(head=True)
+
+    def _serve(self, head: bool) -> None:
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            path = os.path.join(path, "index.html")
+        if not os.path.isfile(path):
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return
+        try:
+            asset = self.cache.get(path)
+        except OSError:
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return
+
+        rel = os.path.relpath(path, self.directory).replace(os.sep, "/")
+        encoding, body = self._pick_encoding(asset, os.path.splitext(path)[1].lower())
+        etag = f'"{asset.etag}-{encoding}"' if encoding else f'"{asset.etag}"'
+
+        if etag in self._if_none_match():
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self._common_headers(rel, etag)
+            self.end_headers()
+            return
+
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", self.guess_type(path))
+        self.send_header("Content-Length", str(len(body)))
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        self._common_headers(rel, etag)
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+    def _common_headers(self, rel: str, etag: str) -> None:
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", IMMUTABLE if HASHED_ASSET_RE.match(rel) else REVALIDATE)
+        self.send_header("Vary", "Accept-Encoding")
+
+    def _if_none_match(self):
+        header = self.headers.get("If-None-Match", "")
+        return {tag.strip().removeprefix("W/") for tag in header.split(",") if tag.strip()}
+
+    def _pick_encoding(self, asset: _Asset, ext: str) -> Tuple[str, bytes]:
+        if ext not in COMPRESSIBLE or len(asset.body) < MIN_COMPRESS_BYTES:
+            return "", asset.body
+        accepted = {e.split(";")[0].strip() for e in self.headers.get("Accept-Encoding", "").split(",")}
+        for encoding in ("br", "gzip"):
+            if encoding in accepted:
+                body = asset.encoded(encoding)
+                if body is not None:
+                    return encoding, body
+        return "", asset.body
+
+    def log_message(self, format, *args):
+        pass  # one line per asset request would drown the app's own logs
+
+
+# One server per (directory, port) for the life of the process
+_servers: Dict[Tuple[str, int], ThreadingHTTPServer] = {}
+_servers_lock = threading.Lock()
+
+
+def start_static_server(directory: str, host: str = STATIC_HOST,
+                        port: int = STATIC_PORT) -> Tuple[Optional[ThreadingHTTPServer], str]:
+    """Start (once) a daemon-thread server for directory. Returns (server, browser URL)."""
+    directory = os.path.abspath(directory)
+    url = STATIC_PUBLIC_URL or f"http://localhost:{port}"
+    with _servers_lock:
+        server = _servers.get((directory, port))
+        if server is not None:
+            return server, url
+        handler = type("BuildHandler", (StaticHandler,), {"cache": AssetCache()})
+
+        def make_handler(*args, **kwargs):
+            return handler(*args, directory=directory, **kwargs)
+
+        try:
+            server = ThreadingHTTPServer((host, port), make_handler)
+        except OSError as e:
+            # Usually another app process already serves the build on this port
+            print(f"Static server not started on {host}:{port}: {e}")
+            return None, url
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name=f"static-{port}", daemon=True).start()
+        _servers[(directory, port)] = server
+        print(f"Serving {directory} at {url}")
+        return server, url
@@ -0,0 +1,229 @@
+# elite_bot/tenants.py
+"""Dealership tenants: one process serves many rooftops.
+
+Each tenant has its own DailyLog and session-log spreadsheets, optionally its
+own service account, and its own per-process state: created-tab registry,
+session-log turn keys already written, leaderboard and manager rollups,
+local mirror directory, and quota budgets for Sheets requests and OpenAI
+completions.
+Sheets clients are pooled per service account, so tenants on the shared
+account share one client per thread.
+
+AGBOT_TENANTS holds a JSON object, inline or as a path to a JSON file.
+Streamlit secrets may hold the same under [tenants.<id>]:
+
+    {"north": {"name": "North Honda",
+               "daily_log_spreadsheet_id": "1AbC...",
+               "session_log_spreadsheet_id": "1DeF...",
+               "service_account_json": "/secrets/north.json",
+               "sheets_requests_per_minute": 30,
+               "openai_requests_per_minute": 60}}
+
+service_account_json is optional (a path or inline JSON; the shared account
+otherwise). Budgets of 0 mean no per-tenant limit; AGBOT_TENANT_SHEETS_RPM and
+AGBOT_TENANT_OPENAI_RPM set the defaults. The "default" tenant always exists
+and keeps DAILY_LOG_SPREADSHEET_ID / SESSION_LOG_SPREADSHEET_ID and the data
+directory as they were, so a single-store deploy needs no changes. Other
+tenants keep local files under data/tenants/<id>/.
+
+Entry points pick the tenant ("tenant" in an API body, ?tenant= in the app
+URL, AGBOT_DEFAULT_TENANT otherwise) and run the turn inside use(tenant);
+code below them reads it with current().
+"""
+import os
+import re
+import json
+import time
+import threading
+import contextlib
+import contextvars
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional
+
+from .config import DATA_DIR, DAILY_LOG_SPREADSHEET_ID, SESSION_LOG_SPREADSHEET_ID, _secret
+from .scheduler import TokenBucket
+
+DEFAULT_TENANT = "default"
+TENANT_SHEETS_RPM = float(os.getenv("AGBOT_TENANT_SHEETS_RPM", "0"))
+TENANT_OPENAI_RPM = float(os.getenv("AGBOT_TENANT_OPENAI_RPM", "0"))
+# How long a turn waits for its tenant's budget before giving up
+TENANT_QUOTA_WAIT = float(os.getenv("AGBOT_TENANT_QUOTA_WAIT", "10"))
+_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class UnknownTenant(KeyError):
+    """Raised for a tenant id that is not configured."""
+
+
+class QuotaExceeded(Exception):
+    """Raised when a tenant's budget stays empty for longer than the allowed wait."""
+
+
+# =========================
+# Quota budget (requests per minute)
+# =========================
+class Quota:
+    """A tenant's requests-per-minute budget; callers wait up to max_wait for it."""
+
+    def __init__(self, per_minute: float):
+        self.per_minute = max(0.0, per_minute)
+        # Ten seconds' worth of burst
+        self.bucket = TokenBucket(self.per_minute, max(2.0, self.per_minute / 6))
+        self._lock = threading.Lock()
+        self.spent = 0.0
+        self.denied = 0
+
+    def spend(self, n: float = 1.0, max_wait: float = TENANT_QUOTA_WAIT) -> bool:
+        """Take n requests from the budget, waiting if needed. False when over budget past max_wait."""
+        deadline = time.monotonic() + max_wait
+        while True:
+            with self._lock:
+                wait = self.bucket.try_take(n)
+                if wait == 0:
+                    self.spent += n
+                    return True
+            if time.monotonic() + wait > deadline:
+                with self._lock:
+                    self.denied += 1
+                return False
+            time.sleep(wait)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"per_minute": self.per_minute, "spent": self.spent, "denied": self.denied}
+
+
+# =========================
+# Tenant
+# =========================
+class Tenant:
+    def __init__(self, tenant_id: str, name: str = "", daily_log_spreadsheet_id: str = "",
+                 session_log_spreadsheet_id: str = "", service_account_json: str = "",
+                 sheets_requests_per_minute: float = TENANT_SHEETS_RPM,
+                 openai_requests_per_minute: float = TENANT_OPENAI_RPM, data_dir: str = ""):
+        self.id = tenant_id
+        self.name = name or tenant_id
+        self.daily_log_spreadsheet_id = daily_log_spreadsheet_id
+        self.session_log_spreadsheet_id = session_log_spreadsheet_id
+        # "" uses the process-wide service account (see sheets.get_credentials)
+        self.service_account_json = service_account_json
+        self.data_dir = data_dir or os.path.join(DATA_DIR, "tenants", tenant_id)
+        self.sheets_quota = Quota(float(sheets_requests_per_minute or 0))
+        self.openai_quota = Quota(float(openai_requests_per_minute or 0))
+        # Tabs already created and given headers by this process: (spreadsheet_id, title)
+        self.ready_tabs = set()
+        self.ready_lock = threading.Lock()
+        # Session-log turn keys already written (see sheets.session_log_append), oldest first
+        self.turn_keys: "OrderedDict[str, bool]" = OrderedDict()
+        self.turn_lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"Tenant({self.id!r})"
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "daily_log": bool(self.daily_log_spreadsheet_id),
+            "session_log": bool(self.session_log_spreadsheet_id),
+            "own_service_account": bool(self.service_account_json),
+            "ready_tabs": len(self.ready_tabs),
+            "turn_keys": len(self.turn_keys),
+            "sheets_quota": self.sheets_quota.stats(),
+            "openai_quota": self.openai_quota.stats(),
+        }
+
+
+def _load_configs() -> Dict[str, Dict[str, Any]]:
+    """Tenant settings from AGBOT_TENANTS (inline JSON or a file path) or Streamlit secrets."""
+    raw = os.getenv("AGBOT_TENANTS", "").strip()
+    try:
+        if raw and not raw.startswith("{"):
+            with open(raw, "r") as f:
+                raw = f.read()
+        if raw:
+            return json.loads(raw)
+        secret = _secret("tenants")
+        return {k: dict(v) for k, v in dict(secret).items()} if secret else {}
+    except Exception as e:
+        print(f"Warning: Could not load tenants from AGBOT_TENANTS or secrets: {e}")
+        return {}
+
+
+# =========================
+# Registry
+# =========================
+class TenantRegistry:
+    """Configured tenants by id; the "default" tenant is always present."""
+
+    def __init__(self, configs: Dict[str, Dict[str, Any]],
+                 default_id: str = os.getenv("AGBOT_DEFAULT_TENANT", DEFAULT_TENANT)):
+        default = {"daily_log_spreadsheet_id": DAILY_LOG_SPREADSHEET_ID,
+                   "session_log_spreadsheet_id": SESSION_LOG_SPREADSHEET_ID, "data_dir": DATA_DIR}
+        default.update(configs.get(DEFAULT_TENANT) or {})
+        self._tenants: Dict[str, Tenant] = {DEFAULT_TENANT: self._build(DEFAULT_TENANT, default)}
+        for tenant_id, settings in configs.items():
+            if tenant_id == DEFAULT_TENANT:
+                continue
+            if not _ID_RE.match(str(tenant_id)):
+                print(f"Warning: Skipping tenant {tenant_id!r}: ids are letters, digits, '-' and '_'")
+                continue
+            tenant = self._build(tenant_id, settings or {})
+            if tenant is not None:
+                self._tenants[tenant_id] = tenant
+        if default_id not in self._tenants:
+            print(f"Warning: AGBOT_DEFAULT_TENANT {default_id!r} is not configured; using {DEFAULT_TENANT!r}")
+            default_id = DEFAULT_TENANT
+        self.default = self._tenants[default_id]
+
+    @staticmethod
+    def _build(tenant_id: str, settings: Dict[str, Any]) -> Optional[Tenant]:
+        try:
+            return Tenant(tenant_id, **settings)
+        except (TypeError, ValueError) as e:
+            print(f"Warning: Skipping tenant {tenant_id!r}: {e}")
+            return None
+
+    def __iter__(self) -> Iterator[Tenant]:
+        return iter(list(self._tenants.values()))
+
+    def __len__(self) -> int:
+        return len(self._tenants)
+
+    def known(self, tenant_id: Optional[str]) -> bool:
+        return not tenant_id or tenant_id in self._tenants
+
+    def resolve(self, tenant_id: Optional[str] = None) -> Tenant:
+        """The tenant with this id, or the default one when none is given."""
+        if not tenant_id:
+            return self.default
+        tenant = self._tenants.get(tenant_id)
+        if tenant is None:
+            raise UnknownTenant(tenant_id)
+        return tenant
+
+    def ids(self) -> List[str]:
+        return list(self._tenants)
+
+    def stats(self) -> Dict[str, Any]:
+        return {t.id: t.stats() for t in self}
+
+
+# Shared by every session in this process
+tenants = TenantRegistry(_load_configs())
+
+# Tenant of the turn running in this thread (or task)
+_current: "contextvars.ContextVar[Optional[Tenant]]" = contextvars.ContextVar("tenant", default=None)
+
+
+def current() -> Tenant:
+    return _current.get() or tenants.default
+
+
+@contextlib.contextmanager
+def use(tenant):
+    """Run the block as this tenant (a Tenant, an id, or None for the default)."""
+    token = _current.set(tenant if isinstance(tenant, Tenant) else tenants.resolve(tenant))
+    try:
+        yield current()
+    finally:
+        _current.reset(token)
@@ -0,0 +1,241 @@
+# elite_bot/usage.py
+"""OpenAI token and cost ledger.
+
+Every completion is recorded with its prompt/completion tokens, upstream
+latency and queue wait, tagged by tenant (dealership), session, rep, scenario
+and command. Rows are aggregated in memory per hour and flushed to a local
+SQLite file by a background thread every USAGE_FLUSH_SECONDS (and at exit),
+never on the turn's thread.
+
+Report:
+    python -m elite_bot.usage --by command --top 10
+    python -m elite_bot.usage --by user_name --since 2026-10-01
+    python -m elite_bot.usage --by tenant --since 2026-10-01
+    python -m elite_bot.usage --by command --tenant north
+"""
+import os
+import atexit
+import sqlite3
+import argparse
+import datetime
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from .config import DATA_DIR, OPENAI_PRICES, USAGE_FLUSH_SECONDS
+
+USAGE_DB_PATH = os.path.join(DATA_DIR, "usage.sqlite")
+TAG_FIELDS = ("tenant", "session_id", "user_name", "scenario", "command")
+GROUP_FIELDS = ("hour",) + TAG_FIELDS + ("model",)
+SUM_FIELDS = ("calls", "errors", "prompt_tokens", "completion_tokens", "cost_usd", "latency_ms", "queue_ms")
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS usage (
+    hour TEXT, tenant TEXT, session_id TEXT, user_name TEXT, scenario TEXT, command TEXT, model TEXT,
+    calls INTEGER, errors INTEGER, prompt_tokens INTEGER, completion_tokens INTEGER,
+    cost_usd REAL, latency_ms REAL, queue_ms REAL, max_latency_ms REAL,
+    PRIMARY KEY ({", ".join(GROUP_FIELDS)})
+)
+"""
+
+
+def _migrate(conn: sqlite3.Connection) -> None:
+    """Bring a ledger written before the tenant column up to SCHEMA; its rows go to "default".
+
+    Run once per process by the first flush, the only writer; report() never migrates.
+    """
+    columns = [r[1] for r in conn.execute("PRAGMA table_info(usage)")]
+    if not columns or "tenant" in columns:
+        conn.execute(SCHEMA)
+        return
+    # The tenant joins the primary key, which SQLite cannot alter in place
+    conn.execute("ALTER TABLE usage RENAME TO usage_before_tenant")
+    conn.execute(SCHEMA)
+    kept = ", ".join(columns)
+    conn.execute(f"INSERT INTO usage (tenant, {kept}) SELECT 'default', {kept} FROM usage_before_tenant")
+    conn.execute("DROP TABLE usage_before_tenant")
+
+
+def command_of(text: str) -> str:
+    """Tag a turn by its command (!pvf, !roleplay) or 'chat' for free-form text."""
+    t = (text or "").strip().lower()
+    return t.split()[0] if t.startswith("!") else "chat"
+
+
+def cost_of(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    prompt_price, completion_price = OPENAI_PRICES.get(model, (0.0, 0.0))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+
+class UsageLedger:
+    def __init__(self, db_path: str = USAGE_DB_PATH, flush_seconds: float = USAGE_FLUSH_SECONDS):
+        self.db_path = db_path
+        self.flush_seconds = flush_seconds
+        self._lock = threading.Lock()
+        self._rows: Dict[Tuple, Dict[str, float]] = {}
+        self._migrated = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "UsageLedger":
+        """Start the background flusher; later calls do nothing."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="usage-flush", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop the flusher and write what is pending (registered with atexit)."""
+        self._stop.set()
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop.wait(max(self.flush_seconds, 1.0)):
+            self.flush()
+
+    def record(self, model: str, usage: Optional[Dict[str, Any]], latency_ms: float,
+               queue_ms: float = 0.0, tags: Optional[Dict[str, Any]] = None, error: bool = False) -> None:
+        tags = tags or {}
+        usage = usage or {}
+        prompt_tokens = int(usage.get("prompt_tokens") or 0)
+        completion_tokens = int(usage.get("completion_tokens") or 0)
+        hour = datetime.datetime.utcnow().strftime("%Y-%m-%dT%H:00")
+        key = (hour,) + tuple(str(tags.get(f) or "") for f in TAG_FIELDS) + (model,)
+        self.start()
+        with self._lock:
+            row = self._rows.get(key)
+            if row is None:
+                row = self._rows[key] = dict.fromkeys(SUM_FIELDS + ("max_latency_ms",), 0)
+            row["calls"] += 1
+            row["errors"] += 1 if error else 0
+            row["prompt_tokens"] += prompt_tokens
+            row["completion_tokens"] += completion_tokens
+            row["cost_usd"] += cost_of(model, prompt_tokens, completion_tokens)
+            row["latency_ms"] += latency_ms
+            row["queue_ms"] += queue_ms
+            row["max_latency_ms"] = max(row["max_latency_ms"], latency_ms)
+
+    def flush(self) -> int:
+        """Write pending aggregates to SQLite. Returns the number of rows flushed."""
+        with self._lock:
+            rows, self._rows = self._rows, {}
+        if not rows:
+            return 0
+        updates = ", ".join(f"{f} = {f} + excluded.{f}" for f in SUM_FIELDS)
+        sql = (
+            f"INSERT INTO usage ({', '.join(GROUP_FIELDS + SUM_FIELDS)}, max_latency_ms) "
+            f"VALUES ({', '.join('?' * (len(GROUP_FIELDS) + len(SUM_FIELDS) + 1))}) "
+            f"ON CONFLICT ({', '.join(GROUP_FIELDS)}) DO UPDATE SET {updates}, "
+            f"max_latency_ms = MAX(max_latency_ms, excluded.max_latency_ms)"
+        )
+        try:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            with sqlite3.connect(self.db_path) as conn:
+                if not self._migrated:
+                    _migrate(conn)
+                    self._migrated = True
+                conn.executemany(sql, [
+                    key + tuple(row[f] for f in SUM_FIELDS) + (row["max_latency_ms"],)
+                    for key, row in rows.items()
+                ])
+            return len(rows)
+        except Exception as e:
+            print(f"Error flushing usage ledger: {e}")
+            # Keep the aggregates for the next flush
+            with self._lock:
+                for key, row in rows.items():
+                    cur = self._rows.setdefault(key, dict.fromkeys(row, 0))
+                    for f in SUM_FIELDS:
+                        cur[f] += row[f]
+                    cur["max_latency_ms"] = max(cur["max_latency_ms"], row["max_latency_ms"])
+            return 0
+
+
+# Shared by every session in this process
+ledger = UsageLedger()
+atexit.register(ledger.stop)
+
+
+class ToolCallStats:
+    """Tool offers and calls per first completion of a turn.
+
+    A call is spurious when the model calls a tool outside its mode (the
+    daily-log tool outside a !dailylog flow, the session tool outside a
+    roleplay); each one costs a second completion.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = dict.fromkeys(("completions", "tools_offered", "tool_calls", "spurious"), 0)
+
+    def record(self, offered: int, called: Optional[str], expected: bool) -> None:
+        with self._lock:
+            self.counters["completions"] += 1
+            self.counters["tools_offered"] += offered
+            if called:
+                self.counters["tool_calls"] += 1
+                self.counters["spurious"] += 0 if expected else 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out = dict(self.counters)
+        n = out["completions"] or 1
+        out["spurious_rate"] = round(out["spurious"] / n, 4)
+        out["tools_per_completion"] = round(out["tools_offered"] / n, 2)
+        return out
+
+
+tool_stats = ToolCallStats()
+
+
+# =========================
+# Report
+# =========================
+def report(by: str = "command", top: int = 10, since: Optional[str] = None, db_path: str = USAGE_DB_PATH,
+           tenant: Optional[str] = None):
+    if by not in TAG_FIELDS + ("model",):
+        raise ValueError(f"Cannot group by {by!r}; choose one of {TAG_FIELDS + ('model',)}")
+    if not os.path.exists(db_path):
+        return []
+    clauses, params = [], []
+    if since:
+        clauses.append("hour >= ?")
+        params.append(since)
+    if tenant:
+        clauses.append("tenant = ?")
+        params.append(tenant)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    with sqlite3.connect(db_path) as conn:
+        # Read-only: a ledger not yet migrated by the app (no tenant column) reads as "default"
+        columns = [r[1] for r in conn.execute("PRAGMA table_info(usage)")]
+        if not columns:
+            return []
+        source = "usage" if "tenant" in columns else "(SELECT 'default' AS tenant, * FROM usage)"
+        return conn.execute(
+            f"SELECT {by}, SUM(calls), SUM(errors), SUM(prompt_tokens), SUM(completion_tokens), "
+            f"SUM(cost_usd), SUM(latency_ms) / SUM(calls), MAX(max_latency_ms) "
+            f"FROM {source} {where} GROUP BY {by} ORDER BY SUM(cost_usd) DESC, SUM(latency_ms) DESC LIMIT ?",
+            params + [top],
+        ).fetchall()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Top OpenAI spend by command, rep, scenario, session or tenant")
+    parser.add_argument("--by", default="command", help="command | user_name | scenario | session_id | tenant | model")
+    parser.add_argument("--tenant", help="only this tenant's usage")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--since", help="UTC date or hour, e.g. 2026-10-01")
+    parser.add_argument("--db", default=USAGE_DB_PATH)
+    args = parser.parse_args(argv)
+
+    rows = report(args.by, args.top, args.since, args.db, args.tenant)
+    if not rows:
+        print(f"No usage recorded in {args.db}")
+        return
+    print(f"{args.by:<24} {'calls':>6} {'errors':>6} {'prompt':>9} {'compl':>8} {'cost $':>9} {'avg ms':>8} {'max ms':>8}")
+    for name, calls, errors, prompt, completion, cost, avg_ms, max_ms in rows:
+        print(f"{(name or '-')[:24]:<24} {calls:>6} {errors:>6} {prompt:>9} {completion:>8} {cost:>9.4f} {avg_ms:>8.0f} {max_ms:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+# elite_bot/warmup.py
+"""Start-up warm-up, so the first rep after a deploy does not pay the cold costs.
+
+warmup.start() runs these steps once per process on a background thread (the
+Streamlit app and the API server both call it at start-up):
+
+    credentials   load each service account and fetch its access token
+    sheets        build the Sheets API client from the discovery document
+    spreadsheets  probe every tenant's spreadsheets, create today's DailyLog and session tabs
+    openai        open a pooled TLS connection to the OpenAI API (GET /v1/models, no tokens)
+    components    process-wide engine state: session index, per-tenant rollups, prompt cache
+
+warmup.ready turns True once every step has run, failed or not; the API's
+GET /ready answers 200 from then on and 503 before. warmup.stats() has the
+per-step timings and errors (also in GET /health). AGBOT_WARMUP=0 skips the
+warm-up and reports ready at once.
+
+Measure first-turn latency cold and warm, each in a fresh process against the
+configured backends (each run logs one roleplay turn for "Warm-up Probe"):
+
+    python -m elite_bot.warmup              # run the warm-up and print step timings
+    python -m elite_bot.warmup --compare    # first-turn latency without and with warm-up
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import datetime
+import threading
+import subprocess
+from typing import Any, Callable, Dict, List, Optional
+
+from .tenants import current, tenants, use
+
+WARMUP_ENABLED = os.getenv("AGBOT_WARMUP", "1") != "0"
+OPENAI_WARMUP_TIMEOUT = float(os.getenv("AGBOT_WARMUP_OPENAI_TIMEOUT", "10"))
+PROBE_USER = "Warm-up Probe"
+
+
+# =========================
+# Steps
+# =========================
+def _each_tenant(warm: Callable[[], str]) -> str:
+    """Run one step for every tenant; "ok" or "<tenant>: <status>" for the ones that differ."""
+    statuses, errors = [], []
+    for tenant in tenants:
+        with use(tenant):
+            try:
+                status = warm()
+            except Exception as e:
+                errors.append(f"{tenant.id}: {e.__class__.__name__}: {e}")
+                continue
+        if status != "ok":
+            statuses.append(f"{tenant.id}: {status}")
+    if errors:
+        raise RuntimeError("; ".join(errors))
+    return "; ".join(statuses) or "ok"
+
+
+def warm_credentials() -> str:
+    import google.auth.transport.requests
+    from .sheets import get_credentials
+    credentials = get_credentials()
+    if credentials is None:
+        return "skipped: no Google credentials"
+    if not credentials.valid:
+        credentials.refresh(google.auth.transport.requests.Request())
+    return "ok"
+
+
+def warm_sheets() -> str:
+    from .sheets import get_sheets_service
+    return "ok" if get_sheets_service() is not None else "skipped: no Sheets service"
+
+
+def warm_spreadsheets() -> str:
+    from .sheets import get_sheets_service, probe_spreadsheets, prepare_tab, DAILY_HEADERS, SESSION_HEADERS
+    from .partitions import SESSION_PARTITION, partition_title
+    tenant = current()
+    if not (tenant.daily_log_spreadsheet_id or tenant.session_log_spreadsheet_id):
+        return "skipped: no spreadsheets"
+    service = get_sheets_service()
+    if service is None:
+        return "skipped: no Sheets service"
+    failed = {name: error for name, error in probe_spreadsheets(service).items() if error != "ok"}
+    if failed:
+        raise RuntimeError("; ".join(f"{name}: {error}" for name, error in failed.items()))
+    if tenant.daily_log_spreadsheet_id:
+        prepare_tab(service, tenant.daily_log_spreadsheet_id, "DailyLog", DAILY_HEADERS)
+    if tenant.session_log_spreadsheet_id and SESSION_PARTITION != "session":
+        prepare_tab(service, tenant.session_log_spreadsheet_id, partition_title(datetime.datetime.utcnow()),
+                    SESSION_HEADERS)
+    return "ok"
+
+
+def warm_openai() -> str:
+    import openai
+    if not openai.api_key:
+        return "skipped: OPENAI_API_KEY not set"
+    # Authenticated but free; leaves a live connection in the shared pool (see config.py)
+    openai.Model.list(request_timeout=OPENAI_WARMUP_TIMEOUT)
+    return "ok"
+
+
+def warm_components() -> str:
+    from .engine import infer_scenario_from_text
+    from .partitions import session_index
+    from .prompt import prompt_for
+    from .rollups import aggregates_for
+    session_index._connect().close()
+    for tenant in tenants:
+        aggregates_for(tenant).refresh_from_mirror()
+    for text in ("!roleplay price", "!roleplay payment", "!roleplay trade", "!spouse", "!dailylog", "hello"):
+        prompt_for(text, infer_scenario_from_text(text) or "")
+    return "ok"
+
+
+STEPS = (
+    ("credentials", lambda: _each_tenant(warm_credentials)),
+    ("sheets", lambda: _each_tenant(warm_sheets)),
+    ("spreadsheets", lambda: _each_tenant(warm_spreadsheets)),
+    ("openai", warm_openai),
+    ("components", warm_components),
+)
+
+
+# =========================
+# Warm-up
+# =========================
+class Warmup:
+    def __init__(self, steps=STEPS, enabled: bool = WARMUP_ENABLED):
+        self.steps = steps
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.started_at: Optional[float] = None
+        self.seconds: Optional[float] = None
+        self.results: Dict[str, Dict[str, Any]] = {}
+        if not enabled:
+            self._done.set()
+
+    @property
+    def ready(self) -> bool:
+        return self._done.is_set()
+
+    def start(self) -> "Warmup":
+        """Start the warm-up thread; later calls (every Streamlit rerun) do nothing."""
+        with self._lock:
+            if self._thread is not None or not self.enabled:
+                return self
+            self.started_at = time.time()
+            self._thread = threading.Thread(target=self.run, name="warmup", daemon=True)
+            self._thread.start()
+        return self
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def run(self) -> None:
+        started = time.perf_counter()
+        for name, step in self.steps:
+            step_started = time.perf_counter()
+            try:
+                result = {"ok": True, "status": step()}
+            except Exception as e:
+                result = {"ok": False, "error": f"{e.__class__.__name__}: {e}"}
+            result["ms"] = round((time.perf_counter() - step_started) * 1000, 1)
+            with self._lock:
+                self.results[name] = result
+        self.seconds = round(time.perf_counter() - started, 3)
+        self._done.set()
+        failed = [name for name, r in self.results.items() if not r["ok"]]
+        print(f"[warmup] ready in {self.seconds * 1000:.0f} ms" + (f" (failed: {', '.join(failed)})" if failed else ""))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"ready": self.ready, "enabled": self.enabled, "seconds": self.seconds,
+                    "ok": all(r["ok"] for r in self.results.values()), "steps": dict(self.results)}
+
+
+# Shared by every session in this process
+warmup = Warmup()
+
+
+# =========================
+# First-turn latency
+# =========================
+def first_turn(warm: bool, message: str) -> Dict[str, Any]:
+    """Time the first respond_to of a fresh process, optionally after the warm-up."""
+    from . import engine
+    runner = Warmup(enabled=True)
+    if warm:
+        runner.start().wait()
+    session: Dict[str, Any] = {"user_name": PROBE_USER}
+    engine.init_session(session)
+    started = time.perf_counter()
+    engine.respond_to(session, message)
+    return {"warm": warm, "first_turn_ms": round((time.perf_counter() - started) * 1000, 1),
+            "warmup_ms": round(runner.seconds * 1000, 1) if warm else None}
+
+
+def _run_first_turn(warm: bool, message: str) -> Dict[str, Any]:
+    args = [sys.executable, "-m", "elite_bot.warmup", "--first-turn", "warm" if warm else "cold", "--message", message]
+    out = subprocess.run(args, capture_output=True, text=True, check=True).stdout
+    return json.loads(next(line for line in reversed(out.splitlines()) if line.startswith('{"warm"')))
+
+
+def compare(runs: int, message: str) -> Dict[str, List[float]]:
+    """First-turn latency in fresh processes, alternating cold and warm."""
+    result: Dict[str, List[float]] = {"cold": [], "warm": []}
+    for _ in range(runs):
+        for warm in (False, True):
+            result["warm" if warm else "cold"].append(_run_first_turn(warm, message)["first_turn_ms"])
+    return result
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Start-up warm-up and first-turn latency")
+    parser.add_argument("--compare", action="store_true", help="first-turn latency without and with warm-up")
+    parser.add_argument("--runs", type=int, default=3, help="fresh processes per variant with --compare")
+    parser.add_argument("--message", default="!roleplay price", help="first message of the probe session")
+    parser.add_argument("--first-turn", choices=("cold", "warm"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.first_turn:
+        result = first_turn(args.first_turn == "warm", args.message)
+        print(json.dumps(result))
+        return
+    if args.compare:
+        result = compare(args.runs, args.message)
+        print(f"first-turn latency over {args.runs} fresh process(es) each, message {args.message!r}")
+        for variant, values in result.items():
+            values = sorted(values)
+            print(f"  {variant:<5} median {values[len(values) // 2]:>8.1f} ms   "
+                  f"min {values[0]:>8.1f}   max {values[-1]:>8.1f}")
+        return
+
+    runner = Warmup(enabled=True)
+    runner.start().wait()
+    for name, step in runner.stats()["steps"].items():
+        status = step.get("status") if step["ok"] else f"FAILED {step['error']}"
+        print(f"  {name:<13} {step['ms']:>8.1f} ms  {status}")
+
+
+if __name__ == "__main__":
+    main()
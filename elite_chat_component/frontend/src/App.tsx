@@ -17,6 +17,12 @@ interface Args {
 // Create a standalone mode for development and a connected mode for Streamlit
 const isStreamlit = window.parent !== window;
 
+// Unique id per user action so the server can drop re-delivered events
+const newEventId = (): string =>
+  (window.crypto && 'randomUUID' in window.crypto)
+    ? window.crypto.randomUUID()
+    : `${Date.now().toString(36)}-${Math.random().toString(36).slice(2, 10)}`;
+
 const App: React.FC = () => {
   const [messages, setMessages] = useState<Message[]>([
     { role: 'assistant', content: 'Welcome to Elite Auto Sales Academy. Use the commands from the sidebar (e.g., Scripts & Templates) or type your message below.' }
@@ -113,6 +119,7 @@ const App: React.FC = () => {
     if (isStreamlit) {
       // Send to Streamlit
       Streamlit.setComponentValue({
+        event_id: newEventId(),
         action: 'send_message',
         message: message,
         user_name: userName
@@ -124,6 +131,8 @@ const App: React.FC = () => {
   }, [isLoading, userName]);
 
   const sendCommand = useCallback((command: string) => {
+    // Ignore repeat clicks while the previous request is still in flight
+    if (isLoading) return;
     setIsLoading(true);
     
     // Add command as user message (in standalone mode only)
@@ -134,6 +143,7 @@ const App: React.FC = () => {
     if (isStreamlit) {
       // Send to Streamlit
       Streamlit.setComponentValue({
+        event_id: newEventId(),
         action: 'send_command',
         command: command,
         user_name: userName
@@ -142,7 +152,7 @@ const App: React.FC = () => {
       // Mock response in standalone mode
       mockResponse(command);
     }
-  }, [userName]);
+  }, [isLoading, userName]);
 
   const handleSubmit = (e: React.FormEvent) => {
     e.preventDefault();
@@ -159,6 +169,7 @@ const App: React.FC = () => {
       // Send the default name to Streamlit if we're in Streamlit mode
       if (isStreamlit) {
         Streamlit.setComponentValue({
+          event_id: newEventId(),
           action: 'set_name',
           user_name: 'User'
         });
@@ -176,6 +187,7 @@ const App: React.FC = () => {
       if (isStreamlit) {
         console.log("Sending name to Streamlit:", trimmedName);
         Streamlit.setComponentValue({
+          event_id: newEventId(),
           action: 'set_name',
           user_name: trimmedName
         });
@@ -2,6 +2,8 @@ import os
 import streamlit as st
 from streamlit.components.v1 import html
 
+from elite_bot.static_server import start_static_server
+
 # =========================
 # Setup
 # =========================
@@ -19,28 +21,14 @@ div[data-testid="stSidebar"] {display:none;}
 # Path to your React build
 build_dir = os.path.join(os.path.dirname(__file__), "elite_chat_component", "frontend", "build")
 
-# Create an iframe that points to a local HTML file
-st.markdown("""
+# Serve the build from a background thread (started once per process, reused on reruns)
+server, build_url = start_static_server(build_dir)
+
+st.markdown(f"""
 <div style="height: 800px; width: 100%;">
-    <iframe src="http://localhost:8000" width="100%" height="800px" frameBorder="0"></iframe>
+    <iframe src="{build_url}" width="100%" height="800px" frameBorder="0"></iframe>
 </div>
 """, unsafe_allow_html=True)
 
-st.markdown("""
-## Instructions
-
-To view the React component:
-
-1. Open a new terminal window
-2. Navigate to your build directory with:
-   ```
-   cd "/Users/huzaifaghori/Python Projects/streamlit component/elite_chat_component/frontend/build"
-   ```
-3. Start a simple HTTP server:
-   ```
-   python -m http.server
-   ```
-4. The React app should now be visible in the iframe above
-
-This approach avoids module loading issues by serving your React app through a proper web server.
-""")
+if server is None:
+    st.caption(f"Port busy: showing the build already served at {build_url}. Set AGBOT_STATIC_PORT to use another port.")
@@ -0,0 +1,103 @@
+# pages/manager_dashboard.py
+import os
+import time
+import datetime
+import pandas as pd
+import streamlit as st
+
+from elite_bot.rollups import aggregates_for, GRAINS
+from elite_bot.tenants import tenants
+
+# =========================
+# Setup
+# =========================
+st.set_page_config(page_title="Elite Manager Dashboard", page_icon="📊", layout="wide")
+
+# Optional gate so reps landing on the URL can't open the team view
+MANAGER_PASSWORD = os.getenv("AGBOT_MANAGER_PASSWORD", "")
+if MANAGER_PASSWORD and st.session_state.get("manager_ok") is not True:
+    pw = st.text_input("Manager password", type="password")
+    if pw != MANAGER_PASSWORD:
+        st.stop()
+    st.session_state.manager_ok = True
+
+# Same ?tenant= link as the rep app; no parameter is the default store
+TENANT = st.query_params.get("tenant") or None
+if not tenants.known(TENANT):
+    st.error(f"Unknown dealership: {TENANT}")
+    st.stop()
+aggregates = aggregates_for(tenants.resolve(TENANT))
+
+started = time.perf_counter()
+aggregates.refresh_from_mirror()
+
+st.title(f"Team Rollup — {aggregates.tenant.name}" if len(tenants) > 1 else "Team Rollup")
+grain = st.radio("View", GRAINS, index=1, horizontal=True, format_func=str.capitalize)
+periods = aggregates.periods(grain)
+if not periods:
+    st.info("No daily logs yet. Run `python -m elite_bot.mirror` or wait for reps to log with !dailylog.")
+    st.stop()
+
+label = {"day": "%a %b %d", "week": "Week of %b %d", "month": "%B %Y"}[grain]
+period = st.selectbox("Period", periods, format_func=lambda d: d.strftime(label))
+
+reps = pd.DataFrame(aggregates.rep_table(grain, period))
+team = reps[["Ups", "Calls", "FollowUps", "Appointments"]].sum()
+
+# =========================
+# Team KPIs
+# =========================
+cols = st.columns(6)
+cols[0].metric("Reps active", len(reps))
+cols[1].metric("Ups", int(team["Ups"]))
+cols[2].metric("Calls", int(team["Calls"]))
+cols[3].metric("Follow-ups", int(team["FollowUps"]))
+cols[4].metric("Appointments", int(team["Appointments"]))
+cols[5].metric("Appts per up", f"{team['Appointments'] / team['Ups']:.2f}" if team["Ups"] else "—")
+
+# =========================
+# Per-rep table and band mix
+# =========================
+left, right = st.columns([3, 2])
+with left:
+    st.subheader("Per rep")
+    st.dataframe(
+        reps.sort_values(["Appointments", "FollowUps"], ascending=False),
+        hide_index=True,
+        width="stretch",
+        column_config={
+            "ApptsPerUp": st.column_config.NumberColumn("Appts/Up", format="%.2f"),
+            "BandARate": st.column_config.NumberColumn("Band A %", format="percent"),
+        },
+    )
+with right:
+    st.subheader("Roleplay bands")
+    bands = reps[["BandA", "BandB", "BandC"]].sum()
+    if bands.sum():
+        # Plain Vega-Lite specs: st.bar_chart/st.line_chart go through Altair, which costs ~100 ms per rerun
+        st.vega_lite_chart(
+            pd.DataFrame({"Band": ["A", "B", "C"], "Turns": bands.to_numpy()}),
+            {"mark": "bar", "encoding": {
+                "x": {"field": "Band", "type": "nominal"},
+                "y": {"field": "Turns", "type": "quantitative"},
+            }},
+            width="stretch",
+        )
+    else:
+        st.caption("No roleplay turns logged in this period.")
+
+st.subheader(f"Team trend by {grain}")
+trend = pd.DataFrame(aggregates.team_series(grain))
+trend["Period"] = trend["Period"].astype(str)
+st.vega_lite_chart(
+    trend,
+    {"mark": "line", "transform": [{"fold": ["Ups", "Calls", "FollowUps", "Appointments"]}],
+     "encoding": {
+         "x": {"field": "Period", "type": "temporal"},
+         "y": {"field": "value", "type": "quantitative", "title": None},
+         "color": {"field": "key", "type": "nominal", "title": None},
+     }},
+    width="stretch",
+)
+
+st.caption(f"Computed in {(time.perf_counter() - started) * 1000:.0f} ms · updated {datetime.datetime.utcnow():%H:%M:%S} UTC")
@@ -0,0 +1,31 @@
+# tests/test_answer_cache.py
+from elite_bot.answer_cache import AnswerCache
+
+QUESTION = "how do I handle a customer who says the price is too high"
+
+
+def test_short_name_is_swapped_as_a_whole_word_only():
+    cache = AnswerCache()
+    cache.store(QUESTION, "Al, always run Pain-Vision-Fit. Also anchor value, Al.", "Al")
+
+    assert cache.lookup(QUESTION, "Maria") == "Maria, always run Pain-Vision-Fit. Also anchor value, Maria."
+
+
+def test_name_that_is_also_a_word_is_not_cached():
+    cache = AnswerCache()
+    cache.store(QUESTION, "Will you ask for the appointment? It will land, Will.", "Will")
+
+    assert cache.lookup(QUESTION, "Maria") is None
+
+
+def test_each_tenant_has_its_own_cache():
+    from elite_bot.answer_cache import cache_for
+    from elite_bot.tenants import Tenant, use
+
+    north, south = Tenant("north"), Tenant("south")
+    with use(north):
+        cache_for().store(QUESTION, "Anchor on the monthly payment.", "Al")
+        assert cache_for().lookup(QUESTION, "Al") == "Anchor on the monthly payment."
+    with use(south):
+        assert cache_for().lookup(QUESTION, "Al") is None
+    assert cache_for(north) is not cache_for(south)
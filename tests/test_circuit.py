@@ -0,0 +1,22 @@
+# tests/test_circuit.py
+import pytest
+
+from elite_bot import engine
+from elite_bot.scheduler import CircuitBreaker, QueueTimeout
+
+
+class _TimedOutScheduler:
+    def slot(self, key, on_wait=None):
+        raise QueueTimeout("Waited more than 90s for an OpenAI slot")
+
+
+def test_queue_timeout_does_not_count_against_the_circuit(monkeypatch):
+    circuit = CircuitBreaker(failures=1, cooldown=30)
+    monkeypatch.setattr(engine, "circuit", circuit)
+    monkeypatch.setattr(engine, "scheduler", _TimedOutScheduler())
+
+    with pytest.raises(QueueTimeout):
+        engine.chat_completion("rep-1", messages=[{"role": "user", "content": "hi"}])
+
+    assert circuit.state() == "closed"
+    assert circuit.stats()["consecutive_failures"] == 0
@@ -0,0 +1,30 @@
+# tests/test_dailylog.py
+import random
+
+from elite_bot import dailylog
+
+ANSWERS = {"ups": 5, "calls": 12, "followups": 3, "appointments": 2}
+
+
+def test_close_out_leaves_out_copy_that_is_not_configured(monkeypatch):
+    monkeypatch.setattr(dailylog, "ENCOURAGEMENTS", ())
+    monkeypatch.setattr(dailylog, "TIP_LIBRARY", ())
+
+    assert dailylog.close_out(ANSWERS) == ("Logged. Great work today! You logged 5 ups, 12 calls, "
+                                           "3 follow-ups, 2 appointments. Keep stacking clean reps.")
+
+
+def test_close_out_uses_the_configured_copy(monkeypatch):
+    monkeypatch.setattr(dailylog, "ENCOURAGEMENTS", ("Owner line.",))
+    monkeypatch.setattr(dailylog, "TIP_LIBRARY", ("Owner tip.",))
+
+    reply = dailylog.close_out(ANSWERS, random.Random(0))
+    assert reply.endswith("Keep stacking clean reps. Owner line. Tip: Owner tip.")
+
+
+def test_coaching_copy_loads_from_a_file(tmp_path, monkeypatch):
+    path = tmp_path / "coaching.json"
+    path.write_text('{"encouragements": ["Owner line."], "tips": ["Owner tip."]}', encoding="utf-8")
+    monkeypatch.setenv("AGBOT_COACHING_COPY", str(path))
+
+    assert dailylog._coaching_copy() == (("Owner line.",), ("Owner tip.",))
@@ -0,0 +1,16 @@
+# tests/test_leaderboard.py
+import datetime
+
+from elite_bot.leaderboard import DailyRollup
+
+
+def test_row_with_non_iso_date_is_skipped():
+    rollup = DailyRollup()
+    rollup.record(["10/18/2026", "Al", 1, 2, 3, 4, ""])
+    assert len(rollup) == 0
+
+    rollup.record(["2026-10-18", "Al", 1, 2, 3, 4, ""])
+    day = datetime.date(2026, 10, 18)
+    reps, sums = rollup.totals(day, day)
+    assert len(rollup) == 1
+    assert rollup.name(reps[0]) == "Al" and sums[0].tolist() == [1, 2, 3, 4]
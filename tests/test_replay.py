@@ -0,0 +1,33 @@
+# tests/test_replay.py
+import json
+
+from elite_bot.replay import Recorder
+
+
+def test_tool_call_arguments_are_pseudonymized(tmp_path):
+    path = tmp_path / "floor.jsonl"
+    recorder = Recorder(str(path))
+    session = {"session_id": "sess-real1234", "user_name": "Jordan Smith",
+               "messages": [{"role": "assistant", "content": "Welcome"}]}
+
+    token = recorder.begin(session, {"action": "send_message", "message": "we're at 450",
+                                     "user_name": "Jordan Smith"})
+    arguments = {"session_id": "sess-real1234", "user_name": "Jordan Smith", "user": "jordan smith",
+                 "scenario": "price", "step": 2, "band": "B",
+                 "message": "Jordan Smith held at 450, call me at 555-123-4567"}
+    recorder.on_completion({"session_id": "sess-real1234"}, {"choices": [{"message": {
+        "role": "assistant", "content": None,
+        "function_call": {"name": "log_session_turn", "arguments": json.dumps(arguments)}}}]}, 120.0)
+    session["messages"].append({"role": "assistant", "content": "Nice work, Jordan Smith."})
+    recorder.end(token)
+
+    out = path.read_text(encoding="utf-8")
+    assert "jordan" not in out.lower()
+    assert "sess-real1234" not in out
+    assert "555-123-4567" not in out
+
+    line = json.loads(out)
+    recorded = json.loads(line["completions"][0]["message"]["function_call"]["arguments"])
+    assert recorded["session_id"] == line["session"]
+    assert recorded["user_name"] == recorded["user"] == line["event"]["user_name"]
+    assert recorded["step"] == 2 and recorded["scenario"] == "price"
@@ -0,0 +1,47 @@
+# tests/test_session_log.py
+from elite_bot import sheets
+from elite_bot.tenants import Tenant, use
+
+
+class _Request:
+    def __init__(self, calls):
+        self.calls = calls
+
+    def execute(self):
+        self.calls.append("append")
+        return {}
+
+
+class _Values:
+    def __init__(self, calls):
+        self.calls = calls
+
+    def append(self, **kwargs):
+        return _Request(self.calls)
+
+
+class _Service:
+    def __init__(self):
+        self.calls = []
+
+    def spreadsheets(self):
+        return self
+
+    def values(self):
+        return _Values(self.calls)
+
+
+def test_repeated_turn_key_adds_one_row(monkeypatch):
+    service = _Service()
+    monkeypatch.setattr(sheets, "get_sheets_service", lambda: service)
+    monkeypatch.setattr(sheets, "prepare_tab", lambda *args: None)
+    monkeypatch.setattr(sheets, "session_log_tab", lambda session_id: "Sessions-2026-10-18")
+    tenant = Tenant("t1", session_log_spreadsheet_id="sheet-1")
+
+    with use(tenant):
+        first = sheets.session_log_append("s1", "Al", "price", 1, 450, 500, "B", "Hold value.", turn_key="s1:turn-1")
+        retry = sheets.session_log_append("s1", "Al", "price", 1, 450, 500, "B", "Hold value.", turn_key="s1:turn-1")
+        sheets.session_log_append("s1", "Al", "price", 2, 450, 480, "B", "Ask again.", turn_key="s1:turn-2")
+
+    assert first["ok"] and retry == {"ok": True, "mode": "duplicate"}
+    assert service.calls == ["append", "append"]
@@ -0,0 +1,53 @@
+# tests/test_usage.py
+import sqlite3
+
+from elite_bot.usage import UsageLedger, report
+
+
+def _pre_tenant_ledger(path):
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "CREATE TABLE usage (hour TEXT, session_id TEXT, user_name TEXT, scenario TEXT, command TEXT, "
+            "model TEXT, calls INTEGER, errors INTEGER, prompt_tokens INTEGER, completion_tokens INTEGER, "
+            "cost_usd REAL, latency_ms REAL, queue_ms REAL, max_latency_ms REAL, "
+            "PRIMARY KEY (hour, session_id, user_name, scenario, command, model))")
+        conn.execute("INSERT INTO usage VALUES ('2026-10-18T09:00', 's1', 'Al', '', '!pvf', 'gpt-4o-mini', "
+                     "2, 0, 900, 100, 0.01, 800, 0, 500)")
+
+
+def _columns(path):
+    with sqlite3.connect(path) as conn:
+        return [r[1] for r in conn.execute("PRAGMA table_info(usage)")]
+
+
+def test_report_reads_a_pre_tenant_ledger_without_migrating_it(tmp_path):
+    path = str(tmp_path / "usage.sqlite")
+    _pre_tenant_ledger(path)
+
+    assert [row[:2] for row in report("tenant", db_path=path)] == [("default", 2)]
+    assert [row[:2] for row in report("command", db_path=path, tenant="default")] == [("!pvf", 2)]
+    assert "tenant" not in _columns(path)
+
+
+def test_first_flush_migrates_the_ledger(tmp_path):
+    path = str(tmp_path / "usage.sqlite")
+    _pre_tenant_ledger(path)
+    ledger = UsageLedger(path)
+
+    ledger.record("gpt-4o-mini", {"prompt_tokens": 10, "completion_tokens": 5}, 100.0,
+                  tags={"tenant": "north", "command": "chat"})
+    assert ledger.flush() == 1
+
+    assert "tenant" in _columns(path)
+    assert sorted(row[:2] for row in report("tenant", db_path=path)) == [("default", 2), ("north", 1)]
+
+
+def test_record_leaves_the_flush_to_the_background_thread(tmp_path):
+    path = str(tmp_path / "usage.sqlite")
+    ledger = UsageLedger(path, flush_seconds=0)
+
+    ledger.record("gpt-4o-mini", {"prompt_tokens": 10, "completion_tokens": 5}, 100.0, tags={"command": "chat"})
+    assert not (tmp_path / "usage.sqlite").exists()
+
+    ledger.stop()
+    assert [row[:2] for row in report("command", db_path=path)] == [("chat", 1)]